@@ -0,0 +1,129 @@
+"""Batch backfill CLI: transcribe every recording of a manifest.
+
+The manifest is a ``.jsonl`` file of BatchItem objects, a ``.csv`` file with
+the same columns, or a text file with one storage path or file path per
+line; local files must be inside BATCH_LOCAL_DIR. Items are queued as
+low-priority jobs in the local job store (JOBS_DIR) and processed in this
+process by the regular job worker, so progress is checkpointed per item:
+after an interruption, running the same command again resumes where it
+stopped. With ``--submit-only`` the items are only queued, for an API
+server sharing the same JOBS_DIR to process.
+
+Progress and throughput (audio hours per hour) are printed while the batch
+runs. Results stay in the job store; ``--output`` exports them as JSON Lines
+and PERSIST_TRANSCRIPTIONS writes them to Supabase in bulk inserts.
+
+Usage (from backend/):
+    python -m app.batch archive.txt --user-id backfill
+    python -m app.batch calls.jsonl --name calls-2024 --workers 4 --output calls-2024.jsonl
+    python -m app.batch calls.jsonl --name calls-2024 --retry-failed
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("manifest", help="Manifest file (.jsonl, .csv, or one path per line)")
+    parser.add_argument("--name", help="Batch name used to resume (default: manifest file name)")
+    parser.add_argument("--user-id", default="batch", help="User ID for items that do not set one")
+    parser.add_argument("--workers", type=int,
+                        help="Items transcribed concurrently (sets JOB_WORKERS and INFERENCE_WORKERS)")
+    parser.add_argument("--submit-only", action="store_true", help="Queue the items and exit")
+    parser.add_argument("--retry-failed", action="store_true", help="Requeue items that failed in an earlier run")
+    parser.add_argument("--output", help="Write finished items as JSON Lines to this file when done")
+    parser.add_argument("--report-every", type=float, default=30.0, help="Seconds between progress lines")
+    return parser.parse_args(argv)
+
+
+def format_status(status) -> str:
+    throughput = f"{status.audio_hours_per_hour:.2f}" if status.audio_hours_per_hour is not None else "-"
+    return (
+        f"[{status.name}] {status.done + status.failed}/{status.total} finished "
+        f"({status.failed} failed, {status.running} running) | "
+        f"{status.audio_hours:.2f} audio h in {status.elapsed_seconds / 3600:.2f} h | "
+        f"{throughput} audio h/h"
+    )
+
+
+async def run(args: argparse.Namespace) -> int:
+    # Imported here so --workers can still change the settings
+    from .config import settings
+    from .services.batch_service import (
+        batch_status, is_local_source, load_manifest, local_source_allowed, result_line, submit_batch
+    )
+    from .services.job_store import get_job_store
+    from .services.job_worker import get_job_worker
+    from .services.inference_executor import get_inference_executor
+    from .services.model_registry import preload_models
+    from .services.transcription_writer import get_transcription_writer
+    from .services.long_audio import shutdown_long_audio_transcriber
+    from .services.supabase_service import close_supabase_service
+
+    items = load_manifest(args.manifest)
+    outside = [item.audio_url for item in items if is_local_source(item.audio_url)
+               and not local_source_allowed(item.audio_url)]
+    if outside:
+        print(f"{len(outside)} local files are outside BATCH_LOCAL_DIR "
+              f"({settings.BATCH_LOCAL_DIR or 'not set'}), e.g. {outside[0]}", file=sys.stderr)
+        return 2
+
+    store = get_job_store()
+    name = args.name or os.path.basename(args.manifest)
+    batch, added = submit_batch(store, name, args.user_id, items)
+    print(f"Batch {name} ({batch['id']}): {added} new items queued")
+    if args.retry_failed:
+        print(f"Requeued {store.requeue_failed(batch['id'])} failed items")
+    if args.submit_only:
+        print(format_status(batch_status(store, batch)))
+        return 0
+
+    if settings.PRELOAD_MODELS:
+        await asyncio.get_running_loop().run_in_executor(None, preload_models)
+    writer = get_transcription_writer()
+    if writer is not None:
+        writer.start()
+    worker = get_job_worker()
+    worker.start()
+
+    try:
+        while True:
+            status = batch_status(store, batch)
+            print(format_status(status), flush=True)
+            if status.queued == 0 and status.running == 0:
+                break
+            await asyncio.sleep(args.report_every)
+    finally:
+        await worker.stop()
+        if writer is not None:
+            await writer.stop()
+            await close_supabase_service()
+        get_inference_executor().shutdown()
+        shutdown_long_audio_transcriber()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            for job in store.iter_batch_results(batch["id"]):
+                f.write(result_line(job))
+        print(f"Results written to {args.output}")
+    return 1 if status.failed else 0
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.workers:
+        os.environ["JOB_WORKERS"] = str(args.workers)
+        os.environ["INFERENCE_WORKERS"] = str(args.workers)
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"))
+    try:
+        return asyncio.run(run(args))
+    except KeyboardInterrupt:
+        print("Interrupted; run the same command again to resume")
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
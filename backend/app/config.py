@@ -1,6 +1,6 @@
 """Application configuration and settings."""
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import Literal, Optional
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
@@ -8,13 +8,106 @@ class Settings(BaseSettings):
     # Supabase
     SUPABASE_URL: str
     SUPABASE_KEY: str
+    SUPABASE_MAX_CONNECTIONS: int = 10  # Pooled HTTP connections to PostgREST/Storage
+    STORAGE_RANGE_MB: int = 4  # Byte range per Storage request (/transcribe/url)
+    STORAGE_RANGE_CONCURRENCY: int = 4  # Ranged Storage requests in flight per download
+    
+    # Persistence (write-behind to the Supabase 'transcriptions' table)
+    PERSIST_TRANSCRIPTIONS: bool = False
+    PERSIST_OUTBOX_PATH: str = "data/outbox.db"  # Durable local queue of unsent rows
+    PERSIST_BATCH_SIZE: int = 50  # Rows per insert request
+    PERSIST_FLUSH_INTERVAL_SECONDS: float = 1.0
+    PERSIST_MAX_ATTEMPTS: int = 10  # Failed inserts before a row is kept as dead
     
     # Whisper Configuration
     WHISPER_MODEL: str = "base"  # tiny, base, small, medium, large
+    WHISPER_BACKEND: Literal["openai-whisper", "faster-whisper"] = "openai-whisper"
+    WHISPER_COMPUTE_TYPE: str = "int8"  # faster-whisper only: int8, int8_float16, float32
+    WHISPER_CPU_THREADS: int = 0  # faster-whisper only: 0 = threads per inference worker
+    
+    # Adaptive Model Selection (per request, among the loaded sizes)
+    WHISPER_MODELS: str = ""  # Extra sizes kept loaded, e.g. "tiny,base,small" (empty = WHISPER_MODEL only)
+    MODEL_DEGRADE_QUEUE: int = 2  # Waiting inference calls per step to a smaller model (0 = never)
+    MODEL_LONG_AUDIO_SECONDS: float = 600  # Recordings this long use one size smaller
+    MODEL_SHORT_AUDIO_SECONDS: float = 30  # Clips this short use one size larger when idle
+    MODEL_MIN_MULTILINGUAL: str = "base"  # Smallest model for languages other than English
+    
+    # Language Identification (requests without a language)
+    LANGUAGE_ID_WINDOW_SECONDS: float = 10  # Leading audio used to detect the language (0 = detect while decoding)
+    LANGUAGE_ID_MIN_PROBABILITY: float = 0.5  # Less confident detections fall back to Whisper's own
+    LANGUAGE_MEMORY_SIZE: int = 10000  # Users/ejecutivos whose last language is remembered (0 = disabled)
+    LANGUAGE_MEMORY_TTL_SECONDS: int = 86400  # Age after which a remembered language is detected again
     
     # Hugging Face Configuration (for diarization)
     HF_TOKEN: Optional[str] = None
     
+    # Diarization Pipeline
+    PARALLEL_DIARIZATION: bool = True  # Run diarization and Whisper side by side, joined at alignment
+    DIARIZATION_THREADS: int = 0  # Torch threads for pyannote (0 = half of the cores per inference worker)
+    TRANSCRIPTION_THREADS: int = 0  # Torch threads for Whisper in diarization mode (0 = the other half)
+    
+    # Model Registry
+    PRELOAD_MODELS: bool = True  # Load models at startup instead of first request
+    WARMUP_INFERENCE: bool = True  # Run a dummy inference on each preloaded model before reporting ready
+    
+    # Uploads
+    MAX_UPLOAD_MB: int = 25  # Larger uploads are rejected with 413
+    
+    # Inference Executor
+    INFERENCE_WORKERS: int = 1  # Concurrent transcriptions per process
+    INFERENCE_QUEUE_DEPTH: int = 4  # Requests allowed to wait for a worker
+    INFERENCE_RETRY_AFTER_SECONDS: int = 10  # Retry-After sent when saturated
+    INFERENCE_THREADS: int = 0  # Torch intra-op threads per worker (0 = its share of the physical cores)
+    INFERENCE_INTEROP_THREADS: int = 1  # Torch inter-op threads per process
+    INFERENCE_PIN_CPUS: bool = False  # Bind each worker to its own cores (Linux)
+    INFERENCE_AUTOTUNE: bool = False  # Pick workers x threads from a calibration run at startup
+    
+    # Inference Scheduling (which waiting request gets the next worker)
+    SCHEDULER_SIMPLE_WEIGHT: float = 3.0  # Worker-time share of simple mode under contention
+    SCHEDULER_DIARIZATION_WEIGHT: float = 1.0
+    SCHEDULER_DIARIZATION_COST_FACTOR: float = 3.0  # Estimated cost per audio second vs simple mode
+    SCHEDULER_USER_MAX_RUNNING: int = 0  # Concurrent inference calls per user_id (0 = no cap)
+    SCHEDULER_AGING_RATE: float = 1.0  # Estimated-cost seconds forgiven per second waited
+    
+    # Micro-batching of short simple-mode clips (openai-whisper backend)
+    BATCHING_ENABLED: bool = False
+    BATCH_WINDOW_MS: int = 20  # Wait this long for more requests to join a batch
+    BATCH_MAX_SIZE: int = 8  # Dispatch immediately at this batch size
+    
+    # Long Audio (chunked, parallel transcription)
+    LONG_AUDIO_WORKERS: int = 0  # Worker processes, each with its own model (0 = disabled; capped at one inference worker's threads)
+    LONG_AUDIO_THRESHOLD_SECONDS: float = 600  # Recordings at least this long are chunked
+    LONG_AUDIO_CHUNK_SECONDS: float = 60  # Maximum chunk length, cut at silences
+    
+    # Result Cache (keyed by audio content hash, model, mode, language)
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_DIR: str = "data/cache"
+    RESULT_CACHE_MAX_MB: int = 512  # On-disk tier, LRU-evicted above this size
+    RESULT_CACHE_MEMORY_ENTRIES: int = 256  # In-memory tier (0 disables it)
+    
+    # Voiceprints (recognise the ejecutivo by voice in diarization mode)
+    VOICEPRINTS_ENABLED: bool = True
+    VOICEPRINT_DIR: str = "data/voiceprints"
+    VOICEPRINT_THRESHOLD: float = 0.6  # Cosine similarity required to recognise the ejecutivo
+    VOICEPRINT_MAX_PENDING: int = 1000  # Unconfirmed jobs kept for enrollment
+    VOICEPRINT_AUTO_ENROLL_SIMILARITY: float = 0.8  # Matches this close are enrolled without confirmation (0 = never)
+    
+    # Real-time Streaming (WebSocket)
+    STREAM_STEP_SECONDS: float = 1.0  # New audio required before re-transcribing
+    STREAM_WINDOW_SECONDS: float = 15  # Buffer length at which segments are finalized
+    STREAM_MAX_BUFFER_SECONDS: float = 30  # Hard cap on buffered audio per stream
+    STREAM_QUEUE_FRAMES: int = 64  # Frames buffered before the socket stops reading
+    STREAM_MAX_FRAME_BYTES: int = 65536  # Larger frames close the stream
+    STREAM_DIARIZATION_WINDOW_SECONDS: float = 1.5  # Audio per speaker embedding (diarize=true)
+    STREAM_DIARIZATION_THRESHOLD: float = 0.5  # Cosine similarity to join an existing speaker
+    STREAM_MAX_SPEAKERS: int = 4
+    
+    # Asynchronous Jobs
+    JOBS_DIR: str = "data/jobs"  # SQLite queue and spooled audio
+    JOB_WORKERS: int = 1  # Jobs processed concurrently
+    JOB_RETENTION_HOURS: int = 24  # Finished jobs kept for polling
+    BATCH_LOCAL_DIR: Optional[str] = None  # Server directory batch manifests (API and CLI) may read files from
+    
     # Server
     PORT: int = 8000
     HOST: str = "0.0.0.0"
@@ -1,9 +1,30 @@
 """FastAPI application for Speech-to-Text transcription using Whisper."""
 """Main FastAPI application for Speech-to-Text backend."""
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from .config import settings
-from .routers import transcribe
+from .routers import transcribe, jobs, stream, batches
+from .services.model_registry import get_model_registry
+from .services.warmup import STATE_READY, get_readiness, prepare_models
+from .services.inference_executor import get_inference_executor
+from .services.diarization_service import shutdown_stage_pools
+from .services.job_store import get_job_store
+from .services.job_worker import get_job_worker
+from .services.result_cache import get_result_cache
+from .services.voiceprint_store import get_voiceprint_store
+from .services.transcription_writer import get_transcription_writer
+from .services.supabase_service import close_supabase_service
+from .services.metrics import render_metrics
+from .services.model_selector import get_model_selector
+from .services.language_id import get_language_memory
+from .services.long_audio import shutdown_long_audio_transcriber
+from .services.batch_scheduler import batch_scheduler_stats, shutdown_batch_scheduler
+from typing import Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
 
 # OpenAPI/Swagger Configuration
 app = FastAPI(
@@ -20,15 +41,21 @@ This API provides audio transcription services using:
 - ✅ Diarization mode (speaker identification)
 - ✅ Multi-language support (auto-detect or specify)
 - ✅ Confidence scoring
-- ✅ JSONB support for conversation segments
+- ✅ JSONB support for conversation segments (batched write-behind to Supabase)
+- ✅ Asynchronous jobs for long recordings (submit, poll, fetch)
+- ✅ Server-side transcription of Supabase Storage recordings (`/api/v1/transcribe/url`)
+- ✅ Low-priority, resumable batch backfills from a manifest (`/api/v1/batches`, `python -m app.batch`)
+- ✅ Real-time streaming transcription over WebSocket (`/api/v1/stream`)
+- ✅ Prometheus metrics (`/metrics`) with per-stage latency histograms
+- ✅ Liveness (`/health/live`) and readiness (`/health/ready`) probes for orchestrators
 
 ### Authentication:
-All endpoints require `X-API-Key` header.
+All endpoints require `X-API-Key` header (except `/health*` and `/metrics`).
 
 ### Models:
-- Whisper: `{model}` 
+- Whisper: `{model}` ({backend})
 - Diarization: pyannote/speaker-diarization-3.1
-    """.format(model=settings.WHISPER_MODEL),
+    """.format(model=settings.WHISPER_MODEL, backend=settings.WHISPER_BACKEND),
     version="1.0.0",
     contact={
         "name": "Development Team",
@@ -51,8 +78,86 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Multipart envelope allowance on top of MAX_UPLOAD_MB for form fields and boundaries
+UPLOAD_OVERHEAD_BYTES = 64 * 1024
+
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """Return 413 from Content-Length before the body is read."""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        if int(content_length) > settings.MAX_UPLOAD_MB * 1024 * 1024 + UPLOAD_OVERHEAD_BYTES:
+            return JSONResponse(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                content={"detail": f"Audio file exceeds the {settings.MAX_UPLOAD_MB}MB limit"}
+            )
+    return await call_next(request)
+
 # Include routers
 app.include_router(transcribe.router, prefix="/api/v1", tags=["Transcription"])
+app.include_router(jobs.router, prefix="/api/v1", tags=["Jobs"])
+app.include_router(stream.router, prefix="/api/v1", tags=["Streaming"])
+app.include_router(batches.router, prefix="/api/v1", tags=["Batches"])
+
+
+# Background model preparation; referenced so the task is not garbage collected
+_prepare_task: Optional[asyncio.Task] = None
+
+
+@app.on_event("startup")
+async def load_models():
+    """Load and warm Whisper (and pyannote if configured) in the background.
+
+    Startup does not wait for the models, so /health/live answers right away;
+    /health/ready turns 200 once they are loaded and warmed up.
+    """
+    global _prepare_task
+    readiness = get_readiness()
+    if settings.PRELOAD_MODELS:
+        logger.info("Preloading models in the background...")
+        _prepare_task = asyncio.create_task(prepare_models(readiness))
+    else:
+        # Models load on first request; nothing to wait for
+        readiness.set_state(STATE_READY)
+
+
+@app.on_event("startup")
+async def start_job_worker():
+    """Resume queued and interrupted jobs from the persistent job store."""
+    get_job_worker().start()
+
+
+@app.on_event("shutdown")
+async def stop_job_worker():
+    """Stop draining the job queue; running jobs are requeued on next start."""
+    await get_job_worker().stop()
+
+
+@app.on_event("startup")
+async def start_transcription_writer():
+    """Start draining the persistence outbox, including rows left by a previous run."""
+    writer = get_transcription_writer()
+    if writer is not None:
+        writer.start()
+
+
+@app.on_event("shutdown")
+async def stop_transcription_writer():
+    """Flush what Supabase accepts now; the rest stays in the outbox for next start."""
+    writer = get_transcription_writer()
+    if writer is not None:
+        await writer.stop()
+    await close_supabase_service()
+
+
+@app.on_event("shutdown")
+async def stop_inference_executor():
+    """Cancel pending batches; release inference and stage threads and long-audio processes."""
+    shutdown_batch_scheduler()
+    get_inference_executor().shutdown()
+    shutdown_stage_pools()
+    shutdown_long_audio_transcriber()
 
 
 @app.get("/", tags=["Health"])
@@ -64,6 +169,8 @@ async def root():
         "status": "online",
         "docs": "/docs",
         "health": "/health",
+        "liveness": "/health/live",
+        "readiness": "/health/ready",
     }
 
 
@@ -74,9 +181,55 @@ async def health_check():
     
     Returns server status and configuration info.
     """
+    cache = get_result_cache()
+    voiceprints = get_voiceprint_store()
+    writer = get_transcription_writer()
+    language_memory = get_language_memory()
     return {
         "status": "healthy",
+        "readiness": get_readiness().stats(),
         "whisper_model": settings.WHISPER_MODEL,
+        "model_selection": get_model_selector().stats(),
+        "language_memory": language_memory.stats() if language_memory else None,
+        "whisper_backend": settings.WHISPER_BACKEND,
         "environment": settings.ENVIRONMENT,
         "diarization_enabled": settings.HF_TOKEN is not None,
+        "model_registry": get_model_registry().stats(),
+        "inference": get_inference_executor().stats(),
+        "jobs": get_job_store().counts(),
+        "result_cache": cache.stats() if cache else None,
+        "voiceprints": voiceprints.stats() if voiceprints else None,
+        "persistence": writer.stats() if writer else None,
+        "batching": batch_scheduler_stats(),
     }
+
+
+@app.get("/health/live", tags=["Health"])
+async def liveness():
+    """Liveness probe: the process is up and the event loop responds.
+
+    Does no work, so it answers during model loading too.
+    """
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", tags=["Health"])
+async def readiness_check():
+    """
+    Readiness probe.
+    
+    200 once the configured models are loaded and warmed up with a dummy
+    inference, 503 while loading (or if loading failed).
+    """
+    readiness = get_readiness()
+    content = readiness.stats()
+    if not readiness.ready:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=content)
+    return content
+
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics():
+    """Prometheus metrics: stage latencies, real-time factor, queue depth, model memory."""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
@@ -0,0 +1,37 @@
+"""Pydantic models for batch (backfill) transcription."""
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from datetime import datetime
+
+class BatchItem(BaseModel):
+    """One recording of a batch manifest."""
+    audio_url: str = Field(..., description="Storage path (bucket/path) or a file path readable by the server")
+    user_id: Optional[str] = Field(None, description="User ID the transcription belongs to (defaults to the batch user)")
+    language: Optional[str] = Field(None, description="Language code (es, en). Auto-detect if not provided")
+    mode: Literal["simple", "diarization"] = Field("simple", description="Transcription mode (simple | diarization)")
+    cliente_id: Optional[int] = Field(None, description="Cliente ID for context (improves diarization accuracy)")
+    ejecutivo_id: Optional[str] = Field(None, description="Ejecutivo/User ID for context (improves diarization accuracy)")
+
+
+class BatchRequest(BaseModel):
+    """A manifest of recordings to backfill."""
+    name: str = Field(..., description="Batch name; submitting the same name again resumes the batch")
+    user_id: str = Field(..., description="User ID submitting the batch")
+    items: List[BatchItem] = Field(..., description="Recordings, in manifest order")
+
+
+class BatchStatusResponse(BaseModel):
+    """Progress and throughput of a batch."""
+    batch_id: str = Field(..., description="Batch identifier")
+    name: str = Field(..., description="Batch name")
+    total: int = Field(..., description="Items in the batch")
+    queued: int = Field(0, description="Items waiting")
+    running: int = Field(0, description="Items being transcribed")
+    done: int = Field(0, description="Items transcribed")
+    failed: int = Field(0, description="Items that failed")
+    progress: float = Field(0.0, ge=0.0, le=1.0, description="Finished fraction (done or failed)")
+    audio_hours: float = Field(0.0, description="Hours of audio transcribed so far")
+    elapsed_seconds: float = Field(0.0, description="Seconds since the first item started")
+    audio_hours_per_hour: Optional[float] = Field(None, description="Throughput: audio hours transcribed per wall-clock hour")
+    created_at: datetime = Field(..., description="First submission timestamp")
+    results_url: str = Field(..., description="JSON Lines export of finished items")
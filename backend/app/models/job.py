@@ -0,0 +1,37 @@
+"""Pydantic models for asynchronous transcription jobs."""
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+class JobStatusResponse(BaseModel):
+    """Status of an asynchronous transcription job."""
+    job_id: str = Field(..., description="Job identifier")
+    status: str = Field(..., description="Job status (queued | running | done | failed)")
+    progress: float = Field(0.0, ge=0.0, le=1.0, description="Progress (0-1)")
+    stage: Optional[str] = Field(None, description="Current pipeline stage")
+    mode: str = Field(..., description="Transcription mode (simple | diarization)")
+    error: Optional[str] = Field(None, description="Error message if the job failed")
+    created_at: datetime = Field(..., description="Submission timestamp")
+    updated_at: datetime = Field(..., description="Last status change")
+    result_url: Optional[str] = Field(None, description="Where to fetch the result once done")
+
+    @classmethod
+    def from_job(cls, job: dict) -> "JobStatusResponse":
+        return cls(
+            job_id=job["id"],
+            status=job["status"],
+            progress=job["progress"],
+            stage=job["stage"],
+            mode=job["mode"],
+            error=job["error"],
+            created_at=datetime.utcfromtimestamp(job["created_at"]),
+            updated_at=datetime.utcfromtimestamp(job["updated_at"]),
+            result_url=f"/api/v1/jobs/{job['id']}/result" if job["status"] == "done" else None
+        )
+
+
+class SpeakerConfirmationResponse(BaseModel):
+    """Result of confirming which speaker of a call is the ejecutivo."""
+    ejecutivo_id: str = Field(..., description="Ejecutivo whose voiceprint was updated")
+    speaker: str = Field(..., description="Speaker label enrolled as the ejecutivo")
+    enrolled_calls: int = Field(..., description="Confirmed calls the voiceprint is built from")
@@ -1,7 +1,7 @@
 """Pydantic models for transcription requests and responses."""
 from pydantic import BaseModel, Field
 from typing import Optional
-from typing import Optional, List
+from typing import Any, Dict, Literal, Optional, List
 from datetime import datetime
 
 class TranscriptionRequest(BaseModel):
@@ -9,6 +9,9 @@ class TranscriptionRequest(BaseModel):
     audio_url: str = Field(..., description="URL path to audio file in Supabase Storage")
     language: Optional[str] = Field(None, description="Language code (es, en). Auto-detect if not provided")
     user_id: str = Field(..., description="User ID making the request")
+    mode: Literal["simple", "diarization"] = Field("simple", description="Transcription mode (simple | diarization)")
+    cliente_id: Optional[int] = Field(None, description="Cliente ID for context (improves diarization accuracy)")
+    ejecutivo_id: Optional[str] = Field(None, description="Ejecutivo/User ID for context (improves diarization accuracy)")
 
 class DiarizationSegment(BaseModel):
     """Segment with speaker identification."""
@@ -26,9 +29,11 @@ class TranscriptionResponse(BaseModel):
     confidence: float = Field(..., ge=0.0, le=1.0, description="Transcription confidence")
     duration_seconds: float = Field(..., description="Audio duration in seconds")
     mode: Optional[str] = Field("simple", description="Transcription mode (simple | diarization)")
+    model: Optional[str] = Field(None, description="Whisper model that produced the transcription")
     segments: Optional[List[DiarizationSegment]] = Field(None, description="Speaker segments (diarization mode only)")
     num_speakers: Optional[int] = Field(None, description="Number of speakers detected (diarization mode only)")
     created_at: datetime = Field(default_factory=datetime.utcnow, description="Timestamp")
+    debug: Optional[Dict[str, Any]] = Field(None, description="Per-stage timings in seconds (only with debug=true)")
     
 class ErrorResponse(BaseModel):
     """Error response model."""
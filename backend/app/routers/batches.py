@@ -0,0 +1,123 @@
+"""Batches router - /batches endpoints for backfilling recording archives."""
+from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi.responses import StreamingResponse
+from ..models.transcription import ErrorResponse
+from ..models.batch import BatchRequest, BatchStatusResponse
+from ..services.job_store import get_job_store
+from ..services.job_worker import get_job_worker
+from ..services.batch_service import (
+    submit_batch, batch_status, result_line, is_local_source, local_source_allowed, BatchOwnerError
+)
+from ..dependencies import verify_api_key
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.post(
+    "/batches",
+    response_model=BatchStatusResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Queue a manifest of recordings for backfill",
+    description="""
+    ## Queue many recordings for transcription at low priority.
+
+    Each item is a Supabase Storage path (`bucket/path/to/file.m4a`), or a
+    file under the server's `BATCH_LOCAL_DIR`. Items run as asynchronous jobs
+    below interactive traffic: they only start while no interactive request
+    is waiting for an inference worker.
+
+    Progress is checkpointed per item. Submitting a manifest again under the
+    same `name` resumes it: only items at new positions are queued. Poll
+    `GET /batches/{batch_id}` for progress and throughput, and download
+    finished items from `GET /batches/{batch_id}/results` (JSON Lines).
+    With `PERSIST_TRANSCRIPTIONS` enabled, results are also written to
+    Supabase in bulk inserts.
+    """,
+    responses={
+        400: {"description": "Invalid manifest", "model": ErrorResponse},
+        401: {"description": "Invalid or missing API key", "model": ErrorResponse},
+        409: {"description": "Batch name belongs to another user", "model": ErrorResponse},
+    },
+    dependencies=[Depends(verify_api_key)],
+    tags=["Batches"]
+)
+async def create_batch(body: BatchRequest):
+    if not body.items:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Manifest has no items")
+    for index, item in enumerate(body.items):
+        if is_local_source(item.audio_url) and not local_source_allowed(item.audio_url):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Item {index}: local files must be inside BATCH_LOCAL_DIR"
+            )
+
+    store = get_job_store()
+    try:
+        batch, added = submit_batch(store, body.name, body.user_id, body.items)
+    except BatchOwnerError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Batch name already in use")
+    if added:
+        get_job_worker().notify()
+
+    logger.info(f"Batch {body.name} submitted by user {body.user_id}: {added} new items")
+    return batch_status(store, batch)
+
+
+@router.get(
+    "/batches/{batch_id}",
+    response_model=BatchStatusResponse,
+    summary="Get batch progress and throughput",
+    responses={
+        404: {"description": "Unknown batch", "model": ErrorResponse},
+    },
+    dependencies=[Depends(verify_api_key)],
+    tags=["Batches"]
+)
+async def get_batch(batch_id: str):
+    store = get_job_store()
+    batch = store.get_batch(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Batch not found")
+    return batch_status(store, batch)
+
+
+@router.get(
+    "/batches/{batch_id}/results",
+    summary="Download the finished items of a batch (JSON Lines)",
+    responses={
+        200: {"content": {"application/x-ndjson": {}}, "description": "One finished item per line"},
+        404: {"description": "Unknown batch", "model": ErrorResponse},
+    },
+    dependencies=[Depends(verify_api_key)],
+    tags=["Batches"]
+)
+async def get_batch_results(batch_id: str):
+    store = get_job_store()
+    if store.get_batch(batch_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Batch not found")
+    return StreamingResponse(
+        (result_line(job) for job in store.iter_batch_results(batch_id)),
+        media_type="application/x-ndjson"
+    )
+
+
+@router.post(
+    "/batches/{batch_id}/retry",
+    response_model=BatchStatusResponse,
+    summary="Requeue the failed items of a batch",
+    responses={
+        404: {"description": "Unknown batch", "model": ErrorResponse},
+    },
+    dependencies=[Depends(verify_api_key)],
+    tags=["Batches"]
+)
+async def retry_batch(batch_id: str):
+    store = get_job_store()
+    batch = store.get_batch(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Batch not found")
+    if store.requeue_failed(batch_id):
+        get_job_worker().notify()
+    return batch_status(store, batch)
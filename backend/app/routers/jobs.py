@@ -0,0 +1,203 @@
+"""Jobs router - asynchronous /jobs endpoints for long recordings."""
+from fastapi import APIRouter, HTTPException, Depends, status, UploadFile, File, Form, Query
+from ..models.transcription import TranscriptionResponse, ErrorResponse
+from ..models.job import JobStatusResponse, SpeakerConfirmationResponse
+from ..services.job_store import get_job_store, JOB_DONE, JOB_FAILED
+from ..services.job_worker import get_job_worker
+from ..services.upload_service import save_upload, upload_suffix, max_upload_bytes, UploadTooLargeError
+from ..services.transcription_service import build_context
+from ..services.voiceprint_store import get_voiceprint_store, VoiceprintNotFoundError
+from ..services.metrics import stage_timer
+from ..dependencies import verify_api_key
+from ..config import settings
+import logging
+import os
+import uuid
+from typing import Literal, Optional
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.post(
+    "/jobs",
+    response_model=JobStatusResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Submit audio for asynchronous transcription",
+    description="""
+    ## Queue an audio file for transcription and return immediately.
+    
+    Use this instead of `/transcribe` for long recordings that would exceed
+    proxy timeouts. Poll `GET /jobs/{job_id}` and fetch the result from
+    `GET /jobs/{job_id}/result` once `status` is `done`.
+    
+    Jobs are persisted locally and survive a server restart. Submitting the
+    same audio with the same options again returns the existing job instead
+    of transcribing it twice.
+    """,
+    responses={
+        400: {"description": "Invalid request", "model": ErrorResponse},
+        401: {"description": "Invalid or missing API key", "model": ErrorResponse},
+        413: {"description": "Audio file exceeds MAX_UPLOAD_MB", "model": ErrorResponse},
+    },
+    dependencies=[Depends(verify_api_key)],
+    tags=["Jobs"]
+)
+async def submit_job(
+    file: UploadFile = File(..., description="Audio file to transcribe (m4a, mp3, wav, etc.)"),
+    user_id: str = Form(..., description="User ID making the request", example="user-123"),
+    language: str = Form(None, description="Language code (es, en). Auto-detect if omitted", example="es"),
+    mode: Literal["simple", "diarization"] = Query(
+        "simple",
+        description="Transcription mode: 'simple' (fast) or 'diarization' (speaker ID)",
+        example="diarization"
+    ),
+    cliente_id: Optional[int] = Form(None, description="Cliente ID for context (improves diarization accuracy)"),
+    ejecutivo_id: Optional[str] = Form(None, description="Ejecutivo/User ID for context (improves diarization accuracy)")
+):
+    if mode == "diarization" and not settings.HF_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="HF_TOKEN environment variable required for diarization mode"
+        )
+    
+    store = get_job_store()
+    audio_dir = os.path.join(settings.JOBS_DIR, "audio")
+    os.makedirs(audio_dir, exist_ok=True)
+    audio_path = os.path.join(audio_dir, uuid.uuid4().hex + upload_suffix(file))
+    
+    try:
+        with stage_timer("upload"):
+            size, sha256 = await save_upload(file, audio_path, max_upload_bytes())
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    if size == 0:
+        os.remove(audio_path)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty audio file")
+    
+    context = build_context(cliente_id, ejecutivo_id)
+    
+    existing = store.find_duplicate(sha256, mode, language, context, user_id)
+    if existing:
+        os.remove(audio_path)
+        logger.info(f"Duplicate submission from user {user_id}, returning job {existing['id']}")
+        return JobStatusResponse.from_job(existing)
+    
+    job = store.create(
+        mode=mode,
+        user_id=user_id,
+        audio_path=audio_path,
+        audio_sha256=sha256,
+        language=language,
+        context=context
+    )
+    get_job_worker().notify()
+    
+    logger.info(f"Job {job['id']} queued for user {user_id} ({size} bytes), mode={mode}")
+    return JobStatusResponse.from_job(job)
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=JobStatusResponse,
+    summary="Get job status and progress",
+    responses={
+        404: {"description": "Unknown job", "model": ErrorResponse},
+    },
+    dependencies=[Depends(verify_api_key)],
+    tags=["Jobs"]
+)
+async def get_job(job_id: str):
+    job = get_job_store().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return JobStatusResponse.from_job(job)
+
+
+@router.get(
+    "/jobs/{job_id}/result",
+    response_model=TranscriptionResponse,
+    summary="Fetch the transcription of a finished job",
+    responses={
+        404: {"description": "Unknown job", "model": ErrorResponse},
+        409: {"description": "Job not finished yet, or failed", "model": ErrorResponse},
+    },
+    dependencies=[Depends(verify_api_key)],
+    tags=["Jobs"]
+)
+async def get_job_result(job_id: str):
+    job = get_job_store().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    if job["status"] == JOB_FAILED:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job failed: {job['error']}")
+    if job["status"] != JOB_DONE:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job is {job['status']} ({job['progress']:.0%})"
+        )
+    return TranscriptionResponse(**job["result"])
+
+
+@router.post(
+    "/jobs/{job_id}/confirm-speaker",
+    response_model=SpeakerConfirmationResponse,
+    summary="Confirm the ejecutivo of a diarized job and enroll their voiceprint",
+    description="""
+    ## Confirm which speaker of a finished diarization job is the ejecutivo.
+    
+    The speaker's embedding from this call is added to the voiceprint of the
+    job's `ejecutivo_id`. Later calls of that ejecutivo are then labelled by
+    voice instead of by who spoke first.
+    
+    An ejecutivo's first voiceprint always needs this confirmation. Once
+    enrolled, calls whose speaker matches the voiceprint with at least
+    `VOICEPRINT_AUTO_ENROLL_SIMILARITY` are enrolled automatically and have
+    nothing left to confirm (404); only jobs without such a match are kept
+    for confirmation.
+    
+    `speaker` defaults to the speaker the job labelled as `ejecutivo`; pass
+    it explicitly to correct a wrong assignment.
+    """,
+    responses={
+        400: {"description": "Voiceprints disabled or job has no ejecutivo_id", "model": ErrorResponse},
+        404: {"description": "Unknown job, or no staged speaker embeddings for it", "model": ErrorResponse},
+        409: {"description": "Job not finished yet, or not a diarization job", "model": ErrorResponse},
+    },
+    dependencies=[Depends(verify_api_key)],
+    tags=["Jobs"]
+)
+async def confirm_job_speaker(
+    job_id: str,
+    speaker: Optional[str] = Query(None, description="Speaker label of the ejecutivo (e.g. SPEAKER_01)")
+):
+    voiceprints = get_voiceprint_store()
+    if voiceprints is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Voiceprints are disabled")
+    
+    job = get_job_store().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    if job["status"] != JOB_DONE or job["mode"] != "diarization":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Only finished diarization jobs can be confirmed"
+        )
+    if not (job["context"] or {}).get("ejecutivo_id"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Job has no ejecutivo_id")
+    
+    if speaker is None:
+        speaker = next(
+            (s["speaker"] for s in job["result"].get("segments") or [] if s.get("role") == "ejecutivo"),
+            None
+        )
+        if speaker is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No speaker labelled ejecutivo")
+    
+    try:
+        ejecutivo_id, count = voiceprints.confirm(job_id, speaker)
+    except VoiceprintNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    
+    logger.info(f"Job {job_id}: {speaker} confirmed as ejecutivo {ejecutivo_id}")
+    return SpeakerConfirmationResponse(ejecutivo_id=ejecutivo_id, speaker=speaker, enrolled_calls=count)
@@ -0,0 +1,172 @@
+"""Streaming router - real-time transcription over WebSocket."""
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, status
+from ..config import settings
+from ..services.audio_decoder import StreamingDecoder
+from ..services.inference_executor import get_inference_executor
+from ..services.online_diarization import OnlineDiarizer, get_embedder
+from ..services.streaming_service import StreamingSession
+from ..services.transcription_service import build_context
+from ..services.whisper_service import get_whisper_service
+import asyncio
+import json
+import logging
+from typing import Literal, Optional
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Marks the end of the audio in the frame queue
+END_OF_STREAM = None
+
+
+@router.websocket("/stream")
+async def stream_transcription(
+    websocket: WebSocket,
+    language: Optional[str] = Query(None, description="Language code (es, en). Auto-detect if omitted"),
+    encoding: Literal["pcm_s16le", "opus", "ogg", "webm"] = Query(
+        "pcm_s16le",
+        description="Frame encoding: raw 16 kHz mono 16-bit PCM, or a compressed container decoded by ffmpeg"
+    ),
+    diarize: bool = Query(False, description="Label finalized segments with speaker and role (requires HF_TOKEN)"),
+    cliente_id: Optional[int] = Query(None, description="Cliente ID for context (role assignment)"),
+    ejecutivo_id: Optional[str] = Query(None, description="Ejecutivo/User ID for context (role assignment)"),
+    api_key: Optional[str] = Query(None, description="API key, for clients that cannot set headers")
+):
+    """
+    ## Real-time transcription of a live audio stream.
+
+    Send audio as binary frames and receive JSON events while speaking:
+    - `{"type": "partial", "text", "start", "end"}`: current hypothesis for
+      the audio not yet finalized (may still change)
+    - `{"type": "final", "segments": [...]}`: segments that will not change,
+      with absolute timestamps
+    - `{"type": "warning", "detail"}`: audio was dropped because the server
+      could not keep up
+
+    With `diarize=true`, `final` segments carry `speaker` and `role` like the
+    diarization mode of `/transcribe`. Speakers are tracked incrementally
+    (one embedding per window against per-stream centroids), so the cost per
+    window does not grow with the length of the call.
+
+    Send the text message `{"type": "end"}` to flush the remaining audio; the
+    server answers with the last `final` event and `{"type": "done"}`.
+
+    Frames are read into a bounded queue; when transcription falls behind the
+    server stops reading from the socket, so the client is slowed down by TCP
+    backpressure instead of the server buffering without limit.
+
+    ### Authentication:
+    `X-API-Key` header or `api_key` query parameter.
+    """
+    if (websocket.headers.get("x-api-key") or api_key) != settings.API_KEY:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    if diarize and not settings.HF_TOKEN:
+        await websocket.close(
+            code=status.WS_1008_POLICY_VIOLATION,
+            reason="Diarization mode requires HF_TOKEN to be configured"
+        )
+        return
+    await websocket.accept()
+
+    loop = asyncio.get_running_loop()
+    whisper = await loop.run_in_executor(None, get_whisper_service, settings.WHISPER_MODEL)
+    diarizer = None
+    if diarize:
+        embed = await loop.run_in_executor(None, get_embedder, settings.HF_TOKEN)
+        diarizer = OnlineDiarizer(
+            embed,
+            window_seconds=settings.STREAM_DIARIZATION_WINDOW_SECONDS,
+            threshold=settings.STREAM_DIARIZATION_THRESHOLD,
+            max_speakers=settings.STREAM_MAX_SPEAKERS
+        )
+    session = StreamingSession(
+        whisper.model,
+        get_inference_executor(),
+        language=language,
+        step_seconds=settings.STREAM_STEP_SECONDS,
+        window_seconds=settings.STREAM_WINDOW_SECONDS,
+        max_buffer_seconds=settings.STREAM_MAX_BUFFER_SECONDS,
+        diarizer=diarizer,
+        context=build_context(cliente_id, ejecutivo_id)
+    )
+    decoder = None
+    if encoding != "pcm_s16le":
+        decoder = StreamingDecoder(on_pcm=session.append, collect=False)
+        await decoder.start()
+
+    frames: asyncio.Queue = asyncio.Queue(maxsize=settings.STREAM_QUEUE_FRAMES)
+    consumer = asyncio.create_task(_transcribe_frames(websocket, session, decoder, frames))
+    logger.info(f"Stream opened (encoding={encoding}, language={language or 'auto'}, diarize={diarize})")
+
+    try:
+        while not consumer.done():
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                frame = message["bytes"]
+                if len(frame) > settings.STREAM_MAX_FRAME_BYTES:
+                    await websocket.close(
+                        code=status.WS_1009_MESSAGE_TOO_BIG,
+                        reason=f"Frames are limited to {settings.STREAM_MAX_FRAME_BYTES} bytes"
+                    )
+                    break
+                await frames.put(frame)
+            elif message.get("text") is not None and _is_end_message(message["text"]):
+                await frames.put(END_OF_STREAM)
+                await consumer
+                break
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Stream failed: {str(e)}")
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+    finally:
+        if not consumer.done():
+            consumer.cancel()
+        if decoder is not None:
+            await decoder.abort()
+        logger.info(f"Stream closed after {session.duration:.1f}s of audio, "
+                    f"{len(session.finalized)} final segments")
+
+
+async def _transcribe_frames(
+    websocket: WebSocket,
+    session: StreamingSession,
+    decoder: Optional[StreamingDecoder],
+    frames: asyncio.Queue
+) -> None:
+    """Feed queued frames to the session and push transcription events."""
+    while True:
+        frame = await frames.get()
+        if frame is END_OF_STREAM:
+            break
+        if decoder is not None:
+            await decoder.feed(frame)
+        else:
+            session.append_pcm16(frame)
+        if session.ready():
+            for event in await session.process():
+                await websocket.send_json(event)
+
+    if decoder is not None:
+        # Collects nothing (collect=False); flushes the last blocks into the session
+        await decoder.finish()
+    for event in await session.process(final=True):
+        await websocket.send_json(event)
+    await websocket.send_json({
+        "type": "done",
+        "language": session.language,
+        "duration_seconds": round(session.duration, 2),
+        "transcription": " ".join(s["text"] for s in session.finalized)
+    })
+    await websocket.close()
+
+
+def _is_end_message(text: str) -> bool:
+    try:
+        return json.loads(text).get("type") == "end"
+    except (ValueError, AttributeError):
+        return False
@@ -1,20 +1,48 @@
 """Transcription router - /transcribe endpoint."""
-from fastapi import APIRouter, HTTPException, Depends, status, UploadFile, File, Form, Query
-from ..models.transcription import TranscriptionResponse, ErrorResponse
-from ..services.whisper_service import get_whisper_service
-from ..services.diarization_service import transcribe_with_diarization
+from fastapi import APIRouter, HTTPException, Depends, status, UploadFile, File, Form, Query, Request
+from ..models.transcription import TranscriptionRequest, TranscriptionResponse, ErrorResponse
+from ..services.transcription_service import run_transcription, build_context, DiarizationUnavailableError
+from ..services.inference_executor import InferenceBusyError
+from ..services.upload_service import (
+    save_upload, spool_and_decode, upload_suffix, max_upload_bytes, UploadTooLargeError
+)
+from ..services.metrics import collect_timings, stage_timer
+from ..services.transcription_writer import persist_transcription
+from ..services.supabase_service import get_supabase_service, SupabaseError
 from ..dependencies import verify_api_key
 from ..config import settings
 import logging
 import os
 import tempfile
-from datetime import datetime
 from typing import Literal, Optional
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+
+def _transcription_error(e: Exception, user_id: str) -> HTTPException:
+    """HTTP error for an exception raised while transcribing for ``user_id``."""
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, UploadTooLargeError):
+        return HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    if isinstance(e, DiarizationUnavailableError):
+        return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if isinstance(e, InferenceBusyError):
+        logger.warning(f"Rejected transcription for user {user_id}: {e}")
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Transcription capacity exhausted, please retry later",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    logger.error(f"Transcription failed: {str(e)}")
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=f"Transcription failed: {str(e)}"
+    )
+
+
 @router.post(
     "/transcribe",
     response_model=TranscriptionResponse,
@@ -34,6 +62,11 @@ router = APIRouter()
     ### Authentication:
     Requires `X-API-Key` header with valid API key.
     
+    ### Debugging:
+    With `debug=true` the response includes `debug.timings`, the seconds
+    spent in each pipeline stage (upload, decode, queue, diarize,
+    transcribe, align).
+    
     ### Diarization Mode Requirements:
     - Backend must have `HF_TOKEN` configured
     - Longer processing time (2-3x slower)
@@ -98,10 +131,18 @@ router = APIRouter()
             "description": "Invalid or missing API key",
             "model": ErrorResponse
         },
+        413: {
+            "description": "Audio file exceeds MAX_UPLOAD_MB",
+            "model": ErrorResponse
+        },
         403: {
             "description": "Diarization mode requires HF_TOKEN",
             "model": ErrorResponse
         },
+        503: {
+            "description": "Inference workers saturated, retry after `Retry-After` seconds",
+            "model": ErrorResponse
+        },
         500: {
             "description": "Server error during transcription",
             "model": ErrorResponse
@@ -120,101 +161,198 @@ async def transcribe_audio(
         example="simple"
     ),
     cliente_id: Optional[int] = Form(None, description="Cliente ID for context (improves diarization accuracy)"),
-    ejecutivo_id: Optional[str] = Form(None, description="Ejecutivo/User ID for context (improves diarization accuracy)")
+    ejecutivo_id: Optional[str] = Form(None, description="Ejecutivo/User ID for context (improves diarization accuracy)"),
+    debug: bool = Query(False, description="Include per-stage timings in the response")
 ):
-    temp_path = None
+    temp_fd, temp_path = tempfile.mkstemp(suffix=upload_suffix(file))
+    os.close(temp_fd)
+    timings = collect_timings()
     
     try:
-        # Get Whisper service
-        whisper = get_whisper_service(settings.WHISPER_MODEL)
+        # Stream uploaded file to temp location in chunks, enforcing the size limit
+        with stage_timer("upload"):
+            size, sha256 = await save_upload(file, temp_path, max_upload_bytes())
         
-        # Create temporary file for audio
-        suffix = os.path.splitext(file.filename)[1] or '.m4a'
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-        temp_path = temp_file.name
+        logger.info(f"Audio saved temporarily: {temp_path} ({size} bytes), mode={mode}")
         
-        # Write uploaded file to temp location
-        content = await file.read()
-        temp_file.write(content)
-        temp_file.close()
+        context = build_context(cliente_id, ejecutivo_id)
+        response = await run_transcription(
+            audio=temp_path,
+            mode=mode,
+            language=language,
+            context=context,
+            audio_sha256=sha256,
+            user_id=user_id
+        )
         
-        logger.info(f"Audio saved temporarily: {temp_path} ({len(content)} bytes), mode={mode}")
-        print(f"🎙️ TRANSCRIPTION START: {temp_path} ({len(content)} bytes), mode={mode}")
+        logger.info(f"Transcription completed for user {user_id}: {len(response.transcription)} chars")
+        persist_transcription(response, user_id, file.filename, context)
+        if debug:
+            response.debug = {"timings": timings}
+        return response
+    
+    except Exception as e:
+        raise _transcription_error(e, user_id)
+    finally:
+        # Always clean up temporary file
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+            logger.debug(f"Cleaned up temporary file: {temp_path}")
+
+
+@router.post(
+    "/transcribe/stream",
+    response_model=TranscriptionResponse,
+    summary="Transcribe a raw audio request body while it uploads",
+    description="""
+    ## Transcribe audio sent as the raw request body.
+    
+    Same result as `/transcribe`, but the body is the audio file itself
+    (`Content-Type: audio/*` or `application/octet-stream`) and metadata goes
+    in query parameters. The body is decoded by ffmpeg as it arrives, so
+    decoding overlaps the upload and the compressed file is never held in
+    memory. m4a/mp4 files with the index at the end (the usual phone
+    recording) cannot be decoded that way and are decoded once after the
+    upload completes; `-movflags +faststart` files stream. Uploads over `MAX_UPLOAD_MB` are rejected with 413 as soon as the
+    limit is crossed.
+    """,
+    responses={
+        400: {"description": "Invalid request", "model": ErrorResponse},
+        401: {"description": "Invalid or missing API key", "model": ErrorResponse},
+        413: {"description": "Audio file exceeds MAX_UPLOAD_MB", "model": ErrorResponse},
+        503: {"description": "Inference workers saturated", "model": ErrorResponse},
+        500: {"description": "Server error during transcription", "model": ErrorResponse},
+    },
+    dependencies=[Depends(verify_api_key)],
+    tags=["Transcription"]
+)
+async def transcribe_audio_stream(
+    request: Request,
+    user_id: str = Query(..., description="User ID making the request", example="user-123"),
+    language: Optional[str] = Query(None, description="Language code (es, en). Auto-detect if omitted", example="es"),
+    mode: Literal["simple", "diarization"] = Query(
+        "simple",
+        description="Transcription mode: 'simple' (fast) or 'diarization' (speaker ID)",
+        example="simple"
+    ),
+    cliente_id: Optional[int] = Query(None, description="Cliente ID for context (improves diarization accuracy)"),
+    ejecutivo_id: Optional[str] = Query(None, description="Ejecutivo/User ID for context (improves diarization accuracy)"),
+    debug: bool = Query(False, description="Include per-stage timings in the response")
+):
+    temp_fd, temp_path = tempfile.mkstemp(suffix=".audio")
+    os.close(temp_fd)
+    timings = collect_timings()
+    
+    try:
+        # Decoding overlaps the transfer, so both are timed as the upload stage
+        with stage_timer("upload"):
+            size, sha256, audio = await spool_and_decode(request.stream(), temp_path, max_upload_bytes())
+        if size == 0:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty audio body")
         
-        try:
-            # Choose transcription method based on mode
-            if mode == "diarization":
-                # Diarization mode - requires HF_TOKEN
-                if not settings.HF_TOKEN:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail="HF_TOKEN environment variable required for diarization mode"
-                    )
-                
-                print(f"🎙️ Using DIARIZATION mode with pyannote")
-                
-                # Build context for diarization
-                context = {}
-                if cliente_id is not None:
-                    context["cliente_id"] = cliente_id
-                if ejecutivo_id is not None:
-                    context["ejecutivo_id"] = ejecutivo_id
-                
-                logger.info(f"Diarization context: {context}")
-                
-                result = await transcribe_with_diarization(
-                    audio_path=temp_path,
-                    whisper_model=whisper.model,
-                    hf_token=settings.HF_TOKEN,
-                    context=context if context else None
-                )
-                
-                # Return extended response for diarization
-                return {
-                    "transcription": result["text"],
-                    "language": result["language"],
-                    "confidence": result["confidence"],
-                    "duration_seconds": result["duration"],
-                    "mode": "diarization",
-                    "segments": result.get("segments", []),
-                    "num_speakers": result.get("num_speakers", 0)
-                }
-            else:
-                # Simple mode - standard Whisper
-                print(f"🎙️ Using SIMPLE mode with Whisper")
-                result = await whisper.transcribe(temp_path, language)
-                
-                logger.info(f"Transcription completed for user {user_id}: {len(result['transcription'])} chars")
-                
-                # Return response
-                return TranscriptionResponse(
-                    transcription=result["transcription"],
-                    language=result["language"],
-                    confidence=result["confidence"],
-                    duration_seconds=result["duration"],
-                    mode="simple"
-                )
-            
-        finally:
-            # Always clean up temporary file
-            if temp_path and os.path.exists(temp_path):
-                os.remove(temp_path)
-                logger.debug(f"Cleaned up temporary file: {temp_path}")
+        logger.info(f"Streamed upload decoded for user {user_id} ({size} bytes), mode={mode}")
+        
+        context = build_context(cliente_id, ejecutivo_id)
+        response = await run_transcription(
+            audio=audio,
+            mode=mode,
+            language=language,
+            context=context,
+            audio_sha256=sha256,
+            user_id=user_id
+        )
+        
+        logger.info(f"Transcription completed for user {user_id}: {len(response.transcription)} chars")
+        persist_transcription(response, user_id, None, context)
+        if debug:
+            response.debug = {"timings": timings}
+        return response
     
-    except HTTPException:
-        # Re-raise HTTP exceptions as-is
-        raise
     except Exception as e:
-        logger.error(f"Transcription failed: {str(e)}")
+        raise _transcription_error(e, user_id)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+@router.post(
+    "/transcribe/url",
+    response_model=TranscriptionResponse,
+    summary="Transcribe an audio file stored in Supabase Storage",
+    description="""
+    ## Transcribe a recording that is already in Supabase Storage.
+    
+    `audio_url` is a storage path (`bucket/path/to/file.m4a`, bucket
+    `audios` if omitted) or an object URL of this project's Storage. The
+    server fetches the object itself, as concurrent byte ranges
+    (`STORAGE_RANGE_MB` each, `STORAGE_RANGE_CONCURRENCY` in flight) that are
+    fed to the decoder in order, so decoding overlaps the download and the
+    recording never passes through the client or sits fully in memory.
+    Objects over `MAX_UPLOAD_MB` are rejected with 413.
+    """,
+    responses={
+        400: {"description": "Invalid request or audio_url", "model": ErrorResponse},
+        401: {"description": "Invalid or missing API key", "model": ErrorResponse},
+        404: {"description": "Object not found in Supabase Storage", "model": ErrorResponse},
+        413: {"description": "Audio file exceeds MAX_UPLOAD_MB", "model": ErrorResponse},
+        502: {"description": "Supabase Storage unavailable", "model": ErrorResponse},
+        503: {"description": "Inference workers saturated", "model": ErrorResponse},
+        500: {"description": "Server error during transcription", "model": ErrorResponse},
+    },
+    dependencies=[Depends(verify_api_key)],
+    tags=["Transcription"]
+)
+async def transcribe_audio_url(
+    body: TranscriptionRequest,
+    debug: bool = Query(False, description="Include per-stage timings in the response")
+):
+    supabase = get_supabase_service()
+    try:
+        storage_path = supabase.storage_path(body.audio_url)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    temp_fd, temp_path = tempfile.mkstemp(suffix=os.path.splitext(storage_path)[1] or ".audio")
+    os.close(temp_fd)
+    timings = collect_timings()
+    
+    try:
+        chunks = supabase.iter_object(
+            storage_path,
+            chunk_size=settings.STORAGE_RANGE_MB * 1024 * 1024,
+            concurrency=settings.STORAGE_RANGE_CONCURRENCY
+        )
+        # Download and decode overlap, so both are timed as the upload stage
+        with stage_timer("upload"):
+            size, sha256, audio = await spool_and_decode(chunks, temp_path, max_upload_bytes())
+        if size == 0:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty audio file")
         
-        # Cleanup on error too
-        if temp_path and os.path.exists(temp_path):
-            try:
-                os.remove(temp_path)
-            except:
-                pass
+        logger.info(f"Storage object {storage_path} decoded for user {body.user_id} ({size} bytes), mode={body.mode}")
         
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Transcription failed: {str(e)}"
+        context = build_context(body.cliente_id, body.ejecutivo_id)
+        response = await run_transcription(
+            audio=audio,
+            mode=body.mode,
+            language=body.language,
+            context=context,
+            audio_sha256=sha256,
+            user_id=body.user_id
         )
+        
+        logger.info(f"Transcription completed for user {body.user_id}: {len(response.transcription)} chars")
+        persist_transcription(response, body.user_id, body.audio_url, context)
+        if debug:
+            response.debug = {"timings": timings}
+        return response
+    
+    except SupabaseError as e:
+        logger.warning(f"Storage download failed for user {body.user_id}: {e}")
+        if e.status_code in (400, 404):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Audio not found in storage: {storage_path}")
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="Supabase Storage request failed")
+    except Exception as e:
+        raise _transcription_error(e, body.user_id)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
@@ -0,0 +1,217 @@
+"""Pre-fork server: load the models once, then fork workers that share them.
+
+``uvicorn --workers N`` starts N independent processes that each load
+Whisper and pyannote, so every worker holds its own copy of the weights.
+This launcher loads the models in the master process, freezes the garbage
+collector so collections in the workers do not write to the inherited
+objects, opens the listening socket and forks the workers. Weight tensors
+are never written after loading, so their pages stay shared copy-on-write:
+an extra worker costs its private memory (interpreter state, buffers,
+activations) instead of another copy of the models.
+
+The master only loads weights and never runs inference, so no OpenMP
+thread pool exists at fork time; each worker warms up its own after the
+fork (see /health/ready). Models are shared with the openai-whisper backend
+on CPU. faster-whisper (CTranslate2 starts threads while loading) and CUDA
+(not fork-safe) fall back to loading the models in every worker.
+
+Jobs left running by a previous run are requeued once by the master before
+any worker starts; afterwards a worker only requeues jobs of workers that
+have exited, never a sibling's running jobs. Workers that exit unexpectedly
+are forked again from the master, with the models already loaded.
+SIGTERM/SIGINT are forwarded to the workers. Worker ``i`` of N runs its
+inference threads on the i-th N-th of the physical cores (see
+:mod:`app.services.cpu_layout`). Each worker reports its RSS, PSS and
+private memory under ``model_registry.process_memory`` in /health, and the
+master logs the totals every ``--memory-report-every`` seconds.
+
+Usage (from backend/):
+    python -m app.serve --workers 4
+    python -m app.serve --workers 4 --host 127.0.0.1 --port 8080
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger("app.serve")
+
+# Workers that exit sooner than this after being forked are restarted with a delay
+MIN_WORKER_LIFETIME_SECONDS = 5.0
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=2, help="Worker processes sharing the models")
+    parser.add_argument("--host", help="Bind address (default: HOST)")
+    parser.add_argument("--port", type=int, help="Bind port (default: PORT)")
+    parser.add_argument("--log-level", default=os.environ.get("LOG_LEVEL", "info").lower(), help="uvicorn log level")
+    parser.add_argument("--memory-report-every", type=float, default=300.0,
+                        help="Seconds between memory reports of the master (0 = never)")
+    return parser.parse_args(argv)
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """Open the listening socket the workers inherit."""
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def unshareable_reason() -> Optional[str]:
+    """Why the models cannot be loaded before forking, or None if they can."""
+    from .config import settings
+    from .services.whisper_engines import OPENAI_WHISPER
+
+    if not settings.PRELOAD_MODELS:
+        return "PRELOAD_MODELS is false"
+    if settings.WHISPER_BACKEND != OPENAI_WHISPER:
+        return f"{settings.WHISPER_BACKEND} starts threads while loading"
+    import torch
+    if torch.cuda.is_available():
+        return "CUDA cannot be initialised before forking"
+    return None
+
+
+def run_worker(sock: socket.socket, slot: int, workers: int, log_level: str) -> int:
+    """Serve the app on the inherited socket (in a forked worker)."""
+    import uvicorn
+    from .main import app
+    from .services.cpu_layout import set_process_share
+
+    # Inference threads of this worker stay on its own share of the cores
+    set_process_share(slot, workers)
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    server = uvicorn.Server(uvicorn.Config(app, log_level=log_level))
+    server.run(sockets=[sock])
+    return 0
+
+
+def requeue_interrupted_jobs() -> int:
+    """Requeue every job left running by a previous run (before forking the workers)."""
+    from .config import settings
+    from .services.job_store import JobStore
+
+    # A private connection, closed again: SQLite connections must not cross a fork
+    store = JobStore(os.path.join(settings.JOBS_DIR, "jobs.db"))
+    try:
+        return store.requeue_interrupted(include_live=True)
+    finally:
+        store.close()
+
+
+def memory_report(workers: Dict[int, int]) -> str:
+    """One-line memory summary of the master and its workers."""
+    from .services.model_registry import process_memory
+
+    master = process_memory() or {}
+    children = [m for m in (process_memory(str(pid)) for pid in workers) if m]
+    if not children:
+        return "Memory: no worker statistics (Linux /proc required)"
+    total_pss = master.get("pss_mb", 0) + sum(m["pss_mb"] for m in children)
+    return (
+        f"Memory: {len(children)} workers, "
+        f"PSS {total_pss:.0f} MB in total vs {sum(m['rss_mb'] for m in children):.0f} MB RSS summed; "
+        f"per worker private {min(m['private_mb'] for m in children):.0f}-"
+        f"{max(m['private_mb'] for m in children):.0f} MB, "
+        f"shared {min(m['shared_mb'] for m in children):.0f}-{max(m['shared_mb'] for m in children):.0f} MB"
+    )
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper())
+
+    from .config import settings
+    from .main import app  # noqa: F401 - imported once here so workers inherit the modules
+    from .services.model_registry import preload_models, process_memory
+
+    reason = unshareable_reason()
+    if reason is None:
+        started = time.perf_counter()
+        preload_models()
+        logger.info(f"Models loaded in the master in {time.perf_counter() - started:.1f}s ({process_memory()})")
+    else:
+        logger.warning(f"Models are loaded per worker, not shared: {reason}")
+
+    requeued = requeue_interrupted_jobs()
+    if requeued:
+        logger.info(f"Requeued {requeued} jobs interrupted by the previous run")
+
+    sock = bind_socket(args.host or settings.HOST, args.port or settings.PORT)
+    # Move everything allocated so far out of the collector's reach, so
+    # collections in the workers do not dirty the shared pages
+    gc.collect()
+    gc.freeze()
+
+    workers: Dict[int, int] = {}
+    started_at: Dict[int, float] = {}
+    stopping = False
+
+    def fork_worker(slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                code = run_worker(sock, slot, args.workers, args.log_level)
+            finally:
+                os._exit(code)
+        workers[pid] = slot
+        started_at[pid] = time.monotonic()
+        logger.info(f"Worker {slot} started (pid {pid})")
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for slot in range(args.workers):
+        fork_worker(slot)
+    logger.info(f"Serving on {args.host or settings.HOST}:{args.port or settings.PORT} with {args.workers} workers")
+
+    next_report = time.monotonic() + args.memory_report_every
+    while workers:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            if args.memory_report_every > 0 and time.monotonic() >= next_report:
+                logger.info(memory_report(workers))
+                next_report = time.monotonic() + args.memory_report_every
+            time.sleep(0.5)
+            continue
+
+        slot = workers.pop(pid, None)
+        lifetime = time.monotonic() - started_at.pop(pid, time.monotonic())
+        if slot is None or stopping:
+            continue
+        logger.warning(f"Worker {slot} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}; restarting")
+        if lifetime < MIN_WORKER_LIFETIME_SECONDS:
+            time.sleep(1.0)
+        fork_worker(slot)
+
+    sock.close()
+    logger.info("All workers stopped")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
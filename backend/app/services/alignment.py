@@ -0,0 +1,132 @@
+"""Linear-time alignment of Whisper output with diarization speaker turns."""
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_SPEAKER = "SPEAKER_UNKNOWN"
+
+
+class TurnSweep:
+    """Sweep line over diarization turns for queries with non-decreasing start.
+
+    Turns are sorted by start once. Each query advances a pointer over turns
+    that have started before the query ends and drops active turns that ended
+    before the query starts, so a full pass over N queries and M turns costs
+    O(N + M) plus the (small) number of simultaneously active turns.
+    """
+
+    def __init__(self, diarization_segments: List[Dict]):
+        self._turns: List[Tuple[float, float, str]] = sorted(
+            (seg["start"], seg["end"], seg["speaker"]) for seg in diarization_segments
+        )
+        self._next = 0
+        self._active: List[Tuple[float, float, str]] = []
+        self._last_start = float("-inf")
+
+    def best_speaker(self, start: float, end: float) -> Optional[str]:
+        """Return the speaker with the most overlap with [start, end], if any.
+
+        Queries are expected in non-decreasing ``start`` order; an out-of-order
+        query (Whisper timestamps occasionally step back) rewinds the sweep.
+        """
+        if start < self._last_start:
+            self._next = 0
+            self._active = []
+        self._last_start = start
+
+        turns = self._turns
+        while self._next < len(turns) and turns[self._next][0] < end:
+            self._active.append(turns[self._next])
+            self._next += 1
+        if self._active and any(t[1] <= start for t in self._active):
+            self._active = [t for t in self._active if t[1] > start]
+
+        overlap_by_speaker: Dict[str, float] = {}
+        for t_start, t_end, speaker in self._active:
+            overlap = min(end, t_end) - max(start, t_start)
+            if overlap > 0:
+                overlap_by_speaker[speaker] = overlap_by_speaker.get(speaker, 0.0) + overlap
+
+        if not overlap_by_speaker:
+            return None
+        return max(overlap_by_speaker, key=overlap_by_speaker.get)
+
+
+def _segment_confidence(segment: Dict) -> float:
+    return 1.0 - segment.get("no_speech_prob", 0.0)
+
+
+def _split_by_word_speaker(segment: Dict, sweep: TurnSweep) -> List[Dict]:
+    """Split one Whisper segment wherever the speaker changes between words."""
+    confidence = _segment_confidence(segment)
+    pieces: List[Dict] = []
+    previous_speaker: Optional[str] = None
+
+    for word in segment["words"]:
+        speaker = sweep.best_speaker(word["start"], word["end"])
+        if speaker is None:
+            # Words in gaps between turns stay with the preceding word
+            speaker = previous_speaker
+        previous_speaker = speaker
+
+        if pieces and pieces[-1]["speaker"] == speaker:
+            pieces[-1]["end"] = word["end"]
+            pieces[-1]["text"] += word["word"]
+        else:
+            pieces.append({
+                "speaker": speaker,
+                "start": word["start"],
+                "end": word["end"],
+                "text": word["word"],
+                "confidence": confidence
+            })
+
+    # Leading gap words (no preceding speaker) join the first attributed piece
+    if len(pieces) > 1 and pieces[0]["speaker"] is None:
+        first = pieces.pop(0)
+        pieces[0]["start"] = first["start"]
+        pieces[0]["text"] = first["text"] + pieces[0]["text"]
+
+    for piece in pieces:
+        piece["text"] = piece["text"].strip()
+        if piece["speaker"] is None:
+            piece["speaker"] = UNKNOWN_SPEAKER
+    return [p for p in pieces if p["text"]]
+
+
+def align_segments(
+    whisper_segments: Iterable[Dict],
+    diarization_segments: List[Dict],
+    word_level: bool = True
+) -> List[Dict]:
+    """Assign a speaker to each Whisper segment, or to each word.
+
+    Args:
+        whisper_segments: Segments from Whisper with text and timestamps
+            (and ``words`` when transcribed with ``word_timestamps=True``)
+        diarization_segments: Segments from pyannote with speaker labels
+        word_level: Split segments where the speaker changes mid-segment,
+            using word timestamps when they are available
+
+    Returns:
+        Aligned segments with speaker, text, timestamps, and confidence
+    """
+    sweep = TurnSweep(diarization_segments)
+    aligned: List[Dict] = []
+
+    for segment in sorted(whisper_segments, key=lambda s: s["start"]):
+        if word_level and segment.get("words"):
+            aligned.extend(_split_by_word_speaker(segment, sweep))
+            continue
+
+        speaker = sweep.best_speaker(segment["start"], segment["end"])
+        aligned.append({
+            "speaker": speaker or UNKNOWN_SPEAKER,
+            "start": segment["start"],
+            "end": segment["end"],
+            "text": segment["text"].strip(),
+            "confidence": _segment_confidence(segment)
+        })
+
+    return aligned
@@ -0,0 +1,208 @@
+"""Audio decoding: one ffmpeg pass to 16 kHz mono float32 PCM."""
+import asyncio
+import logging
+import subprocess
+from typing import Callable, List, Optional, Union
+
+import numpy as np
+
+from .metrics import stage_timer
+
+logger = logging.getLogger(__name__)
+
+# Whisper and pyannote 3.1 both operate on 16 kHz mono audio
+SAMPLE_RATE = 16000
+
+AudioInput = Union[str, np.ndarray]
+
+
+def decode_audio(audio_path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Decode any ffmpeg-supported file to a mono float32 array in [-1, 1].
+
+    Args:
+        audio_path: Path to audio file (m4a, mp3, wav, ogg, webm, ...)
+        sample_rate: Target sample rate
+
+    Returns:
+        1-D float32 NumPy array sampled at ``sample_rate``
+    """
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0",
+        "-i", audio_path,
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sample_rate),
+        "-"
+    ]
+    try:
+        with stage_timer("decode"):
+            out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to decode audio: {e.stderr.decode(errors='ignore').strip()}") from e
+
+    audio = pcm16_to_float32(out)
+    logger.info(f"Decoded {audio_path}: {duration_seconds(audio, sample_rate):.1f}s")
+    return audio
+
+
+def load_audio(audio: AudioInput) -> np.ndarray:
+    """Return ``audio`` as a decoded array, decoding it if it is a path."""
+    if isinstance(audio, np.ndarray):
+        return audio
+    return decode_audio(audio)
+
+
+def pcm16_to_float32(pcm: bytes) -> np.ndarray:
+    """Convert little-endian 16-bit PCM bytes to float32 samples in [-1, 1]."""
+    return np.frombuffer(pcm, np.int16).astype(np.float32) / 32768.0
+
+
+def duration_seconds(audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> float:
+    return len(audio) / float(sample_rate)
+
+
+def to_pyannote_input(audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> dict:
+    """Wrap a decoded array as the in-memory waveform dict pyannote accepts."""
+    import torch
+    return {
+        "waveform": torch.from_numpy(audio).unsqueeze(0),  # (channel, time)
+        "sample_rate": sample_rate,
+    }
+
+
+def needs_seekable_input(head: bytes) -> bool:
+    """Tell from the first bytes of a file whether ffmpeg has to seek to decode it.
+
+    MP4/M4A/MOV files can only be decoded from a pipe when the index ('moov'
+    box) comes before the media data ('mdat'); phone recorders usually write it
+    at the end. Other formats stream fine.
+
+    Args:
+        head: Leading bytes of the file
+
+    Returns:
+        True if the file should be decoded from disk rather than a pipe
+    """
+    if head[4:8] != b"ftyp":
+        return False
+    offset = 0
+    while offset + 8 <= len(head):
+        size = int.from_bytes(head[offset:offset + 4], "big")
+        kind = head[offset + 4:offset + 8]
+        if kind == b"moov":
+            return False
+        if kind == b"mdat":
+            return True
+        if size == 1 and offset + 16 <= len(head):
+            size = int.from_bytes(head[offset + 8:offset + 16], "big")
+        if size < 8:
+            break
+        offset += size
+    # Index not found in the leading bytes: do not bet on it
+    return True
+
+
+class StreamingDecoder:
+    """Decode audio while it is still arriving, by piping it through ffmpeg.
+
+    Encoded chunks are written to ffmpeg's stdin as they are received and PCM
+    is collected from stdout concurrently, so the compressed file never has to
+    be held in memory and decoding overlaps the transfer.
+
+    Containers that need seeking (e.g. m4a with the index at the end) cannot be
+    decoded from a pipe; callers should check :func:`needs_seekable_input`
+    first, and keep a spooled copy to fall back to :func:`decode_audio` when
+    :meth:`finish` raises.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = SAMPLE_RATE,
+        on_pcm: Optional[Callable[[np.ndarray], None]] = None,
+        collect: bool = True
+    ):
+        """Initialize streaming decoder.
+
+        Args:
+            sample_rate: Target sample rate
+            on_pcm: Optional callback receiving each decoded block as it is produced
+            collect: Keep decoded blocks for :meth:`finish`; disable for
+                unbounded live streams that only consume ``on_pcm``
+        """
+        self.sample_rate = sample_rate
+        self.on_pcm = on_pcm
+        self.collect = collect
+        self._proc: Optional[asyncio.subprocess.Process] = None
+        self._blocks: List[np.ndarray] = []
+        self._stderr = b""
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        self._proc = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-nostdin", "-loglevel", "error",
+            "-i", "pipe:0",
+            "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(self.sample_rate),
+            "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        self._tasks = [
+            asyncio.create_task(self._read_pcm()),
+            asyncio.create_task(self._read_stderr()),
+        ]
+
+    async def feed(self, chunk: bytes) -> None:
+        """Write an encoded chunk; waits if ffmpeg is not keeping up."""
+        try:
+            self._proc.stdin.write(chunk)
+            await self._proc.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            # ffmpeg gave up on the input; finish() reports the error
+            pass
+
+    async def finish(self) -> np.ndarray:
+        """Signal end of input and return the full decoded array.
+
+        Raises:
+            RuntimeError: If ffmpeg could not decode the stream
+        """
+        try:
+            self._proc.stdin.close()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        await asyncio.gather(*self._tasks)
+        returncode = await self._proc.wait()
+        if returncode != 0:
+            raise RuntimeError(f"Failed to decode audio stream: {self._stderr.decode(errors='ignore').strip()}")
+        audio = np.concatenate(self._blocks) if self._blocks else np.zeros(0, np.float32)
+        self._blocks = []
+        return audio
+
+    async def abort(self) -> None:
+        if self._proc and self._proc.returncode is None:
+            self._proc.kill()
+            await self._proc.wait()
+        for task in self._tasks:
+            task.cancel()
+
+    async def _read_pcm(self) -> None:
+        leftover = b""
+        while True:
+            data = await self._proc.stdout.read(64 * 1024)
+            if not data:
+                break
+            data = leftover + data
+            # Keep whole 16-bit samples only
+            usable = len(data) - (len(data) % 2)
+            leftover = data[usable:]
+            block = pcm16_to_float32(data[:usable])
+            if self.collect:
+                self._blocks.append(block)
+            if self.on_pcm:
+                self.on_pcm(block)
+
+    async def _read_stderr(self) -> None:
+        while True:
+            data = await self._proc.stderr.read(4096)
+            if not data:
+                break
+            self._stderr = (self._stderr + data)[-4096:]
@@ -0,0 +1,166 @@
+"""Dynamic micro-batching of short simple-mode transcriptions."""
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .audio_decoder import SAMPLE_RATE
+from .inference_executor import InferenceExecutor
+from .inference_scheduler import InferenceTicket, current_ticket, inference_ticket
+
+logger = logging.getLogger(__name__)
+
+# Whisper's encoder window; longer clips are not batched
+MAX_BATCH_CLIP_SECONDS = 30.0
+
+_Pending = Tuple[np.ndarray, Optional[str], InferenceTicket, asyncio.Future]
+
+
+class BatchScheduler:
+    """Collects concurrent short clips and runs them through Whisper as one batch.
+
+    The first request opens a window of ``window_ms``; every request arriving
+    in that window joins the batch, which is dispatched when the window closes
+    or ``max_batch_size`` is reached. The batch takes a single slot on the
+    inference executor and results are fanned back out to the waiting callers.
+    The scheduler charges that slot to each caller's own inference ticket.
+    """
+
+    def __init__(self, engine, executor: InferenceExecutor, window_ms: int = 20, max_batch_size: int = 8):
+        """Initialize batch scheduler.
+
+        Args:
+            engine: Whisper engine implementing ``transcribe_batch``
+            executor: Inference executor the batches run on
+            window_ms: How long to wait for more requests after the first one
+            max_batch_size: Dispatch immediately once this many requests wait
+        """
+        self.engine = engine
+        self.executor = executor
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self._pending: List[_Pending] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Running batches, referenced until done so they are not garbage collected
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.batched_requests = 0
+
+    @staticmethod
+    def accepts(audio: np.ndarray) -> bool:
+        return len(audio) / SAMPLE_RATE <= MAX_BATCH_CLIP_SECONDS
+
+    async def transcribe(self, audio: np.ndarray, language: Optional[str] = None) -> Dict:
+        """Queue a clip for the next batch and wait for its result.
+
+        Raises:
+            InferenceBusyError: If the executor rejected the batch
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((audio, language, current_ticket(), future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending[:self.max_batch_size], self._pending[self.max_batch_size:]
+        if self._pending:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[_Pending]) -> None:
+        self.batches += 1
+        self.batched_requests += len(batch)
+        tickets = [ticket for _, _, ticket, _ in batch]
+        try:
+            with inference_ticket(tickets[0].lane, shares=tickets):
+                results = await self.executor.run(self._run_sync, [(audio, language) for audio, language, _, _ in batch])
+        except Exception as e:
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (*_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _run_sync(self, items: List[Tuple[np.ndarray, Optional[str]]]) -> List[Dict]:
+        # decode() takes a single language option, so batch per requested language
+        groups: Dict[Optional[str], List[int]] = defaultdict(list)
+        for index, (_, language) in enumerate(items):
+            groups[language].append(index)
+
+        results: List[Optional[Dict]] = [None] * len(items)
+        for language, indices in groups.items():
+            outputs = self.engine.transcribe_batch([items[i][0] for i in indices], language)
+            for index, output in zip(indices, outputs):
+                results[index] = output
+
+        logger.info(f"Batched {len(items)} clips in {len(groups)} language group(s)")
+        return results
+
+    def close(self) -> None:
+        """Cancel the pending window and running batches; their callers see CancelledError."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for *_, future in self._pending:
+            future.cancel()
+        self._pending = []
+        for task in list(self._tasks):
+            task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "avg_batch_size": round(self.batched_requests / self.batches, 2) if self.batches else None,
+            "window_ms": int(self.window * 1000),
+            "max_batch_size": self.max_batch_size,
+        }
+
+
+# Singleton instance
+_batch_scheduler: Optional[BatchScheduler] = None
+
+def get_batch_scheduler(engine) -> Optional[BatchScheduler]:
+    """Get or create batch scheduler (None when batching is disabled or unsupported)."""
+    global _batch_scheduler
+    from ..config import settings
+    if not settings.BATCHING_ENABLED or not getattr(engine, "supports_batching", False):
+        return None
+    if _batch_scheduler is None:
+        from .inference_executor import get_inference_executor
+        _batch_scheduler = BatchScheduler(
+            engine,
+            get_inference_executor(),
+            window_ms=settings.BATCH_WINDOW_MS,
+            max_batch_size=settings.BATCH_MAX_SIZE,
+        )
+    return _batch_scheduler
+
+
+def batch_scheduler_stats() -> Optional[dict]:
+    """Stats of the batch scheduler, or None if no batch was scheduled yet."""
+    return _batch_scheduler.stats() if _batch_scheduler is not None else None
+
+
+def shutdown_batch_scheduler() -> None:
+    """Cancel pending and running batches (on application shutdown)."""
+    global _batch_scheduler
+    if _batch_scheduler is not None:
+        _batch_scheduler.close()
+        _batch_scheduler = None
@@ -0,0 +1,176 @@
+"""Batch transcription of recording archives (backfills).
+
+A batch is a named manifest of recordings. Every item becomes a job in the
+persistent :class:`~app.services.job_store.JobStore`, queued at
+:data:`BATCH_PRIORITY` so interactive jobs are always claimed first, and the
+:class:`~app.services.job_worker.JobWorker` only starts batch items while no
+interactive request is waiting for an inference worker.
+
+The job table is the checkpoint: finished items are kept until the batch is
+re-run, interrupted items are requeued on restart, and re-submitting a
+manifest under the same name only queues the items not seen before.
+"""
+import csv
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..models.batch import BatchItem, BatchStatusResponse
+from .job_store import JobStore, JOB_DONE, JOB_FAILED, JOB_QUEUED, JOB_RUNNING
+from .supabase_service import get_supabase_service
+from .transcription_service import build_context
+
+logger = logging.getLogger(__name__)
+
+# Below interactive jobs (priority 0)
+BATCH_PRIORITY = -10
+
+
+class BatchOwnerError(Exception):
+    """Raised when a batch name is already used by another user."""
+
+
+class BatchSourceError(Exception):
+    """Raised when a batch item names a local file outside BATCH_LOCAL_DIR."""
+
+
+def load_manifest(path: str) -> List[BatchItem]:
+    """Read a manifest file.
+
+    JSON Lines files (``.jsonl``) hold one :class:`BatchItem` object per
+    line; CSV files need a header row with the same field names. Plain text
+    files hold one storage path or file path per line.
+    """
+    items = []
+    with open(path, newline="") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    items.append(BatchItem(**json.loads(line)))
+        elif path.endswith(".csv"):
+            for row in csv.DictReader(f):
+                items.append(BatchItem(**{k: v for k, v in row.items() if v not in (None, "")}))
+        else:
+            for line in f:
+                if line.strip() and not line.startswith("#"):
+                    items.append(BatchItem(audio_url=line.strip()))
+    return items
+
+
+def submit_batch(store: JobStore, name: str, user_id: str, items: Iterable[BatchItem]) -> Tuple[Dict, int]:
+    """Create (or resume) a batch and queue its items.
+
+    Returns:
+        Tuple of (batch dict, number of newly queued items)
+
+    Raises:
+        BatchOwnerError: If ``name`` belongs to a batch of another user
+    """
+    batch = store.get_or_create_batch(name, user_id)
+    if batch["user_id"] != user_id:
+        raise BatchOwnerError(f"Batch {name} belongs to another user")
+    rows = [
+        {
+            "item_index": index,
+            "source": item.audio_url,
+            "mode": item.mode,
+            "user_id": item.user_id or user_id,
+            "language": item.language,
+            "context": build_context(item.cliente_id, item.ejecutivo_id),
+        }
+        for index, item in enumerate(items)
+    ]
+    added = store.add_batch_items(batch["id"], rows, BATCH_PRIORITY)
+    logger.info(f"Batch {name} ({batch['id']}): {added} of {len(rows)} items queued")
+    return batch, added
+
+
+def batch_status(store: JobStore, batch: Dict, now: Optional[float] = None) -> BatchStatusResponse:
+    """Build the progress and throughput report of a batch."""
+    summary = store.batch_summary(batch["id"])
+    counts = summary["counts"]
+    total = sum(counts.values())
+    finished = counts.get(JOB_DONE, 0) + counts.get(JOB_FAILED, 0)
+
+    elapsed = 0.0
+    if summary["first_started"] is not None:
+        end = now or time.time()
+        if finished == total and summary["last_finished"] is not None:
+            end = summary["last_finished"]
+        elapsed = max(0.0, end - summary["first_started"])
+    audio_hours = summary["audio_seconds"] / 3600
+
+    return BatchStatusResponse(
+        batch_id=batch["id"],
+        name=batch["name"],
+        total=total,
+        queued=counts.get(JOB_QUEUED, 0),
+        running=counts.get(JOB_RUNNING, 0),
+        done=counts.get(JOB_DONE, 0),
+        failed=counts.get(JOB_FAILED, 0),
+        progress=finished / total if total else 0.0,
+        audio_hours=round(audio_hours, 4),
+        elapsed_seconds=round(elapsed, 1),
+        audio_hours_per_hour=round(audio_hours / (elapsed / 3600), 2) if elapsed > 0 else None,
+        created_at=datetime.utcfromtimestamp(batch["created_at"]),
+        results_url=f"/api/v1/batches/{batch['id']}/results"
+    )
+
+
+def result_line(job: Dict) -> str:
+    """Serialize one finished batch item for the JSON Lines export."""
+    return json.dumps({
+        "item_index": job["item_index"],
+        "audio_url": job["source"],
+        "user_id": job["user_id"],
+        "status": job["status"],
+        "error": job["error"],
+        "result": job["result"],
+    }, ensure_ascii=False) + "\n"
+
+
+def is_local_source(source: str) -> bool:
+    """Return True when a manifest entry names a local file rather than a Storage path."""
+    return os.path.isabs(source) or os.path.isfile(source)
+
+
+def local_source_allowed(source: str) -> bool:
+    """Return True when a batch may read a local manifest file (inside BATCH_LOCAL_DIR)."""
+    from ..config import settings
+    if not settings.BATCH_LOCAL_DIR:
+        return False
+    root = os.path.realpath(settings.BATCH_LOCAL_DIR)
+    return os.path.realpath(source).startswith(root + os.sep)
+
+
+async def fetch_batch_audio(job: Dict) -> Tuple[str, bool]:
+    """Make a batch item's audio available locally.
+
+    Items naming a local file inside BATCH_LOCAL_DIR are used in place.
+    Anything else is a Supabase Storage path, downloaded into the job spool
+    directory.
+
+    Returns:
+        Tuple of (local path, whether the caller owns and must remove it)
+
+    Raises:
+        BatchSourceError: If the item names a local file outside BATCH_LOCAL_DIR
+    """
+    from ..config import settings
+
+    source = job["source"]
+    if is_local_source(source):
+        # Checked here too: items can come from the CLI or an older job store
+        if not local_source_allowed(source):
+            raise BatchSourceError(f"{source} is outside BATCH_LOCAL_DIR")
+        return source, False
+    supabase = get_supabase_service()
+    spool_dir = os.path.join(settings.JOBS_DIR, "audio")
+    storage_path = supabase.storage_path(source)
+    os.makedirs(spool_dir, exist_ok=True)
+    local_path = os.path.join(spool_dir, job["id"] + (os.path.splitext(storage_path)[1] or ".audio"))
+    await supabase.download_audio(storage_path, local_path)
+    return local_path, True
@@ -0,0 +1,243 @@
+"""Split of the CPU cores between inference workers.
+
+Torch uses every core for intra-op parallelism by default, so N concurrent
+transcriptions run N x cores threads and throughput collapses. A
+:class:`CpuLayout` instead hands every inference worker thread a disjoint
+block of physical cores (SMT siblings stay in the same block) and the
+worker sets its torch intra-op thread count to the size of its block. With
+``pin`` the worker thread is also bound to those CPUs, and so are the
+OpenMP threads it starts.
+
+Under the pre-fork server (``python -m app.serve``) each process first
+takes its own share of the cores (:func:`set_process_share`), so the layout
+holds across processes too. With ``uvicorn --workers`` the processes do not
+know their index; set INFERENCE_THREADS by hand there.
+
+:func:`calibrate` picks the workers x threads split by timing the primary
+Whisper model at a few worker counts.
+"""
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Timed runs per worker during calibration (after one untimed run)
+CALIBRATION_ROUNDS = 2
+# A layout with more workers must beat one with fewer by this much to be chosen
+CALIBRATION_MARGIN = 1.05
+
+_process_share = (0, 1)
+_current = threading.local()
+
+
+@dataclass
+class WorkerSlot:
+    """Cores and intra-op threads of one inference worker."""
+    index: int
+    cpus: List[int]
+    threads: int
+
+
+@dataclass
+class CpuLayout:
+    """How the cores of this process are divided between inference workers."""
+    workers: int
+    threads: int
+    interop_threads: int
+    slots: List[WorkerSlot]
+    pinned: bool = False
+    source: str = "configured"
+    # "<workers>x<threads>" -> calls per second, when calibrated
+    calibration: Dict[str, float] = field(default_factory=dict)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "threads_per_worker": self.threads,
+            "interop_threads": self.interop_threads,
+            "pinned": self.pinned,
+            "source": self.source,
+            "cpus": [slot.cpus for slot in self.slots],
+            "calibration": self.calibration or None,
+        }
+
+
+def set_process_share(index: int, count: int) -> None:
+    """Restrict this process to share ``index`` of ``count`` of the machine's cores."""
+    global _process_share
+    _process_share = (index, max(1, count))
+
+
+def available_cpus() -> List[int]:
+    """Logical CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def physical_cores(cpus: List[int]) -> List[List[int]]:
+    """Group logical CPUs into physical cores (SMT siblings together), in CPU order."""
+    groups: Dict[tuple, List[int]] = {}
+    for cpu in cpus:
+        topology = f"/sys/devices/system/cpu/cpu{cpu}/topology"
+        try:
+            with open(f"{topology}/physical_package_id") as f:
+                package = f.read().strip()
+            with open(f"{topology}/core_id") as f:
+                core = f.read().strip()
+            key = (package, core)
+        except OSError:
+            # No topology information (macOS, some containers): one core per CPU
+            key = ("cpu", cpu)
+        groups.setdefault(key, []).append(cpu)
+    return sorted(groups.values(), key=lambda group: group[0])
+
+
+def process_cores() -> List[List[int]]:
+    """Physical cores of this process's share (see :func:`set_process_share`)."""
+    cores = physical_cores(available_cpus())
+    index, count = _process_share
+    if count <= 1 or len(cores) < count:
+        return cores
+    return _blocks(cores, count)[index % count]
+
+
+def _blocks(items: list, parts: int) -> List[list]:
+    """Split ``items`` into ``parts`` contiguous blocks, the first ones one longer."""
+    size, extra = divmod(len(items), parts)
+    blocks = []
+    start = 0
+    for i in range(parts):
+        end = start + size + (1 if i < extra else 0)
+        blocks.append(items[start:end])
+        start = end
+    return blocks
+
+
+def plan_layout(
+    cores: List[List[int]],
+    workers: int,
+    threads: int = 0,
+    interop_threads: int = 1,
+    pin: bool = False,
+    source: str = "configured"
+) -> CpuLayout:
+    """Divide ``cores`` between ``workers`` inference workers.
+
+    Args:
+        cores: Physical cores, each a list of logical CPUs
+        workers: Number of inference workers
+        threads: Intra-op threads per worker (0 = physical cores of its block)
+        interop_threads: Torch inter-op threads for the process
+        pin: Bind each worker to the CPUs of its block
+        source: How the layout was chosen, for reporting
+    """
+    workers = max(1, workers)
+    if len(cores) >= workers:
+        blocks = _blocks(cores, workers)
+    else:
+        # More workers than cores: workers share cores round-robin, one thread each
+        blocks = [[cores[i % len(cores)]] for i in range(workers)]
+    slots = [
+        WorkerSlot(
+            index=i,
+            cpus=sorted(cpu for core in block for cpu in core),
+            threads=threads or (len(block) if len(cores) >= workers else 1),
+        )
+        for i, block in enumerate(blocks)
+    ]
+    return CpuLayout(
+        workers=workers,
+        threads=min(slot.threads for slot in slots),
+        interop_threads=interop_threads,
+        slots=slots,
+        pinned=pin and hasattr(os, "sched_setaffinity"),
+        source=source,
+    )
+
+
+def enter_slot(slot: WorkerSlot, layout: CpuLayout) -> None:
+    """Make the calling thread run as worker ``slot`` of ``layout`` (threads and optional affinity).
+
+    Runs on the worker thread as it starts, so torch is only imported once
+    inference actually happens. Torch inter-op threads are process-wide and
+    can only be set before the first inter-op parallel work: the first
+    worker thread fixes them and later layouts keep that value.
+    """
+    try:
+        import torch
+        torch.set_num_threads(slot.threads)
+        if torch.get_num_interop_threads() != layout.interop_threads:
+            torch.set_num_interop_threads(layout.interop_threads)
+    except ImportError:
+        pass
+    except RuntimeError:
+        logger.debug("Torch inter-op threads already fixed for this process")
+    if layout.pinned:
+        os.sched_setaffinity(0, slot.cpus)
+    _current.slot = slot
+
+
+def current_worker() -> Optional[WorkerSlot]:
+    """Slot of the calling inference worker thread, or None outside the pool."""
+    return getattr(_current, "slot", None)
+
+
+def calibrate(
+    run: Callable[[], None],
+    cores: List[List[int]],
+    interop_threads: int = 1,
+    pin: bool = False,
+    max_workers: int = 0
+) -> CpuLayout:
+    """Choose the workers x threads split with the highest measured throughput (blocking).
+
+    ``run`` is one representative inference call. For each candidate worker
+    count (powers of two up to the number of physical cores) that many
+    threads run it concurrently, each set up as its slot of the candidate
+    layout. Larger worker counts must beat smaller ones by
+    CALIBRATION_MARGIN, as fewer workers also means lower latency per call.
+
+    Args:
+        run: Inference call to time
+        cores: Physical cores to divide
+        interop_threads: Torch inter-op threads for the process
+        pin: Pin workers while measuring and in the resulting layout
+        max_workers: Largest worker count to try (0 = number of cores)
+    """
+    limit = min(len(cores), max_workers) if max_workers > 0 else len(cores)
+    candidates = sorted({2 ** i for i in range(limit.bit_length()) if 2 ** i <= limit} | {limit})
+
+    run()  # One-time costs (allocations, kernel selection) stay out of the timings
+    results: Dict[str, float] = {}
+    best: Optional[CpuLayout] = None
+    best_rate = 0.0
+    for workers in candidates:
+        layout = plan_layout(cores, workers, 0, interop_threads, pin, source="calibrated")
+        barrier = threading.Barrier(workers)
+
+        def bench(slot: WorkerSlot) -> None:
+            enter_slot(slot, layout)
+            barrier.wait()
+            for _ in range(CALIBRATION_ROUNDS):
+                run()
+
+        threads = [threading.Thread(target=bench, args=(slot,)) for slot in layout.slots]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        rate = workers * CALIBRATION_ROUNDS / (time.perf_counter() - started)
+        results[f"{workers}x{layout.threads}"] = round(rate, 3)
+        logger.info(f"Calibration: {workers} workers x {layout.threads} threads -> {rate:.2f} calls/s")
+        if best is None or rate > best_rate * CALIBRATION_MARGIN:
+            best, best_rate = layout, rate
+
+    best.calibration = results
+    logger.info(f"Calibration chose {best.workers} workers x {best.threads} threads")
+    return best
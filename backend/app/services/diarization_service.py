@@ -1,13 +1,26 @@
 """Diarization service for speaker identification and segmentation."""
 import os
-from typing import Optional, List, Dict
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Optional, List, Dict, Tuple
 import logging
-from pyannote.audio import Pipeline
-import whisper
-import torch
+import numpy as np
+from .model_registry import get_model_registry
+from .inference_executor import get_inference_executor
+from .alignment import align_segments
+from .long_audio import get_long_audio_transcriber, should_use_long_audio
+from .audio_decoder import AudioInput, load_audio, duration_seconds, to_pyannote_input
+from .voiceprint_store import get_voiceprint_store
+from .metrics import stage_timer, record_stage
+from .language_id import identify_language
+from .cpu_layout import CpuLayout, WorkerSlot, current_worker, enter_slot
 
 logger = logging.getLogger(__name__)
 
+DIARIZATION_MODEL = "pyannote/speaker-diarization-3.1"
+
 
 class DiarizationService:
     """Service for speaker diarization using pyannote.audio."""
@@ -26,18 +39,29 @@ class DiarizationService:
         self._load_pipeline()
     
     def _load_pipeline(self):
-        """Load pyannote diarization pipeline."""
+        """Load pyannote diarization pipeline through the shared model registry."""
+        self.pipeline = get_model_registry().get(
+            f"pyannote:{DIARIZATION_MODEL}",
+            self._build_pipeline
+        )
+    
+    def _build_pipeline(self):
+        """Build pyannote diarization pipeline from the Hugging Face hub."""
+        # Imported on first use: pyannote and torch are only needed with HF_TOKEN
+        import torch
+        from pyannote.audio import Pipeline
         try:
             logger.info("Loading pyannote diarization pipeline...")
             
             # Try both APIs for compatibility
             # Newer versions (>= 3.2) use 'token', older versions use 'use_auth_token'
+            pipeline = None
             pipeline_loaded = False
             
             # Try new API first
             try:
-                self.pipeline = Pipeline.from_pretrained(
-                    "pyannote/speaker-diarization-3.1",
+                pipeline = Pipeline.from_pretrained(
+                    DIARIZATION_MODEL,
                     token=self.hf_token
                 )
                 pipeline_loaded = True
@@ -48,8 +72,8 @@ class DiarizationService:
             # If new API failed, try old API
             if not pipeline_loaded:
                 try:
-                    self.pipeline = Pipeline.from_pretrained(
-                        "pyannote/speaker-diarization-3.1",
+                    pipeline = Pipeline.from_pretrained(
+                        DIARIZATION_MODEL,
                         use_auth_token=self.hf_token
                     )
                     logger.info("Loaded with 'use_auth_token' parameter (old API)")
@@ -58,31 +82,58 @@ class DiarizationService:
             
             # Use GPU if available
             if torch.cuda.is_available():
-                self.pipeline.to(torch.device("cuda"))
+                pipeline.to(torch.device("cuda"))
                 logger.info("Diarization pipeline loaded on GPU")
             else:
                 logger.info("Diarization pipeline loaded on CPU")
+            
+            return pipeline
                 
         except Exception as e:
             logger.error(f"Failed to load diarization pipeline: {e}")
             raise
     
-    def diarize(self, audio_path: str, num_speakers: Optional[int] = None) -> List[Dict]:
-        """Perform speaker diarization on audio file.
+    def diarize(
+        self,
+        audio: AudioInput,
+        num_speakers: Optional[int] = None,
+        return_embeddings: bool = False
+    ):
+        """Perform speaker diarization on audio.
         
         Args:
-            audio_path: Path to audio file
+            audio: Path to audio file, or decoded 16 kHz mono float32 array
             num_speakers: Optional number of speakers (if known)
+            return_embeddings: Also return one embedding per speaker (pyannote >= 3.1)
         
         Returns:
-            List of diarization segments with speaker, start, end times
+            List of diarization segments with speaker, start, end times; with
+            ``return_embeddings`` a (segments, {speaker: embedding}) tuple
         """
         try:
-            logger.info(f"Starting diarization for: {audio_path}")
+            if isinstance(audio, str):
+                logger.info(f"Starting diarization for: {audio}")
+                pipeline_input = audio
+            else:
+                logger.info(f"Starting diarization for in-memory audio ({duration_seconds(audio):.1f}s)")
+                pipeline_input = to_pyannote_input(audio)
             
             # Run diarization
             diarization_args = {"num_speakers": num_speakers} if num_speakers else {}
-            diarization = self.pipeline(audio_path, **diarization_args)
+            speaker_embeddings = {}
+            if return_embeddings:
+                try:
+                    diarization, embeddings = self.pipeline(pipeline_input, return_embeddings=True, **diarization_args)
+                    speaker_embeddings = {
+                        label: embeddings[i]
+                        for i, label in enumerate(diarization.labels())
+                        if i < len(embeddings) and np.all(np.isfinite(embeddings[i]))
+                    }
+                except TypeError:
+                    # Pipelines before 3.1 cannot return speaker embeddings
+                    diarization = self.pipeline(pipeline_input, **diarization_args)
+            else:
+                diarization = self.pipeline(pipeline_input, **diarization_args)
             
             # Convert to list of segments
             segments = []
@@ -96,6 +147,8 @@ class DiarizationService:
             num_speakers_detected = len(set(s["speaker"] for s in segments))
             logger.info(f"Diarization complete. Detected {num_speakers_detected} speakers, {len(segments)} segments")
             
+            if return_embeddings:
+                return segments, speaker_embeddings
             return segments
             
         except Exception as e:
@@ -104,79 +157,140 @@ class DiarizationService:
 
 
 async def transcribe_with_diarization(
-    audio_path: str,
+    audio: AudioInput,
     whisper_model,
     hf_token: str,
     num_speakers: Optional[int] = None,
-    context: Optional[Dict] = None
+    context: Optional[Dict] = None,
+    progress: Optional[Callable[[float, str], None]] = None,
+    language: Optional[str] = None,
+    primary: bool = True
 ) -> dict:
-    """Transcribe audio with speaker diarization.
+    """Transcribe audio with speaker diarization on the inference executor.
     
     Args:
-        audio_path: Path to audio file
+        audio: Path to audio file, or decoded 16 kHz mono float32 array
         whisper_model: Loaded Whisper model instance
         hf_token: Hugging Face token for pyannote
         num_speakers: Optional expected number of speakers
         context: Optional context dict with cliente_id and/or ejecutivo_id
+        progress: Optional callback receiving (fraction, stage) updates
+        language: Optional language code; identified from the leading window if omitted
+        primary: Whether ``whisper_model`` is WHISPER_MODEL; only the primary
+            model may hand long recordings to the long-audio worker processes,
+            which load WHISPER_MODEL
     
     Returns:
         dict with transcription, segments, speakers, and metadata
+    
+    Raises:
+        InferenceBusyError: If the inference executor is saturated
     """
-    import tempfile
-    import os
+    return await get_inference_executor().run(
+        transcribe_with_diarization_sync,
+        audio,
+        whisper_model,
+        hf_token,
+        num_speakers,
+        context,
+        progress,
+        language,
+        primary
+    )
+
+
+def transcribe_with_diarization_sync(
+    audio: AudioInput,
+    whisper_model,
+    hf_token: str,
+    num_speakers: Optional[int] = None,
+    context: Optional[Dict] = None,
+    progress: Optional[Callable[[float, str], None]] = None,
+    language: Optional[str] = None,
+    primary: bool = True
+) -> dict:
+    """Transcribe audio with speaker diarization (blocking).
+    
+    Args:
+        audio: Path to audio file, or decoded 16 kHz mono float32 array
+        whisper_model: Loaded Whisper model instance
+        hf_token: Hugging Face token for pyannote
+        num_speakers: Optional expected number of speakers
+        context: Optional context dict with cliente_id and/or ejecutivo_id
+        progress: Optional callback receiving (fraction, stage) updates
+        language: Optional language code; identified from the leading window if omitted
+        primary: Whether ``whisper_model`` is WHISPER_MODEL; only the primary
+            model may hand long recordings to the long-audio worker processes,
+            which load WHISPER_MODEL
+    
+    Returns:
+        dict with transcription, segments, speakers, and metadata
+    """
+    def report(fraction: float, stage: str):
+        if progress:
+            progress(fraction, stage)
     
-    wav_path = None
     try:
-        # Step 0: Convert audio to WAV if needed (pyannote requires WAV)
-        if not audio_path.endswith('.wav'):
-            logger.info("Step 0/3: Converting audio to WAV format...")
-            import soundfile as sf
-            import librosa
-            
-            # Load audio with librosa (handles all formats)
-            audio_data, sample_rate = librosa.load(audio_path, sr=None, mono=False)
-            
-            # Create temporary WAV file
-            wav_fd, wav_path = tempfile.mkstemp(suffix='.wav')
-            os.close(wav_fd)
-            
-            # Save as WAV
-            sf.write(wav_path, audio_data.T if len(audio_data.shape) > 1 else audio_data, sample_rate)
-            logger.info(f"Converted to WAV: {wav_path}")
-            audio_path_for_diarization = wav_path
-        else:
-            audio_path_for_diarization = audio_path
+        # Step 0: Decode once; both pyannote and Whisper consume the same PCM buffer
+        logger.info("Step 0/3: Decoding audio...")
+        report(0.05, "decoding")
+        audio = load_audio(audio)
+        if language is None:
+            language = identify_language(whisper_model, audio)
         
-        # Step 1: Get diarization segments
-        logger.info("Step 1/3: Running diarization...")
-        diarization_service = DiarizationService(hf_token)
-        diarization_segments = diarization_service.diarize(audio_path_for_diarization, num_speakers)
+        # Steps 1 and 2: diarization and Whisper only meet at alignment, so they
+        # run side by side, each with its own share of the cores
+        diarization_service = get_diarization_service(hf_token)
+        # Embeddings let the ejecutivo be recognised by voiceprint
+        want_embeddings = bool(context and context.get("ejecutivo_id")) and get_voiceprint_store() is not None
+        stage_pools = get_stage_pools()
+        
+        started = time.perf_counter()
+        if stage_pools is not None:
+            logger.info("Steps 1-2/3: Running diarization and transcription in parallel...")
+            report(0.1, "diarizing+transcribing")
+            diarize_pool, transcribe_pool = stage_pools.for_worker(current_worker())
+            diarize_future = diarize_pool.submit(
+                contextvars.copy_context().run,
+                _run_diarization, diarization_service, audio, num_speakers, want_embeddings
+            )
+            transcribe_future = transcribe_pool.submit(
+                contextvars.copy_context().run,
+                _run_whisper, whisper_model, audio, language, primary
+            )
+            # Wait for both, so a failed stage never leaves the other running unobserved
+            wait([diarize_future, transcribe_future])
+            diarization_segments, speaker_embeddings = diarize_future.result()
+            whisper_result = transcribe_future.result()
+        else:
+            logger.info("Step 1/3: Running diarization...")
+            report(0.1, "diarizing")
+            diarization_segments, speaker_embeddings = _run_diarization(
+                diarization_service, audio, num_speakers, want_embeddings
+            )
+            logger.info("Step 2/3: Transcribing audio...")
+            report(0.5, "transcribing")
+            whisper_result = _run_whisper(whisper_model, audio, language, primary)
+        record_stage("diarize_transcribe", time.perf_counter() - started)
         
         if not diarization_segments:
             raise ValueError("No speakers detected in audio")
         
-        # Step 2: Transcribe full audio with Whisper
-        logger.info("Step 2/3: Transcribing audio...")
-        whisper_result = whisper_model.transcribe(
-            audio_path,
-            language=None,  # Auto-detect
-            fp16=False,
-            word_timestamps=True  # Important for alignment
-        )
-        
         full_text = whisper_result["text"].strip()
         detected_language = whisper_result.get("language", "unknown")
-        duration = whisper_result.get("duration", 0)
+        duration = duration_seconds(audio)
         
         # Step 3: Align transcription with diarization
         logger.info("Step 3/3: Aligning transcription with speakers...")
-        aligned_segments = _align_transcription_with_diarization(
-            whisper_result.get("segments", []),
-            diarization_segments
-        )
-        
-        # Assign roles (improved with context if available)
-        aligned_segments = _assign_roles_with_context(aligned_segments, context)
+        report(0.9, "aligning")
+        with stage_timer("align"):
+            aligned_segments = _align_transcription_with_diarization(
+                whisper_result.get("segments", []),
+                diarization_segments
+            )
+            
+            # Assign roles (improved with context if available)
+            aligned_segments = _assign_roles_with_context(aligned_segments, context, speaker_embeddings)
         
         # Calculate overall confidence
         if aligned_segments:
@@ -196,80 +310,165 @@ async def transcribe_with_diarization(
             "segments": aligned_segments,
             "num_speakers": num_speakers_detected,
             "mode": "diarization",
-            "metadata": context or {}  # Include context in response
+            "metadata": context or {},  # Include context in response
+            "speaker_embeddings": speaker_embeddings  # For voiceprint enrollment, not returned to clients
         }
         
     except Exception as e:
         logger.error(f"Diarization transcription failed: {e}")
         raise
-    finally:
-        # Cleanup temporary WAV file
-        if wav_path and os.path.exists(wav_path):
-            try:
-                os.unlink(wav_path)
-                logger.info(f"Cleaned up temporary WAV file: {wav_path}")
-            except Exception as cleanup_error:
-                logger.warning(f"Could not cleanup WAV file {wav_path}: {cleanup_error}")
+
+
+def _run_diarization(
+    diarization_service: DiarizationService,
+    audio: np.ndarray,
+    num_speakers: Optional[int],
+    return_embeddings: bool
+) -> Tuple[List[Dict], Optional[Dict[str, np.ndarray]]]:
+    with stage_timer("diarize"):
+        if return_embeddings:
+            return diarization_service.diarize(audio, num_speakers, return_embeddings=True)
+        return diarization_service.diarize(audio, num_speakers), None
+
+
+def _run_whisper(whisper_model, audio: np.ndarray, language: Optional[str], primary: bool = True) -> dict:
+    with stage_timer("transcribe"):
+        if primary and should_use_long_audio(audio):
+            return get_long_audio_transcriber().transcribe(audio, language, word_timestamps=True)
+        return whisper_model.transcribe(
+            audio,
+            language=language,  # None = auto-detect
+            fp16=False,
+            word_timestamps=True  # Important for alignment
+        )
+
+
+def stage_thread_budgets(slot: Optional[WorkerSlot] = None) -> Tuple[int, int]:
+    """Torch threads for (diarization, transcription) in one diarization request.
+
+    DIARIZATION_THREADS / TRANSCRIPTION_THREADS override the default, which
+    splits the threads of inference worker ``slot`` (see
+    :mod:`app.services.cpu_layout`) between the two stages.
+    """
+    from ..config import settings
+    if slot is not None:
+        share = max(2, slot.threads)
+    else:
+        share = max(2, (os.cpu_count() or 2) // max(1, settings.INFERENCE_WORKERS))
+    diarize = settings.DIARIZATION_THREADS or max(1, share // 2)
+    transcribe = settings.TRANSCRIPTION_THREADS or max(1, share - diarize)
+    return diarize, transcribe
+
+
+class StagePools:
+    """One diarization and one transcription thread per inference worker of a layout.
+
+    OpenMP thread counts and CPU affinity belong to the calling thread, so
+    each stage thread is set up once, when it starts, with its stage's share
+    of its inference worker's threads and, when the layout is pinned, that
+    worker's cores. Stage threads are never shared between workers, so
+    nothing has to be changed or restored per request. faster-whisper keeps
+    the WHISPER_CPU_THREADS it was loaded with.
+    """
+
+    def __init__(self, layout: CpuLayout):
+        self.layout = layout
+        self._pools: Dict[int, Tuple[ThreadPoolExecutor, ThreadPoolExecutor]] = {}
+        for slot in layout.slots:
+            diarize_threads, transcribe_threads = stage_thread_budgets(slot)
+            self._pools[slot.index] = (
+                self._create_pool(WorkerSlot(slot.index, slot.cpus, diarize_threads), "diarize"),
+                self._create_pool(WorkerSlot(slot.index, slot.cpus, transcribe_threads), "transcribe"),
+            )
+
+    def _create_pool(self, slot: WorkerSlot, stage: str) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix=f"{stage}-stage-{slot.index}",
+            initializer=enter_slot,
+            initargs=(slot, self.layout),
+        )
+
+    def for_worker(self, slot: Optional[WorkerSlot]) -> Tuple[ThreadPoolExecutor, ThreadPoolExecutor]:
+        """(diarization, transcription) pools of inference worker ``slot`` (the first one outside the executor)."""
+        return self._pools.get(slot.index if slot is not None else 0) or self._pools[0]
+
+    def shutdown(self) -> None:
+        # Stages already submitted finish on their threads
+        for pools in self._pools.values():
+            for pool in pools:
+                pool.shutdown(wait=False)
+
+
+_stage_pools: Optional[StagePools] = None
+_stage_pools_lock = threading.Lock()
+
+
+def get_stage_pools() -> Optional[StagePools]:
+    """Stage pools for the inference executor's current layout (None without PARALLEL_DIARIZATION).
+
+    The pools are rebuilt when the executor switches layout (see
+    :meth:`~app.services.inference_executor.InferenceExecutor.apply_layout`).
+    """
+    global _stage_pools
+    from ..config import settings
+    if not settings.PARALLEL_DIARIZATION:
+        return None
+    layout = get_inference_executor().layout
+    with _stage_pools_lock:
+        if _stage_pools is None or _stage_pools.layout is not layout:
+            if _stage_pools is not None:
+                _stage_pools.shutdown()
+            _stage_pools = StagePools(layout)
+        return _stage_pools
+
+
+def shutdown_stage_pools() -> None:
+    """Release the stage threads (on application shutdown)."""
+    global _stage_pools
+    with _stage_pools_lock:
+        if _stage_pools is not None:
+            _stage_pools.shutdown()
+            _stage_pools = None
 
 
 def _align_transcription_with_diarization(
     whisper_segments: List[Dict],
-    diarization_segments: List[Dict]
+    diarization_segments: List[Dict],
+    word_level: bool = True
 ) -> List[Dict]:
     """Align Whisper transcription segments with diarization speaker segments.
     
+    Runs in linear time (see ``alignment.TurnSweep``) and, with word
+    timestamps, splits a segment where the speaker changes mid-segment.
+    
     Args:
         whisper_segments: Segments from Whisper with text and timestamps
         diarization_segments: Segments from pyannote with speaker labels
+        word_level: Assign speakers per word instead of per segment
     
     Returns:
         Aligned segments with speaker, text, timestamps, and confidence
     """
-    aligned = []
-    
-    for whisper_seg in whisper_segments:
-        w_start = whisper_seg["start"]
-        w_end = whisper_seg["end"]
-        w_text = whisper_seg["text"].strip()
-        w_confidence = 1.0 - whisper_seg.get("no_speech_prob", 0.0)
-        
-        # Find overlapping diarization segment
-        best_overlap = 0
-        best_speaker = "SPEAKER_UNKNOWN"
-        
-        for diar_seg in diarization_segments:
-            d_start = diar_seg["start"]
-            d_end = diar_seg["end"]
-            
-            # Calculate overlap
-            overlap_start = max(w_start, d_start)
-            overlap_end = min(w_end, d_end)
-            overlap = max(0, overlap_end - overlap_start)
-            
-            if overlap > best_overlap:
-                best_overlap = overlap
-                best_speaker = diar_seg["speaker"]
-        
-        aligned.append({
-            "speaker": best_speaker,
-            "start": w_start,
-            "end": w_end,
-            "text": w_text,
-            "confidence": w_confidence
-        })
-    
-    return aligned
+    return align_segments(whisper_segments, diarization_segments, word_level=word_level)
 
 
-def _assign_roles_with_context(segments: List[Dict], context: Optional[Dict] = None) -> List[Dict]:
+def _assign_roles_with_context(
+    segments: List[Dict],
+    context: Optional[Dict] = None,
+    speaker_embeddings: Optional[Dict[str, np.ndarray]] = None
+) -> List[Dict]:
     """Assign ejecutivo/cliente roles to speakers using context.
     
     Uses context information (cliente_id, ejecutivo_id) if available to improve
-    role assignment accuracy. Falls back to simple heuristic if no context.
+    role assignment accuracy. When the ejecutivo has an enrolled voiceprint and
+    speaker embeddings are given, the speaker matching the voiceprint is the
+    ejecutivo. Falls back to simple heuristic if no context.
     
     Args:
         segments: List of segments with speaker labels
         context: Optional dict with cliente_id and/or ejecutivo_id
+        speaker_embeddings: Optional speaker label -> embedding for the call
     
     Returns:
         Segments with added 'role' field
@@ -297,7 +496,17 @@ def _assign_roles_with_context(segments: List[Dict], context: Optional[Dict] = N
     # Default: first speaker = ejecutivo (common pattern: agent greets first)
     
     role_mapping = {}
-    if len(speakers_order) == 2:
+    store = get_voiceprint_store()
+    match = None
+    if store is not None and context.get("ejecutivo_id") and speaker_embeddings:
+        match = store.identify(context["ejecutivo_id"], speaker_embeddings)
+    
+    if match:
+        ejecutivo_speaker, similarity = match
+        for speaker in speakers_order:
+            role_mapping[speaker] = "ejecutivo" if speaker == ejecutivo_speaker else "cliente"
+        logger.info(f"Voiceprint match: {ejecutivo_speaker}=ejecutivo (similarity {similarity:.2f})")
+    elif len(speakers_order) == 2:
         # Most common case: 2 people talking
         # First speaker is usually ejecutivo, second is cliente
         role_mapping[speakers_order[0]] = "ejecutivo"
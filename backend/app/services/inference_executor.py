@@ -0,0 +1,214 @@
+"""Bounded executor that runs blocking model inference off the event loop."""
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from .metrics import record_stage
+from .inference_scheduler import FairScheduler, InferenceTicket, current_ticket
+from .cpu_layout import CpuLayout, enter_slot, plan_layout, process_cores
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceBusyError(Exception):
+    """Raised when the inference executor has no free worker or queue slot."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Inference capacity exhausted, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class InferenceExecutor:
+    """Thread pool with a fixed number of workers and a bounded wait queue.
+
+    At most ``max_workers`` inference calls run at once and at most
+    ``queue_depth`` more wait for a worker. Anything beyond that is rejected
+    immediately with :class:`InferenceBusyError` instead of piling up.
+
+    Waiting calls are not served FIFO: a
+    :class:`~app.services.inference_scheduler.FairScheduler` picks the next
+    one by mode lane, estimated cost and per-user cap, using the
+    :func:`~app.services.inference_scheduler.inference_ticket` of the caller.
+
+    Each worker thread runs as one slot of a
+    :class:`~app.services.cpu_layout.CpuLayout`: its own block of cores and
+    a matching torch intra-op thread count, so concurrent calls do not
+    oversubscribe the CPU.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 1,
+        queue_depth: int = 4,
+        retry_after: int = 10,
+        scheduler: Optional[FairScheduler] = None,
+        layout: Optional[CpuLayout] = None
+    ):
+        """Initialize inference executor.
+
+        Args:
+            max_workers: Number of concurrent inference calls
+            queue_depth: Number of calls allowed to wait for a worker
+            retry_after: Seconds suggested to clients when saturated
+            scheduler: Picks which waiting call runs next (default: a single lane)
+            layout: Cores and threads per worker (default: this process's
+                cores split evenly between ``max_workers``); its worker
+                count takes precedence over ``max_workers``
+        """
+        self.layout = layout or plan_layout(process_cores(), max_workers)
+        self.max_workers = self.layout.workers
+        self.queue_depth = queue_depth
+        self.retry_after = retry_after
+        self.scheduler = scheduler or FairScheduler(self.max_workers, {"simple": 1.0})
+        self._pool = self._create_pool()
+        # Only touched from the event loop thread, so no lock is needed
+        self._in_flight = 0
+        # Updated from worker threads
+        self._running = 0
+        self._running_lock = threading.Lock()
+        self._rejected = 0
+
+    def _create_pool(self) -> ThreadPoolExecutor:
+        layout = self.layout
+        slots = iter(layout.slots)
+        slots_lock = threading.Lock()
+
+        def init_worker() -> None:
+            # The pool starts at most max_workers threads, one per slot
+            with slots_lock:
+                slot = next(slots)
+            enter_slot(slot, layout)
+
+        return ThreadPoolExecutor(
+            max_workers=layout.workers, thread_name_prefix="inference", initializer=init_worker
+        )
+
+    def apply_layout(self, layout: CpuLayout) -> None:
+        """Switch to a new worker layout (call from the event loop thread).
+
+        Calls already running finish on the old worker threads; new calls
+        start on a pool built for ``layout``.
+        """
+        old_pool = self._pool
+        self.layout = layout
+        self.max_workers = layout.workers
+        self._pool = self._create_pool()
+        self.scheduler.resize(layout.workers)
+        old_pool.shutdown(wait=False)
+        logger.info(f"Inference layout: {layout.workers} workers x {layout.threads} threads ({layout.source})")
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.queue_depth
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run ``fn(*args, **kwargs)`` on an inference worker.
+
+        ``fn`` runs in a copy of the caller's context, so per-request stage
+        timings recorded on the worker thread reach the caller.
+
+        Raises:
+            InferenceBusyError: If all workers are busy and the queue is full
+        """
+        if self._in_flight >= self.capacity:
+            self._rejected += 1
+            logger.warning(f"Inference executor saturated ({self._in_flight}/{self.capacity})")
+            raise InferenceBusyError(self.retry_after)
+
+        self._in_flight += 1
+        submitted = time.perf_counter()
+        ticket = current_ticket()
+        try:
+            await self.scheduler.acquire(ticket)
+        except BaseException:
+            self._in_flight -= 1
+            raise
+
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        call = functools.partial(self._tracked, submitted, fn, *args, **kwargs)
+        try:
+            future = self._pool.submit(context.run, call)
+        except BaseException:
+            self._finish(ticket)
+            raise
+        # The slot is freed when the call ends on its thread: a caller that
+        # stops waiting (disconnect, timeout) leaves the model running
+        future.add_done_callback(lambda _: self._finish_threadsafe(loop, ticket))
+        return await asyncio.wrap_future(future)
+
+    def _finish(self, ticket: InferenceTicket) -> None:
+        self.scheduler.release(ticket)
+        self._in_flight -= 1
+
+    def _finish_threadsafe(self, loop: asyncio.AbstractEventLoop, ticket: InferenceTicket) -> None:
+        try:
+            loop.call_soon_threadsafe(self._finish, ticket)
+        except RuntimeError:
+            # Event loop already closed: nobody is left to hand the slot to
+            pass
+
+    def _tracked(self, submitted: float, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        record_stage("queue", time.perf_counter() - submitted)
+        with self._running_lock:
+            self._running += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._running_lock:
+                self._running -= 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "queue_depth": self.queue_depth,
+            "running": self._running,
+            "queued": max(0, self._in_flight - self._running),
+            "rejected": self._rejected,
+            "scheduler": self.scheduler.stats(),
+            "layout": self.layout.stats(),
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Singleton instance
+_inference_executor: Optional[InferenceExecutor] = None
+
+def get_inference_executor() -> InferenceExecutor:
+    """Get or create inference executor instance."""
+    global _inference_executor
+    if _inference_executor is None:
+        from ..config import settings
+        _inference_executor = InferenceExecutor(
+            max_workers=settings.INFERENCE_WORKERS,
+            queue_depth=settings.INFERENCE_QUEUE_DEPTH,
+            retry_after=settings.INFERENCE_RETRY_AFTER_SECONDS,
+            layout=plan_layout(
+                process_cores(),
+                settings.INFERENCE_WORKERS,
+                threads=settings.INFERENCE_THREADS,
+                interop_threads=settings.INFERENCE_INTEROP_THREADS,
+                pin=settings.INFERENCE_PIN_CPUS,
+            ),
+            scheduler=FairScheduler(
+                settings.INFERENCE_WORKERS,
+                weights={
+                    "simple": settings.SCHEDULER_SIMPLE_WEIGHT,
+                    "diarization": settings.SCHEDULER_DIARIZATION_WEIGHT,
+                },
+                cost_factors={
+                    "simple": 1.0,
+                    "diarization": settings.SCHEDULER_DIARIZATION_COST_FACTOR,
+                },
+                user_max_running=settings.SCHEDULER_USER_MAX_RUNNING,
+                aging_rate=settings.SCHEDULER_AGING_RATE,
+            ),
+        )
+    return _inference_executor
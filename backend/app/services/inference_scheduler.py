@@ -0,0 +1,227 @@
+"""Fair scheduling of inference calls between transcription modes and users.
+
+Calls wait in one lane per mode (``simple`` and ``diarization``). When an
+inference worker frees up, the next call is chosen in two steps:
+
+1. Lane: weighted fair queuing. Every dispatched call advances its lane's
+   virtual time by ``cost / weight``, and the backlogged lane that is
+   furthest behind goes next, so with weights 3:1 simple calls get about
+   three quarters of the worker time under contention, however long the
+   diarization calls are.
+2. Call: shortest estimated cost first within the lane, where cost is the
+   audio duration times the lane's cost factor. A waiting call's cost is
+   reduced by ``aging_rate`` for every second it waits, so long recordings
+   are delayed but never starved.
+
+Calls from a user already running ``user_max_running`` calls are skipped
+until one of them finishes.
+
+A call made for several requests at once (a micro-batch) carries one share
+ticket per request: each share is charged to its own lane and user, so
+joining a batch neither hides a request from the user cap nor bills it to
+whoever happened to open the batch.
+
+The scheduler is only used from the event loop thread and needs no locks.
+"""
+import asyncio
+import contextvars
+import itertools
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+DEFAULT_LANE = "simple"
+# Fixed overhead per call in cost units, so zero-length calls still advance fair shares
+CALL_OVERHEAD = 1.0
+
+
+@dataclass
+class InferenceTicket:
+    """Scheduling information for the inference calls of one request."""
+    lane: str = DEFAULT_LANE
+    user_id: Optional[str] = None
+    audio_seconds: float = 0.0
+    # Requests served together by this call (a micro-batch), charged one by one
+    shares: List["InferenceTicket"] = field(default_factory=list)
+
+    def members(self) -> List["InferenceTicket"]:
+        """Tickets the call is charged to: the shares of a batch, or the ticket itself."""
+        return self.shares or [self]
+
+
+_ticket: contextvars.ContextVar[Optional[InferenceTicket]] = contextvars.ContextVar("inference_ticket", default=None)
+
+
+@contextmanager
+def inference_ticket(
+    lane: str,
+    user_id: Optional[str] = None,
+    audio_seconds: float = 0.0,
+    shares: Optional[List[InferenceTicket]] = None
+) -> Iterator[None]:
+    """Schedule inference calls made inside the block as ``lane`` work of ``user_id``.
+
+    With ``shares`` the calls serve several requests at once and are charged
+    to each share's lane and user instead.
+    """
+    token = _ticket.set(InferenceTicket(lane, user_id, audio_seconds, list(shares or [])))
+    try:
+        yield
+    finally:
+        _ticket.reset(token)
+
+
+def current_ticket() -> InferenceTicket:
+    return _ticket.get() or InferenceTicket()
+
+
+@dataclass
+class _Lane:
+    weight: float
+    cost_factor: float
+    waiters: List["_Waiter"] = field(default_factory=list)
+    virtual_time: float = 0.0
+    dispatched: int = 0
+
+
+@dataclass
+class _Waiter:
+    ticket: InferenceTicket
+    cost: float
+    enqueued: float
+    seq: int
+    future: asyncio.Future
+
+
+class FairScheduler:
+    """Hands out inference worker slots by lane share, estimated cost and user cap."""
+
+    def __init__(
+        self,
+        slots: int,
+        weights: Dict[str, float],
+        cost_factors: Optional[Dict[str, float]] = None,
+        user_max_running: int = 0,
+        aging_rate: float = 1.0
+    ):
+        """Initialize fair scheduler.
+
+        Args:
+            slots: Calls allowed to run at once (inference workers)
+            weights: Share weight per lane; unknown lanes use the default lane
+            cost_factors: Estimated processing cost per audio second, per lane
+            user_max_running: Running calls allowed per user_id (0 = no cap)
+            aging_rate: Cost units forgiven per second a call waits
+        """
+        self.slots = slots
+        self.user_max_running = user_max_running
+        self.aging_rate = aging_rate
+        cost_factors = cost_factors or {}
+        self._lanes = {
+            name: _Lane(weight=max(weight, 1e-6), cost_factor=cost_factors.get(name, 1.0))
+            for name, weight in weights.items()
+        }
+        self._running = 0
+        self._running_by_user: Dict[str, int] = {}
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+
+    def _lane(self, ticket: InferenceTicket) -> _Lane:
+        return self._lanes.get(ticket.lane) or self._lanes[DEFAULT_LANE]
+
+    def _user_capped(self, ticket: InferenceTicket) -> bool:
+        return self.user_max_running > 0 and any(
+            share.user_id is not None and self._running_by_user.get(share.user_id, 0) >= self.user_max_running
+            for share in ticket.members()
+        )
+
+    def _cost(self, ticket: InferenceTicket) -> float:
+        return sum(CALL_OVERHEAD + share.audio_seconds * self._lane(share).cost_factor for share in ticket.members())
+
+    async def acquire(self, ticket: InferenceTicket) -> None:
+        """Wait until ``ticket`` may run on a worker."""
+        lane = self._lane(ticket)
+        cost = self._cost(ticket)
+        if not lane.waiters:
+            # A lane that was idle does not get credit for the time it had nothing to run
+            lane.virtual_time = max(lane.virtual_time, self._virtual_time)
+        waiter = _Waiter(ticket, cost, time.monotonic(), next(self._seq), asyncio.get_running_loop().create_future())
+        lane.waiters.append(waiter)
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just before the cancellation: hand the slot on
+                self.release(ticket)
+            elif waiter in lane.waiters:
+                lane.waiters.remove(waiter)
+            raise
+
+    def release(self, ticket: InferenceTicket) -> None:
+        """Return the slot of a finished call and start the next one."""
+        self._running -= 1
+        for share in ticket.members():
+            if share.user_id is None:
+                continue
+            remaining = self._running_by_user.get(share.user_id, 1) - 1
+            if remaining > 0:
+                self._running_by_user[share.user_id] = remaining
+            else:
+                self._running_by_user.pop(share.user_id, None)
+        self._dispatch()
+
+    def resize(self, slots: int) -> None:
+        """Change the number of calls allowed to run at once."""
+        self.slots = slots
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+        while self._running < self.slots:
+            best_lane: Optional[_Lane] = None
+            best_waiter: Optional[_Waiter] = None
+            for lane in self._lanes.values():
+                candidate = self._pick(lane, now)
+                if candidate is not None and (best_lane is None or lane.virtual_time < best_lane.virtual_time):
+                    best_lane, best_waiter = lane, candidate
+            if best_waiter is None:
+                return
+
+            best_lane.waiters.remove(best_waiter)
+            self._virtual_time = best_lane.virtual_time
+            self._charge(best_waiter.ticket)
+            self._running += 1
+            best_waiter.future.set_result(None)
+
+    def _charge(self, ticket: InferenceTicket) -> None:
+        """Advance lane virtual time and running counts for each share of a dispatched call."""
+        for share in ticket.members():
+            lane = self._lane(share)
+            lane.virtual_time += (CALL_OVERHEAD + share.audio_seconds * lane.cost_factor) / lane.weight
+            lane.dispatched += 1
+            if share.user_id is not None:
+                self._running_by_user[share.user_id] = self._running_by_user.get(share.user_id, 0) + 1
+
+    def _pick(self, lane: _Lane, now: float) -> Optional[_Waiter]:
+        """Cheapest waiter of ``lane`` (after aging) whose user is under the cap."""
+        best = None
+        best_score = None
+        for waiter in lane.waiters:
+            if waiter.future.done() or self._user_capped(waiter.ticket):
+                continue
+            score = (waiter.cost - self.aging_rate * (now - waiter.enqueued), waiter.seq)
+            if best_score is None or score < best_score:
+                best, best_score = waiter, score
+        return best
+
+    def stats(self) -> dict:
+        return {
+            "lanes": {
+                name: {"weight": lane.weight, "queued": len(lane.waiters), "dispatched": lane.dispatched}
+                for name, lane in self._lanes.items()
+            },
+            "user_max_running": self.user_max_running,
+            "users_running": len(self._running_by_user),
+        }
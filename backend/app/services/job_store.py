@@ -0,0 +1,390 @@
+"""Persistent SQLite-backed queue for asynchronous transcription jobs."""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    stage TEXT,
+    mode TEXT NOT NULL,
+    language TEXT,
+    user_id TEXT NOT NULL,
+    context TEXT,
+    audio_path TEXT NOT NULL,
+    audio_sha256 TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    started_at REAL,
+    batch_id TEXT,
+    item_index INTEGER,
+    source TEXT,
+    worker_pid INTEGER
+);
+CREATE TABLE IF NOT EXISTS batches (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    user_id TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+# Columns added after the first release, for databases created before them
+_ADDED_COLUMNS = {
+    "started_at": "REAL",
+    "batch_id": "TEXT",
+    "item_index": "INTEGER",
+    "source": "TEXT",
+    "worker_pid": "INTEGER",
+}
+
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, priority, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_dedup ON jobs(audio_sha256, mode);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_batch ON jobs(batch_id, item_index);
+"""
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """Job queue persisted in a local SQLite database.
+
+    Jobs survive a worker restart: anything left ``running`` by a process
+    that is gone is put back in the queue by :meth:`requeue_interrupted`.
+    Each claim records the claiming process, so processes sharing the
+    database (pre-fork workers) never requeue each other's running jobs.
+    """
+
+    def __init__(self, db_path: str):
+        """Open (and create if needed) the job database.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in _ADDED_COLUMNS.items():
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._conn.executescript(_INDEXES)
+        # Progress updates arrive from inference worker threads
+        self._lock = threading.Lock()
+
+    def create(
+        self,
+        mode: str,
+        user_id: str,
+        audio_path: str,
+        audio_sha256: str,
+        language: Optional[str] = None,
+        context: Optional[Dict] = None,
+        priority: int = 0
+    ) -> Dict:
+        """Insert a new queued job and return it."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """INSERT INTO jobs (id, status, mode, language, user_id, context, audio_path,
+                                     audio_sha256, priority, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (job_id, JOB_QUEUED, mode, language, user_id, json.dumps(context) if context else None,
+                 audio_path, audio_sha256, priority, now, now)
+            )
+        return self.get(job_id)
+
+    def get_or_create_batch(self, name: str, user_id: str) -> Dict:
+        """Return the batch called ``name``, creating it on first use."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO batches (id, name, user_id, created_at) VALUES (?, ?, ?, ?)",
+                (uuid.uuid4().hex, name, user_id, time.time())
+            )
+            row = self._conn.execute("SELECT * FROM batches WHERE name = ?", (name,)).fetchone()
+        return dict(row)
+
+    def get_batch(self, batch_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM batches WHERE id = ?", (batch_id,)).fetchone()
+        return dict(row) if row else None
+
+    def add_batch_items(self, batch_id: str, items: List[Dict], priority: int) -> int:
+        """Queue manifest items as jobs of a batch.
+
+        Items are keyed by their position in the manifest; positions already
+        queued by an earlier submission are skipped, so re-submitting a
+        manifest resumes it.
+
+        Args:
+            batch_id: Batch the items belong to
+            items: Dicts with item_index, source, mode, user_id and optional
+                language and context
+            priority: Queue priority of the items
+
+        Returns:
+            Number of newly queued items
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = self._conn.executemany(
+                    """INSERT OR IGNORE INTO jobs (id, status, mode, language, user_id, context, audio_path,
+                                                   audio_sha256, priority, created_at, updated_at,
+                                                   batch_id, item_index, source)
+                       VALUES (?, ?, ?, ?, ?, ?, '', '', ?, ?, ?, ?, ?, ?)""",
+                    [
+                        (uuid.uuid4().hex, JOB_QUEUED, item["mode"], item.get("language"), item["user_id"],
+                         json.dumps(item["context"]) if item.get("context") else None,
+                         priority, now, now, batch_id, item["item_index"], item["source"])
+                        for item in items
+                    ]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return cursor.rowcount
+
+    def batch_summary(self, batch_id: str) -> Dict:
+        """Item counts by status, transcribed audio seconds, and the active time window."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) AS n FROM jobs WHERE batch_id = ? GROUP BY status",
+                (batch_id,)
+            ).fetchall()
+            totals = self._conn.execute(
+                """SELECT SUM(json_extract(result, '$.duration_seconds')) AS audio_seconds,
+                          MIN(started_at) AS first_started,
+                          MAX(CASE WHEN status IN (?, ?) THEN updated_at END) AS last_finished
+                   FROM jobs WHERE batch_id = ?""",
+                (JOB_DONE, JOB_FAILED, batch_id)
+            ).fetchone()
+        return {
+            "counts": {row["status"]: row["n"] for row in rows},
+            "audio_seconds": totals["audio_seconds"] or 0.0,
+            "first_started": totals["first_started"],
+            "last_finished": totals["last_finished"],
+        }
+
+    def iter_batch_results(self, batch_id: str, page_size: int = 500) -> Iterator[Dict]:
+        """Yield the finished items of a batch in manifest order, a page at a time."""
+        last_index = -1
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    """SELECT * FROM jobs WHERE batch_id = ? AND status IN (?, ?) AND item_index > ?
+                       ORDER BY item_index LIMIT ?""",
+                    (batch_id, JOB_DONE, JOB_FAILED, last_index, page_size)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield self._to_dict(row)
+            last_index = rows[-1]["item_index"]
+
+    def requeue_failed(self, batch_id: str) -> int:
+        """Put the failed items of a batch back in the queue. Returns the count."""
+        with self._lock:
+            cursor = self._conn.execute(
+                """UPDATE jobs SET status = ?, stage = ?, progress = 0, error = NULL, attempts = 0,
+                                  updated_at = ? WHERE batch_id = ? AND status = ?""",
+                (JOB_QUEUED, JOB_QUEUED, time.time(), batch_id, JOB_FAILED)
+            )
+        return cursor.rowcount
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def find_duplicate(
+        self,
+        audio_sha256: str,
+        mode: str,
+        language: Optional[str],
+        context: Optional[Dict],
+        user_id: str
+    ) -> Optional[Dict]:
+        """Return a queued, running, or finished job of ``user_id`` for the same audio and options."""
+        with self._lock:
+            rows = self._conn.execute(
+                """SELECT * FROM jobs WHERE audio_sha256 = ? AND mode = ? AND user_id = ? AND status != ?
+                   ORDER BY created_at DESC""",
+                (audio_sha256, mode, user_id, JOB_FAILED)
+            ).fetchall()
+        for row in rows:
+            job = self._to_dict(row)
+            if job["language"] == language and job["context"] == context:
+                return job
+        return None
+
+    def claim_next(self, min_priority: Optional[int] = None) -> Optional[Dict]:
+        """Atomically mark the highest-priority, oldest queued job as running.
+
+        Args:
+            min_priority: Only consider jobs with at least this priority
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    """SELECT id FROM jobs WHERE status = ? AND priority >= ?
+                       ORDER BY priority DESC, created_at ASC, item_index ASC LIMIT 1""",
+                    (JOB_QUEUED, min_priority if min_priority is not None else -2 ** 31)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                now = time.time()
+                self._conn.execute(
+                    """UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ?, started_at = ?,
+                                      worker_pid = ? WHERE id = ?""",
+                    (JOB_RUNNING, now, now, os.getpid(), row["id"])
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self.get(row["id"])
+
+    def update_progress(self, job_id: str, progress: float, stage: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET progress = ?, stage = ?, updated_at = ? WHERE id = ?",
+                (progress, stage, time.time(), job_id)
+            )
+
+    def complete(self, job_id: str, result: Dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                """UPDATE jobs SET status = ?, progress = 1, stage = ?, result = ?, error = NULL,
+                                  updated_at = ? WHERE id = ?""",
+                (JOB_DONE, JOB_DONE, json.dumps(result, default=str), time.time(), job_id)
+            )
+
+    def fail(self, job_id: str, error: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, stage = ?, error = ?, updated_at = ? WHERE id = ?",
+                (JOB_FAILED, JOB_FAILED, error, time.time(), job_id)
+            )
+
+    def requeue(self, job_id: str) -> None:
+        """Put a job back in the queue (e.g. when inference is saturated).
+
+        The claim did not run the job, so its attempt is not counted.
+        """
+        with self._lock:
+            self._conn.execute(
+                """UPDATE jobs SET status = ?, stage = ?, attempts = MAX(attempts - 1, 0), updated_at = ?
+                   WHERE id = ?""",
+                (JOB_QUEUED, JOB_QUEUED, time.time(), job_id)
+            )
+
+    def requeue_interrupted(self, include_live: bool = False) -> int:
+        """Requeue running jobs whose process is gone. Returns the count.
+
+        Jobs claimed by this process count as interrupted too: a process
+        calls this before claiming anything, and a restarted container can
+        reuse the previous process's pid.
+
+        Args:
+            include_live: Also requeue jobs of processes that are still
+                running (only when no other process serves this database,
+                e.g. in the pre-fork master before any worker starts)
+        """
+        pid = os.getpid()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, worker_pid FROM jobs WHERE status = ?", (JOB_RUNNING,)
+                ).fetchall()
+                interrupted = [
+                    row["id"] for row in rows
+                    if include_live or row["worker_pid"] in (None, pid) or not _process_alive(row["worker_pid"])
+                ]
+                self._conn.executemany(
+                    """UPDATE jobs SET status = ?, stage = ?, progress = 0, worker_pid = NULL, updated_at = ?
+                       WHERE id = ? AND status = ?""",
+                    [(JOB_QUEUED, JOB_QUEUED, time.time(), job_id, JOB_RUNNING) for job_id in interrupted]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(interrupted)
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    def list_finished_before(self, cutoff: float) -> List[Dict]:
+        """Finished jobs older than ``cutoff``; batch items are kept as the batch checkpoint."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?) AND updated_at < ? AND batch_id IS NULL",
+                (JOB_DONE, JOB_FAILED, cutoff)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def delete(self, job_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        job["context"] = json.loads(job["context"]) if job["context"] else None
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+
+# Singleton instance
+_job_store: Optional[JobStore] = None
+
+def get_job_store() -> JobStore:
+    """Get or create job store instance."""
+    global _job_store
+    if _job_store is None:
+        from ..config import settings
+        _job_store = JobStore(os.path.join(settings.JOBS_DIR, "jobs.db"))
+    return _job_store
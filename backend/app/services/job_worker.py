@@ -0,0 +1,176 @@
+"""Background worker that drains the persistent transcription job queue."""
+import asyncio
+import logging
+import os
+import time
+from typing import List, Optional
+
+from .job_store import JobStore, get_job_store
+from .inference_executor import InferenceBusyError, get_inference_executor
+from .batch_service import fetch_batch_audio
+from .transcription_service import run_transcription
+from .transcription_writer import persist_transcription
+
+logger = logging.getLogger(__name__)
+
+
+class JobWorker:
+    """Runs queued jobs from a :class:`JobStore` on the event loop.
+
+    Each worker task claims one job at a time and hands the blocking work to
+    the inference executor, so the loop stays free for HTTP traffic.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        concurrency: int = 1,
+        poll_interval: float = 1.0,
+        max_attempts: int = 3,
+        retention_seconds: float = 24 * 3600
+    ):
+        """Initialize job worker.
+
+        Args:
+            store: Job store to drain
+            concurrency: Number of jobs processed at once
+            poll_interval: Seconds between queue polls when idle
+            max_attempts: Jobs interrupted more often than this are failed
+            retention_seconds: Finished jobs older than this are purged
+        """
+        self.store = store
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._last_purge = 0.0
+
+    def start(self) -> None:
+        requeued = self.store.requeue_interrupted()
+        if requeued:
+            logger.info(f"Requeued {requeued} jobs interrupted by a stopped process")
+        for i in range(self.concurrency):
+            self._tasks.append(asyncio.create_task(self._run_loop(), name=f"job-worker-{i}"))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Wake idle workers after a new job was queued."""
+        self._wakeup.set()
+
+    async def _run_loop(self) -> None:
+        while True:
+            try:
+                self._purge_expired()
+                # Batch items (negative priority) only start while interactive work is not waiting
+                interactive_waiting = get_inference_executor().stats()["queued"] > 0
+                job = self.store.claim_next(min_priority=0 if interactive_waiting else None)
+                if job is None:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self._process(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job worker error: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _process(self, job: dict) -> None:
+        job_id = job["id"]
+
+        if job["attempts"] > self.max_attempts:
+            logger.error(f"Job {job_id} exceeded {self.max_attempts} attempts")
+            self.store.fail(job_id, f"Job interrupted {self.max_attempts} times")
+            self._remove_audio(job)
+            return
+
+        logger.info(f"Job {job_id} started (mode={job['mode']}, attempt {job['attempts']})")
+
+        def progress(fraction: float, stage: str):
+            self.store.update_progress(job_id, fraction, stage)
+
+        audio_path = job["audio_path"]
+        try:
+            if not audio_path:
+                # Batch item: local file used in place, or Storage object spooled for this run
+                self.store.update_progress(job_id, 0.0, "downloading")
+                audio_path, owned = await fetch_batch_audio(job)
+                if owned:
+                    job["audio_path"] = audio_path
+
+            response = await run_transcription(
+                audio=audio_path,
+                mode=job["mode"],
+                language=job["language"],
+                context=job["context"],
+                progress=progress,
+                audio_sha256=job["audio_sha256"] or None,
+                user_id=job["user_id"],
+                job_id=job_id
+            )
+        except InferenceBusyError as e:
+            # Not a failure: leave it queued and back off
+            self.store.requeue(job_id)
+            if job["batch_id"]:
+                self._remove_audio(job)
+            await asyncio.sleep(e.retry_after)
+            return
+        except asyncio.CancelledError:
+            # Shutdown: the job stays running and is requeued on next start
+            if job["batch_id"]:
+                self._remove_audio(job)
+            raise
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            self.store.fail(job_id, str(e))
+            self._remove_audio(job)
+            return
+
+        self.store.complete(job_id, response.model_dump(mode="json"))
+        persist_transcription(response, job["user_id"], job["source"], job["context"])
+        self._remove_audio(job)
+        logger.info(f"Job {job_id} completed")
+
+    def _purge_expired(self) -> None:
+        now = time.time()
+        if now - self._last_purge < 3600:
+            return
+        self._last_purge = now
+        for job in self.store.list_finished_before(now - self.retention_seconds):
+            self._remove_audio(job)
+            self.store.delete(job["id"])
+
+    @staticmethod
+    def _remove_audio(job: dict) -> None:
+        path = job["audio_path"]
+        if path and os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Could not remove job audio {path}: {e}")
+
+
+# Singleton instance
+_job_worker: Optional[JobWorker] = None
+
+def get_job_worker() -> JobWorker:
+    """Get or create job worker instance."""
+    global _job_worker
+    if _job_worker is None:
+        from ..config import settings
+        _job_worker = JobWorker(
+            get_job_store(),
+            concurrency=settings.JOB_WORKERS,
+            retention_seconds=settings.JOB_RETENTION_HOURS * 3600
+        )
+    return _job_worker
@@ -0,0 +1,133 @@
+"""Language identification ahead of decoding.
+
+Requests without a ``language`` resolve one in two steps:
+
+1. :class:`LanguageMemory` returns the language last detected for the same
+   ejecutivo or user, so repeat callers skip detection entirely.
+2. Otherwise :func:`identify_language` runs Whisper's language head on the
+   leading ``LANGUAGE_ID_WINDOW_SECONDS`` of the audio, on the inference
+   worker, and decoding is started with that language. Detections below
+   ``LANGUAGE_ID_MIN_PROBABILITY`` (silence, music on hold) are discarded and
+   Whisper auto-detects as before.
+
+Only languages that were actually detected are remembered: a request decoded
+with a remembered language does not refresh it, so a caller who switches
+language is detected again once the entry expires.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .audio_decoder import SAMPLE_RATE
+from .metrics import stage_timer
+
+logger = logging.getLogger(__name__)
+
+
+def memory_keys(user_id: Optional[str], context: Optional[Dict] = None) -> List[str]:
+    """Memory keys for a request, most specific first (ejecutivo, then user)."""
+    keys = []
+    if context and context.get("ejecutivo_id"):
+        keys.append(f"ejecutivo:{context['ejecutivo_id']}")
+    if user_id:
+        keys.append(f"user:{user_id}")
+    return keys
+
+
+class LanguageMemory:
+    """LRU map of key -> last detected language, with entries expiring after a TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        """Initialize language memory.
+
+        Args:
+            max_entries: Keys kept before the least recently used is evicted
+            ttl_seconds: Age after which a remembered language is detected again
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # key -> (language, remembered at), least recently used first
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, keys: List[str]) -> Optional[str]:
+        """Return the remembered language of the first key that has a live entry."""
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                language, remembered_at = entry
+                if now - remembered_at > self.ttl_seconds:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return language
+            if keys:
+                self.misses += 1
+            return None
+
+    def put(self, keys: List[str], language: str) -> None:
+        """Remember ``language`` under every key of a request."""
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                self._entries[key] = (language, now)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def identify_language(engine, audio: np.ndarray) -> Optional[str]:
+    """Detect the language of the leading window of ``audio`` (blocking).
+
+    Args:
+        engine: Whisper engine (see :mod:`app.services.whisper_engines`)
+        audio: Decoded 16 kHz mono float32 audio
+
+    Returns:
+        Language code, or None when disabled or not confident enough
+    """
+    from ..config import settings
+    if settings.LANGUAGE_ID_WINDOW_SECONDS <= 0:
+        return None
+
+    window = audio[:int(settings.LANGUAGE_ID_WINDOW_SECONDS * SAMPLE_RATE)]
+    with stage_timer("language_id"):
+        language, probability = engine.detect_language(window)
+    if probability < settings.LANGUAGE_ID_MIN_PROBABILITY:
+        logger.info(f"Language ID unsure ({language} p={probability:.2f}), auto-detecting while decoding")
+        return None
+    logger.info(f"Language ID: {language} (p={probability:.2f})")
+    return language
+
+
+# Singleton instance
+_language_memory: Optional[LanguageMemory] = None
+
+def get_language_memory() -> Optional[LanguageMemory]:
+    """Get or create the language memory (None when LANGUAGE_MEMORY_SIZE is 0)."""
+    global _language_memory
+    from ..config import settings
+    if settings.LANGUAGE_MEMORY_SIZE <= 0:
+        return None
+    if _language_memory is None:
+        _language_memory = LanguageMemory(settings.LANGUAGE_MEMORY_SIZE, settings.LANGUAGE_MEMORY_TTL_SECONDS)
+    return _language_memory
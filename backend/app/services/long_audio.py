@@ -0,0 +1,279 @@
+"""Chunked, parallel transcription of long recordings.
+
+Long audio is split at low-energy (silence) points into chunks of bounded
+length, the chunks are transcribed concurrently in worker processes that
+each hold their own Whisper model, and the results are stitched back with
+corrected timestamps.
+"""
+import logging
+import multiprocessing
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .audio_decoder import SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+FRAME_SECONDS = 0.03
+# Maximum number of repeated words removed at a chunk edge
+MAX_EDGE_OVERLAP_WORDS = 8
+
+
+def find_split_points(
+    audio: np.ndarray,
+    max_chunk_seconds: float,
+    min_silence_seconds: float = 0.3,
+    sample_rate: int = SAMPLE_RATE
+) -> List[int]:
+    """Return sample offsets where ``audio`` should be cut.
+
+    Each cut is placed at the quietest point (frame energy smoothed over
+    ``min_silence_seconds``) in the second half of the allowed window, so
+    chunks never exceed ``max_chunk_seconds`` and rarely split a word.
+
+    Returns:
+        Sorted sample offsets, excluding 0 and ``len(audio)``
+    """
+    frame = int(FRAME_SECONDS * sample_rate)
+    n_frames = len(audio) // frame
+    max_frames = int(max_chunk_seconds / FRAME_SECONDS)
+    if n_frames <= max_frames:
+        return []
+
+    frames = audio[:n_frames * frame].reshape(n_frames, frame)
+    energy = np.sqrt(np.mean(frames ** 2, axis=1))
+    window = max(1, int(min_silence_seconds / FRAME_SECONDS))
+    smoothed = np.convolve(energy, np.ones(window) / window, mode="same")
+
+    cuts = []
+    start = 0
+    while n_frames - start > max_frames:
+        lo = start + max_frames // 2
+        hi = start + max_frames
+        cut = lo + int(np.argmin(smoothed[lo:hi]))
+        cuts.append(cut * frame)
+        start = cut
+    return cuts
+
+
+def split_audio(
+    audio: np.ndarray,
+    max_chunk_seconds: float,
+    sample_rate: int = SAMPLE_RATE
+) -> List[Tuple[float, np.ndarray]]:
+    """Split ``audio`` at silences into (offset_seconds, chunk) pairs."""
+    bounds = [0] + find_split_points(audio, max_chunk_seconds, sample_rate=sample_rate) + [len(audio)]
+    return [
+        (bounds[i] / sample_rate, audio[bounds[i]:bounds[i + 1]])
+        for i in range(len(bounds) - 1)
+    ]
+
+
+def _normalize_word(word: str) -> str:
+    return re.sub(r"[^\w]", "", word.lower())
+
+
+def _drop_repeated_prefix(previous_text: str, segments: List[Dict]) -> None:
+    """Remove words at the start of ``segments`` that repeat the end of ``previous_text``.
+
+    Whisper sometimes re-emits the last words of the previous chunk when a
+    cut lands close to speech.
+    """
+    if not segments or not previous_text:
+        return
+    prev_words = [_normalize_word(w) for w in previous_text.split()][-MAX_EDGE_OVERLAP_WORDS:]
+    first = segments[0]
+    next_words = first["text"].split()
+    normalized = [_normalize_word(w) for w in next_words]
+
+    for k in range(min(len(prev_words), len(normalized)), 0, -1):
+        if prev_words[-k:] == normalized[:k]:
+            first["text"] = " " + " ".join(next_words[k:]) if next_words[k:] else ""
+            if first.get("words"):
+                first["words"] = first["words"][k:]
+                if first["words"]:
+                    first["start"] = first["words"][0]["start"]
+            logger.debug(f"Removed {k} repeated words at chunk edge")
+            return
+
+
+def stitch_results(chunk_results: List[Tuple[float, Dict]]) -> Dict:
+    """Merge per-chunk Whisper results into one Whisper-style result.
+
+    Args:
+        chunk_results: (offset_seconds, whisper result) pairs in audio order
+
+    Returns:
+        dict with text, segments (absolute timestamps) and language
+    """
+    segments: List[Dict] = []
+    language = None
+    for offset, result in chunk_results:
+        language = language or result.get("language")
+        chunk_segments = [dict(s) for s in result.get("segments", [])]
+        for seg in chunk_segments:
+            seg["start"] += offset
+            seg["end"] += offset
+            if seg.get("words"):
+                seg["words"] = [
+                    dict(w, start=w["start"] + offset, end=w["end"] + offset) for w in seg["words"]
+                ]
+        if segments:
+            _drop_repeated_prefix(segments[-1]["text"], chunk_segments)
+        segments.extend(s for s in chunk_segments if s["text"].strip())
+
+    for i, seg in enumerate(segments):
+        seg["id"] = i
+
+    return {
+        "text": "".join(s["text"] for s in segments),
+        "segments": segments,
+        "language": language,
+    }
+
+
+# Worker-process state: one model per process, loaded once by the initializer
+_worker_model = None
+
+
+def _init_worker(model_name: str, threads: int, backend: str, compute_type: str) -> None:
+    global _worker_model
+    import torch
+    from .whisper_engines import load_engine
+    torch.set_num_threads(threads)
+    _worker_model = load_engine(model_name, backend, compute_type, cpu_threads=threads)
+
+
+def _transcribe_chunk(chunk: np.ndarray, language: Optional[str], word_timestamps: bool) -> Dict:
+    result = _worker_model.transcribe(
+        chunk,
+        language=language,
+        word_timestamps=word_timestamps
+    )
+    return {
+        "text": result["text"],
+        "segments": result.get("segments", []),
+        "language": result.get("language"),
+    }
+
+
+class LongAudioTranscriber:
+    """Transcribes long audio by fanning chunks out to a process pool."""
+
+    def __init__(
+        self,
+        model_name: str,
+        workers: int,
+        threads_per_worker: int,
+        chunk_seconds: float,
+        backend: str = "openai-whisper",
+        compute_type: str = "int8"
+    ):
+        """Initialize long audio transcriber.
+
+        Args:
+            model_name: Whisper model loaded in each worker process
+            workers: Number of worker processes
+            threads_per_worker: Torch intra-op threads per worker
+            chunk_seconds: Maximum chunk length
+            backend: Whisper engine used by the workers
+            compute_type: Quantization for faster-whisper workers
+        """
+        self.model_name = model_name
+        self.workers = workers
+        self.chunk_seconds = chunk_seconds
+        # spawn: forking a process that already runs torch thread pools can deadlock
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name, threads_per_worker, backend, compute_type),
+        )
+
+    def transcribe(
+        self,
+        audio: np.ndarray,
+        language: Optional[str] = None,
+        word_timestamps: bool = False
+    ) -> Dict:
+        """Transcribe ``audio`` chunk-parallel and return a Whisper-style result.
+
+        When ``language`` is None the first chunk is transcribed alone and its
+        detected language is reused for the rest, so every chunk decodes in
+        the same language.
+        """
+        chunks = split_audio(audio, self.chunk_seconds)
+        logger.info(f"Long audio: {len(audio) / SAMPLE_RATE:.0f}s split into {len(chunks)} chunks "
+                    f"across {self.workers} workers")
+
+        results: List[Tuple[float, Dict]] = []
+        if language is None:
+            offset, first = chunks[0]
+            first_result = self._pool.submit(_transcribe_chunk, first, None, word_timestamps).result()
+            language = first_result.get("language")
+            results.append((offset, first_result))
+            chunks = chunks[1:]
+
+        futures = [
+            (offset, self._pool.submit(_transcribe_chunk, chunk, language, word_timestamps))
+            for offset, chunk in chunks
+        ]
+        results.extend((offset, future.result()) for offset, future in futures)
+        return stitch_results(results)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Singleton instance
+_long_audio_transcriber: Optional[LongAudioTranscriber] = None
+_long_audio_lock = threading.Lock()
+
+def get_long_audio_transcriber() -> Optional[LongAudioTranscriber]:
+    """Get or create long audio transcriber (None when LONG_AUDIO_WORKERS is 0).
+
+    Chunks are transcribed while the calling inference worker waits for
+    them, so the chunk processes get that worker's thread budget from the
+    CPU layout instead of the whole machine: at most one process per
+    thread of the smallest worker slot, sharing its threads.
+    """
+    global _long_audio_transcriber
+    from ..config import settings
+    if settings.LONG_AUDIO_WORKERS <= 0:
+        return None
+    with _long_audio_lock:
+        if _long_audio_transcriber is None:
+            from .inference_executor import get_inference_executor
+            budget = min(slot.threads for slot in get_inference_executor().layout.slots)
+            workers = max(1, min(settings.LONG_AUDIO_WORKERS, budget))
+            _long_audio_transcriber = LongAudioTranscriber(
+                model_name=settings.WHISPER_MODEL,
+                workers=workers,
+                threads_per_worker=max(1, budget // workers),
+                chunk_seconds=settings.LONG_AUDIO_CHUNK_SECONDS,
+                backend=settings.WHISPER_BACKEND,
+                compute_type=settings.WHISPER_COMPUTE_TYPE,
+            )
+        return _long_audio_transcriber
+
+
+def shutdown_long_audio_transcriber() -> None:
+    """Stop the long-audio worker processes, if they were started."""
+    global _long_audio_transcriber
+    with _long_audio_lock:
+        if _long_audio_transcriber is not None:
+            _long_audio_transcriber.shutdown()
+            _long_audio_transcriber = None
+
+
+def should_use_long_audio(audio: np.ndarray) -> bool:
+    """Return True when ``audio`` is long enough for chunked transcription."""
+    from ..config import settings
+    return (
+        settings.LONG_AUDIO_WORKERS > 0
+        and len(audio) / SAMPLE_RATE >= settings.LONG_AUDIO_THRESHOLD_SECONDS
+    )
@@ -0,0 +1,114 @@
+"""Prometheus metrics and per-request stage timings.
+
+Pipeline code wraps each stage in :func:`stage_timer`. Every stage feeds the
+``stt_stage_duration_seconds`` histogram and, once a request called
+:func:`collect_timings`, that request's timing dict, which is returned in
+the optional ``debug`` field of ``TranscriptionResponse``.
+
+The collector lives in a context variable. ``InferenceExecutor`` runs work
+in a copy of the caller's context, so stages timed on inference threads are
+attributed to the right request.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# Pipeline stages, in order
+# (diarize_transcribe is the wall time of diarize and transcribe running in parallel)
+STAGES = ("upload", "decode", "queue", "language_id", "diarize", "transcribe", "diarize_transcribe", "align", "db_save")
+
+STAGE_SECONDS = Histogram(
+    "stt_stage_duration_seconds",
+    "Time spent in each pipeline stage",
+    ["stage"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+REAL_TIME_FACTOR = Histogram(
+    "stt_real_time_factor",
+    "Processing time divided by audio duration (lower is faster)",
+    ["model", "mode"],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 3, 5),
+)
+AUDIO_SECONDS = Counter(
+    "stt_audio_seconds_total",
+    "Seconds of audio transcribed (cache hits excluded)",
+    ["model", "mode"],
+)
+CACHE_HITS = Counter("stt_result_cache_hits_total", "Transcriptions served from the result cache")
+
+INFERENCE_RUNNING = Gauge("stt_inference_running", "Inference calls currently running")
+INFERENCE_QUEUED = Gauge("stt_inference_queued", "Inference calls waiting for a worker")
+INFERENCE_REJECTED = Gauge("stt_inference_rejected", "Inference calls rejected since start (saturation)")
+JOBS = Gauge("stt_jobs", "Asynchronous jobs by status", ["status"])
+MODEL_MEMORY_BYTES = Gauge(
+    "stt_model_memory_bytes",
+    "Memory held by each loaded model",
+    ["model", "kind"],
+)
+
+_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("stage_timings", default=None)
+
+
+def collect_timings() -> Dict[str, float]:
+    """Start collecting stage timings for the current request.
+
+    Every asyncio task runs in its own context, so the collector is scoped to
+    the calling request and the stages it awaits.
+
+    Returns:
+        Dict filled with stage -> seconds as stages complete
+    """
+    timings: Dict[str, float] = {}
+    _timings.set(timings)
+    return timings
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Record an already measured stage duration."""
+    STAGE_SECONDS.labels(stage=stage).observe(seconds)
+    timings = _timings.get()
+    if timings is not None:
+        timings[stage] = round(timings.get(stage, 0.0) + seconds, 4)
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Time a pipeline stage (histogram plus the current request's timings)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+def observe_transcription(model: str, mode: str, audio_seconds: float, processing_seconds: float) -> None:
+    """Record real-time factor and audio volume of a finished transcription."""
+    AUDIO_SECONDS.labels(model=model, mode=mode).inc(audio_seconds)
+    if audio_seconds > 0:
+        REAL_TIME_FACTOR.labels(model=model, mode=mode).observe(processing_seconds / audio_seconds)
+
+
+def render_metrics() -> tuple:
+    """Refresh point-in-time gauges and return (payload, content type)."""
+    from .inference_executor import get_inference_executor
+    from .job_store import JOB_DONE, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, get_job_store
+    from .model_registry import get_model_registry
+
+    inference = get_inference_executor().stats()
+    INFERENCE_RUNNING.set(inference["running"])
+    INFERENCE_QUEUED.set(inference["queued"])
+    INFERENCE_REJECTED.set(inference["rejected"])
+
+    counts = get_job_store().counts()
+    for status in (JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_FAILED):
+        JOBS.labels(status=status).set(counts.get(status, 0))
+
+    for key, entry in get_model_registry().stats()["models"].items():
+        MODEL_MEMORY_BYTES.labels(model=key, kind="rss_delta").set(entry["rss_delta_mb"] * 1024 * 1024)
+        if entry["parameter_mb"] is not None:
+            MODEL_MEMORY_BYTES.labels(model=key, kind="parameters").set(entry["parameter_mb"] * 1024 * 1024)
+
+    return generate_latest(), CONTENT_TYPE_LATEST
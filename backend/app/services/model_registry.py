@@ -0,0 +1,181 @@
+"""Process-wide registry for heavy ML models (Whisper, pyannote)."""
+import logging
+import os
+import resource
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _current_rss_bytes() -> int:
+    """Return the resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # macOS reports ru_maxrss in bytes, Linux in KiB; this is only a fallback
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def process_memory(pid: str = "self") -> Optional[Dict[str, float]]:
+    """Return RSS, PSS, shared and private memory of a process in MB (Linux only).
+
+    PSS charges each shared page to the processes mapping it in equal parts,
+    so summing it over pre-forked workers gives their real footprint; the
+    private figure is what one more worker costs.
+    """
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1])
+    except OSError:
+        return None
+    if "Rss" not in fields:
+        return None
+    return {
+        "rss_mb": round(fields["Rss"] / 1024, 1),
+        "pss_mb": round(fields.get("Pss", 0) / 1024, 1),
+        "shared_mb": round((fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)) / 1024, 1),
+        "private_mb": round((fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)) / 1024, 1),
+    }
+
+
+def _parameter_bytes(model: Any) -> Optional[int]:
+    """Return the size of a torch model's parameters and buffers, if available."""
+    if not hasattr(model, "parameters"):
+        return None
+    try:
+        total = sum(p.numel() * p.element_size() for p in model.parameters())
+        if hasattr(model, "buffers"):
+            total += sum(b.numel() * b.element_size() for b in model.buffers())
+        return total
+    except Exception:
+        return None
+
+
+class ModelEntry:
+    """A loaded model together with its load statistics."""
+
+    def __init__(self, key: str, model: Any, load_seconds: float, rss_delta_bytes: int):
+        self.key = key
+        self.model = model
+        self.load_seconds = load_seconds
+        self.rss_delta_bytes = rss_delta_bytes
+        self.parameter_bytes = _parameter_bytes(model)
+        self.loaded_at = time.time()
+        self.hits = 0
+
+    def stats(self) -> dict:
+        return {
+            "load_seconds": round(self.load_seconds, 3),
+            "rss_delta_mb": round(self.rss_delta_bytes / (1024 * 1024), 1),
+            "parameter_mb": (
+                round(self.parameter_bytes / (1024 * 1024), 1)
+                if self.parameter_bytes is not None else None
+            ),
+            "loaded_at": self.loaded_at,
+            "hits": self.hits,
+        }
+
+
+class ModelRegistry:
+    """Loads each model once per process and keeps it warm.
+
+    Models are identified by a string key (e.g. ``whisper:base``). The first
+    caller for a key runs the loader; concurrent callers for the same key wait
+    for that load instead of starting their own.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, ModelEntry] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._registry_lock = threading.Lock()
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._registry_lock:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Return the model for ``key``, loading it with ``loader`` on first use.
+
+        Args:
+            key: Unique model identifier
+            loader: Zero-argument callable that returns the loaded model
+
+        Returns:
+            The loaded model instance
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.hits += 1
+            return entry.model
+
+        with self._lock_for(key):
+            entry = self._entries.get(key)
+            if entry is None:
+                logger.info(f"Model registry: loading {key}")
+                rss_before = _current_rss_bytes()
+                started = time.perf_counter()
+                model = loader()
+                elapsed = time.perf_counter() - started
+                entry = ModelEntry(key, model, elapsed, max(0, _current_rss_bytes() - rss_before))
+                self._entries[key] = entry
+                logger.info(f"Model registry: {key} loaded in {elapsed:.2f}s")
+            entry.hits += 1
+            return entry.model
+
+    def is_loaded(self, key: str) -> bool:
+        return key in self._entries
+
+    def unload(self, key: str) -> None:
+        """Drop a model from the registry so it can be garbage collected."""
+        with self._lock_for(key):
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        """Return load time and memory statistics for every loaded model."""
+        return {
+            "process_rss_mb": round(_current_rss_bytes() / (1024 * 1024), 1),
+            "process_memory": process_memory(),
+            "models": {key: entry.stats() for key, entry in self._entries.items()},
+        }
+
+
+# Singleton instance
+_model_registry: Optional[ModelRegistry] = None
+
+def get_model_registry() -> ModelRegistry:
+    """Get or create model registry instance."""
+    global _model_registry
+    if _model_registry is None:
+        _model_registry = ModelRegistry()
+    return _model_registry
+
+
+def preload_models() -> None:
+    """Load the configured models into the registry.
+
+    Called at FastAPI startup so the first request does not pay for model load.
+    """
+    from ..config import settings
+    from .whisper_service import get_whisper_service
+    from .model_selector import get_model_selector
+
+    for model_name in get_model_selector().models:
+        get_whisper_service(model_name)
+
+    if settings.HF_TOKEN:
+        from .diarization_service import get_diarization_service
+        try:
+            get_diarization_service(settings.HF_TOKEN)
+        except Exception as e:
+            # Diarization is optional; simple mode must keep working
+            logger.error(f"Could not preload diarization pipeline: {e}")
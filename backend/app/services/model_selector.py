@@ -0,0 +1,127 @@
+"""Per-request choice between several loaded Whisper sizes.
+
+WHISPER_MODEL is the model a request gets on an idle server. With more
+sizes listed in WHISPER_MODELS, each request is routed by:
+
+- load: every ``degrade_queue`` calls waiting for an inference worker move
+  the request one size down, so peaks cost accuracy instead of timeouts;
+- duration: recordings of at least ``long_audio_seconds`` go one size down,
+  clips of at most ``short_audio_seconds`` one size up while nothing waits;
+- language: only English may drop below ``min_multilingual`` (the small
+  sizes are much weaker on other languages and on language detection).
+"""
+import logging
+from collections import Counter
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Whisper sizes from fastest to most accurate
+MODEL_SIZES = ("tiny", "base", "small", "medium", "large")
+
+
+def model_rank(model_name: str) -> int:
+    """Position of a model in MODEL_SIZES ('small.en' ranks as 'small', 'large-v3' as 'large')."""
+    base = model_name.split(".")[0].split("-")[0]
+    return MODEL_SIZES.index(base) if base in MODEL_SIZES else len(MODEL_SIZES)
+
+
+def parse_models(value: str) -> List[str]:
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+class ModelSelector:
+    """Chooses the Whisper model for a request from the configured sizes."""
+
+    def __init__(
+        self,
+        default_model: str,
+        models: List[str],
+        degrade_queue: int = 2,
+        long_audio_seconds: float = 600,
+        short_audio_seconds: float = 30,
+        min_multilingual: str = "base"
+    ):
+        """Initialize model selector.
+
+        Args:
+            default_model: Model used on an idle server
+            models: All sizes kept loaded (the default is added if missing)
+            degrade_queue: Waiting inference calls per step down (0 = never degrade)
+            long_audio_seconds: Recordings at least this long use one size smaller
+            short_audio_seconds: Clips at most this long use one size larger when idle
+            min_multilingual: Smallest model for requests not in English
+        """
+        self.default_model = default_model
+        self.models = sorted(set(models) | {default_model}, key=model_rank)
+        self.degrade_queue = degrade_queue
+        self.long_audio_seconds = long_audio_seconds
+        self.short_audio_seconds = short_audio_seconds
+        self.min_multilingual = min_multilingual
+        self.chosen = Counter()
+
+    @property
+    def adaptive(self) -> bool:
+        return len(self.models) > 1
+
+    def select(self, audio_seconds: float, language: Optional[str], queued: int) -> Tuple[str, str]:
+        """Return (model name, reason) for a request.
+
+        Args:
+            audio_seconds: Duration of the request's audio
+            language: Requested language code, None for auto-detect
+            queued: Inference calls currently waiting for a worker
+        """
+        if not self.adaptive:
+            return self.default_model, "default"
+
+        index = self.models.index(self.default_model)
+        reasons = []
+        if self.degrade_queue > 0 and queued >= self.degrade_queue:
+            index -= queued // self.degrade_queue
+            reasons.append(f"queue={queued}")
+        if audio_seconds >= self.long_audio_seconds:
+            index -= 1
+            reasons.append("long audio")
+        elif audio_seconds <= self.short_audio_seconds and queued == 0:
+            index += 1
+            reasons.append("short clip")
+
+        lowest = 0
+        if language != "en":
+            # Smallest loaded model that is at least min_multilingual
+            floor = model_rank(self.min_multilingual)
+            lowest = next((i for i, m in enumerate(self.models) if model_rank(m) >= floor), len(self.models) - 1)
+            if index < lowest:
+                reasons.append(f"language={language or 'auto'}")
+        index = max(lowest, min(index, len(self.models) - 1))
+
+        model = self.models[index]
+        self.chosen[model] += 1
+        return model, ", ".join(reasons) or "default"
+
+    def stats(self) -> dict:
+        return {
+            "models": self.models,
+            "default": self.default_model,
+            "chosen": dict(self.chosen),
+        }
+
+
+# Singleton instance
+_model_selector: Optional[ModelSelector] = None
+
+def get_model_selector() -> ModelSelector:
+    """Get or create model selector instance."""
+    global _model_selector
+    if _model_selector is None:
+        from ..config import settings
+        _model_selector = ModelSelector(
+            settings.WHISPER_MODEL,
+            parse_models(settings.WHISPER_MODELS),
+            degrade_queue=settings.MODEL_DEGRADE_QUEUE,
+            long_audio_seconds=settings.MODEL_LONG_AUDIO_SECONDS,
+            short_audio_seconds=settings.MODEL_SHORT_AUDIO_SECONDS,
+            min_multilingual=settings.MODEL_MIN_MULTILINGUAL
+        )
+    return _model_selector
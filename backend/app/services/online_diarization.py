@@ -0,0 +1,188 @@
+"""Incremental speaker diarization for live audio streams.
+
+Offline diarization (``DiarizationService``) clusters a whole recording at
+once, so its cost grows with the recording. For live calls each new window
+is embedded once and compared against per-session speaker centroids, which
+keeps the work per window constant however long the call runs.
+"""
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .audio_decoder import SAMPLE_RATE, to_pyannote_input
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "pyannote/wespeaker-voxceleb-resnet34-LM"
+
+Embedder = Callable[[np.ndarray], np.ndarray]
+
+
+def load_embedding_model(hf_token: str):
+    """Load the pyannote speaker-embedding model as a whole-window inference."""
+    from pyannote.audio import Inference, Model
+
+    # Newer versions (>= 3.2) use 'token', older versions use 'use_auth_token'
+    try:
+        model = Model.from_pretrained(EMBEDDING_MODEL, token=hf_token)
+    except TypeError:
+        model = Model.from_pretrained(EMBEDDING_MODEL, use_auth_token=hf_token)
+    return Inference(model, window="whole")
+
+
+def get_embedder(hf_token: str) -> Embedder:
+    """Return a function mapping 16 kHz float32 audio to one speaker embedding.
+
+    The underlying model is shared through the model registry.
+    """
+    from .model_registry import get_model_registry
+    inference = get_model_registry().get(
+        f"pyannote:{EMBEDDING_MODEL}",
+        lambda: load_embedding_model(hf_token)
+    )
+
+    def embed(audio: np.ndarray) -> np.ndarray:
+        return np.asarray(inference(to_pyannote_input(audio)), dtype=np.float32).reshape(-1)
+
+    return embed
+
+
+class OnlineDiarizer:
+    """Assigns speaker labels to a stream window by window.
+
+    Every ``window_seconds`` of audio is embedded and matched by cosine
+    similarity against the running centroid of each speaker seen so far.
+    A match at or above ``threshold`` updates that centroid; otherwise a new
+    speaker is opened (up to ``max_speakers``). Quiet windows are skipped.
+    Turns already consumed by the caller can be released with :meth:`prune`,
+    so memory also stays bounded.
+
+    :meth:`append` is called from the event loop while :meth:`update` runs
+    on an inference worker, so the pending audio is guarded by a lock.
+    """
+
+    def __init__(
+        self,
+        embed: Embedder,
+        window_seconds: float = 1.5,
+        threshold: float = 0.5,
+        max_speakers: int = 4,
+        min_rms: float = 0.01
+    ):
+        """Initialize online diarizer.
+
+        Args:
+            embed: Function returning a speaker embedding for an audio window
+            window_seconds: Audio per embedding (shorter reacts faster, longer is more reliable)
+            threshold: Minimum cosine similarity to join an existing speaker
+            max_speakers: Speakers opened at most; later windows join the closest one
+            min_rms: Windows quieter than this are treated as silence
+        """
+        self.embed = embed
+        self.window = int(window_seconds * SAMPLE_RATE)
+        self.threshold = threshold
+        self.max_speakers = max_speakers
+        self.min_rms = min_rms
+        self._pending = np.zeros(0, np.float32)
+        self._position = 0  # Stream position (samples) of _pending[0]
+        self._pending_lock = threading.Lock()
+        self._centroids: Optional[np.ndarray] = None  # (speakers, dim), unit norm
+        self._counts: List[int] = []
+        self.turns: List[Dict] = []
+
+    @property
+    def speakers(self) -> List[str]:
+        """Speaker labels in order of first appearance."""
+        return [f"SPEAKER_{i:02d}" for i in range(len(self._counts))]
+
+    @property
+    def embeddings(self) -> Dict[str, np.ndarray]:
+        """Current centroid of each speaker."""
+        if self._centroids is None:
+            return {}
+        return dict(zip(self.speakers, self._centroids))
+
+    def append(self, samples: np.ndarray) -> None:
+        with self._pending_lock:
+            self._pending = np.concatenate([self._pending, samples])
+
+    def update(self, flush: bool = False) -> List[Dict]:
+        """Label every complete pending window (blocking).
+
+        Args:
+            flush: Also label a trailing partial window of at least half the window length
+
+        Returns:
+            Turns added or extended by this call, with absolute times
+        """
+        changed: List[Dict] = []
+        while True:
+            chunk, position = self._take_window(flush)
+            if chunk is None:
+                break
+            start = position / SAMPLE_RATE
+            end = (position + len(chunk)) / SAMPLE_RATE
+
+            speaker = self._label(chunk)
+            if speaker is None:
+                continue
+            last = self.turns[-1] if self.turns else None
+            if last and last["speaker"] == speaker and last["end"] == start:
+                last["end"] = end
+            else:
+                last = {"speaker": speaker, "start": start, "end": end}
+                self.turns.append(last)
+            if not changed or changed[-1] is not last:
+                changed.append(last)
+        return changed
+
+    def _take_window(self, flush: bool) -> Tuple[Optional[np.ndarray], int]:
+        """Remove the next window from the pending audio; returns it and its stream position."""
+        with self._pending_lock:
+            if len(self._pending) < self.window and not (flush and len(self._pending) >= self.window // 2):
+                return None, self._position
+            chunk = self._pending[:self.window]
+            position = self._position
+            self._pending = self._pending[len(chunk):]
+            self._position += len(chunk)
+        return chunk, position
+
+    def prune(self, before: float) -> None:
+        """Forget turns that end before ``before`` seconds."""
+        keep = 0
+        while keep < len(self.turns) and self.turns[keep]["end"] < before:
+            keep += 1
+        del self.turns[:keep]
+
+    def _label(self, chunk: np.ndarray) -> Optional[str]:
+        if float(np.sqrt(np.mean(chunk ** 2))) < self.min_rms:
+            return None
+
+        embedding = self.embed(chunk)
+        norm = np.linalg.norm(embedding)
+        if not norm or not np.isfinite(norm):
+            return None
+        embedding = embedding / norm
+
+        if self._centroids is None:
+            self._centroids = embedding[np.newaxis, :]
+            self._counts = [1]
+            return self.speakers[0]
+
+        similarities = self._centroids @ embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold and len(self._counts) < self.max_speakers:
+            self._centroids = np.vstack([self._centroids, embedding])
+            self._counts.append(1)
+            logger.info(f"Online diarization opened SPEAKER_{len(self._counts) - 1:02d} "
+                        f"(best similarity {similarities[best]:.2f})")
+            return self.speakers[-1]
+
+        # Running mean of unit embeddings, re-normalized
+        count = self._counts[best]
+        centroid = self._centroids[best] * count + embedding
+        self._centroids[best] = centroid / np.linalg.norm(centroid)
+        self._counts[best] = count + 1
+        return self.speakers[best]
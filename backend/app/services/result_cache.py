@@ -0,0 +1,202 @@
+"""Content-addressed cache of transcription results."""
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path: str) -> str:
+    """Return the sha256 hex digest of a file's contents."""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def hash_pcm(audio: np.ndarray) -> str:
+    """Return a digest for decoded audio (distinct namespace from file hashes)."""
+    return "pcm:" + hashlib.sha256(np.ascontiguousarray(audio).tobytes()).hexdigest()
+
+
+class ResultCache:
+    """Two-tier LRU cache for transcription results.
+
+    Results are keyed by audio content hash plus everything that changes the
+    output (model, mode, language, diarization context). The disk tier keeps
+    one JSON file per key and evicts least recently used files once the
+    directory exceeds ``max_disk_bytes``; the optional memory tier keeps the
+    most recent ``memory_entries`` results decoded.
+    """
+
+    def __init__(self, cache_dir: str, max_disk_bytes: int, memory_entries: int = 0):
+        """Initialize result cache.
+
+        Args:
+            cache_dir: Directory for the on-disk tier
+            max_disk_bytes: Size budget for the on-disk tier
+            memory_entries: Number of results kept in memory (0 disables the tier)
+        """
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        # key -> file size, ordered from least to most recently used
+        self._disk_index: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self) -> None:
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, name[:-5], st.st_size))
+        for _, key, size in sorted(entries):
+            self._disk_index[key] = size
+            self._disk_bytes += size
+        logger.info(f"Result cache: {len(self._disk_index)} entries on disk ({self._disk_bytes} bytes)")
+
+    @staticmethod
+    def make_key(
+        audio_sha256: str,
+        model: str,
+        mode: str,
+        language: Optional[str],
+        context: Optional[Dict] = None
+    ) -> str:
+        """Build the cache key for one transcription request."""
+        material = json.dumps(
+            [audio_sha256, model, mode, language or "auto", context or {}],
+            sort_keys=True
+        )
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached result for ``key``, or None."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                if key in self._disk_index:
+                    self._disk_index.move_to_end(key)
+                self.hits_memory += 1
+                return self._memory[key]
+
+            if key not in self._disk_index:
+                self.misses += 1
+                return None
+
+            path = self._path(key)
+            try:
+                with open(path) as f:
+                    value = json.load(f)
+                os.utime(path)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Dropping unreadable cache entry {key}: {e}")
+                self._drop_disk(key)
+                self.misses += 1
+                return None
+
+            self._disk_index.move_to_end(key)
+            self._remember(key, value)
+            self.hits_disk += 1
+            return value
+
+    def put(self, key: str, value: Dict) -> None:
+        """Store a JSON-serializable result under ``key``."""
+        data = json.dumps(value, default=str)
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        with self._lock:
+            try:
+                with open(tmp_path, "w") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning(f"Could not write cache entry {key}: {e}")
+                return
+
+            if key in self._disk_index:
+                self._disk_bytes -= self._disk_index.pop(key)
+            self._disk_index[key] = len(data)
+            self._disk_bytes += len(data)
+            self._remember(key, value)
+            self._evict()
+
+    def _remember(self, key: str, value: Dict) -> None:
+        if self.memory_entries <= 0:
+            return
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self) -> None:
+        while self._disk_bytes > self.max_disk_bytes and self._disk_index:
+            key = next(iter(self._disk_index))
+            self._drop_disk(key)
+            self._memory.pop(key, None)
+
+    def _drop_disk(self, key: str) -> None:
+        size = self._disk_index.pop(key, 0)
+        self._disk_bytes -= size
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def stats(self) -> dict:
+        lookups = self.hits_memory + self.hits_disk + self.misses
+        return {
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "hit_rate": round((self.hits_memory + self.hits_disk) / lookups, 3) if lookups else None,
+            "entries_memory": len(self._memory),
+            "entries_disk": len(self._disk_index),
+            "disk_mb": round(self._disk_bytes / (1024 * 1024), 2),
+        }
+
+
+# Singleton instance
+_result_cache: Optional[ResultCache] = None
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Get or create result cache instance (None when disabled)."""
+    global _result_cache
+    from ..config import settings
+    if not settings.RESULT_CACHE_ENABLED:
+        return None
+    if _result_cache is None:
+        _result_cache = ResultCache(
+            settings.RESULT_CACHE_DIR,
+            max_disk_bytes=settings.RESULT_CACHE_MAX_MB * 1024 * 1024,
+            memory_entries=settings.RESULT_CACHE_MEMORY_ENTRIES,
+        )
+    return _result_cache
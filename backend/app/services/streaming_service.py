@@ -0,0 +1,210 @@
+"""Incremental transcription of live audio streams."""
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .alignment import align_segments
+from .audio_decoder import SAMPLE_RATE, pcm16_to_float32
+from .inference_executor import InferenceBusyError, InferenceExecutor
+from .online_diarization import OnlineDiarizer
+
+logger = logging.getLogger(__name__)
+
+# Text of finalized segments passed as prompt for continuity between windows
+PROMPT_CHARS = 200
+
+
+class StreamingSession:
+    """Rolling-buffer transcription state for one live stream.
+
+    Audio is appended as it arrives. Every ``step_seconds`` of new audio the
+    uncommitted buffer is re-transcribed and a ``partial`` event is emitted.
+    Once the buffer is longer than ``window_seconds``, all but the last Whisper
+    segment are committed as ``final`` and dropped from the buffer, so each
+    decode only covers a bounded window. The buffer never exceeds
+    ``max_buffer_seconds``: if inference cannot keep up, the oldest audio is
+    committed (or dropped when no decode is possible) to bound memory.
+
+    With an :class:`OnlineDiarizer`, committed segments also carry ``speaker``
+    and ``role`` in the ``DiarizationSegment`` shape.
+    """
+
+    def __init__(
+        self,
+        engine,
+        executor: InferenceExecutor,
+        language: Optional[str] = None,
+        step_seconds: float = 1.0,
+        window_seconds: float = 15.0,
+        max_buffer_seconds: float = 30.0,
+        diarizer: Optional[OnlineDiarizer] = None,
+        context: Optional[Dict] = None
+    ):
+        """Initialize streaming session.
+
+        Args:
+            engine: Loaded Whisper engine (shared with the HTTP endpoints)
+            executor: Inference executor decodes run on
+            language: Language code, or None to detect on the first window
+            step_seconds: New audio required before re-transcribing
+            window_seconds: Buffer length at which segments are committed
+            max_buffer_seconds: Hard cap on buffered audio
+            diarizer: Optional online diarizer labelling committed segments
+            context: Optional context dict with cliente_id and/or ejecutivo_id for roles
+        """
+        self.engine = engine
+        self.executor = executor
+        self.language = language
+        self.step = int(step_seconds * SAMPLE_RATE)
+        self.window = int(window_seconds * SAMPLE_RATE)
+        self.max_buffer = int(max_buffer_seconds * SAMPLE_RATE)
+        self.diarizer = diarizer
+        self.context = context
+        self._buffer = np.zeros(0, np.float32)
+        self._buffer_start = 0  # Stream position (samples) of buffer[0]
+        self._since_decode = 0
+        self._leftover = b""
+        self._prompt = ""
+        self.finalized: List[Dict] = []
+
+    @property
+    def buffered_seconds(self) -> float:
+        return len(self._buffer) / SAMPLE_RATE
+
+    @property
+    def duration(self) -> float:
+        """Seconds of audio received so far."""
+        return (self._buffer_start + len(self._buffer)) / SAMPLE_RATE
+
+    def append_pcm16(self, data: bytes) -> None:
+        """Append raw 16 kHz mono little-endian 16-bit PCM."""
+        data = self._leftover + data
+        usable = len(data) - (len(data) % 2)
+        self._leftover = data[usable:]
+        self.append(pcm16_to_float32(data[:usable]))
+
+    def append(self, samples: np.ndarray) -> None:
+        """Append decoded 16 kHz mono float32 samples."""
+        self._buffer = np.concatenate([self._buffer, samples])
+        self._since_decode += len(samples)
+        if self.diarizer is not None:
+            self.diarizer.append(samples)
+
+    def ready(self) -> bool:
+        return self._since_decode >= self.step or len(self._buffer) >= self.max_buffer
+
+    async def process(self, final: bool = False) -> List[Dict]:
+        """Transcribe the buffer and return the events to send to the client."""
+        if len(self._buffer) == 0:
+            return []
+        self._since_decode = 0
+        # Audio appended while inference runs is not in this decode and must stay buffered
+        decoded = len(self._buffer)
+
+        try:
+            result = await self.executor.run(self._step_sync, self._buffer[:decoded].copy(), final)
+        except InferenceBusyError:
+            return self._shed_load()
+
+        if self.language is None:
+            self.language = result.get("language")
+
+        segments = [s for s in result.get("segments", []) if s["text"].strip()]
+        events: List[Dict] = []
+
+        if final:
+            commit = len(segments)
+        elif decoded >= self.window and len(segments) > 1:
+            commit = len(segments) - 1
+        elif decoded >= self.max_buffer:
+            commit = len(segments)
+        else:
+            commit = 0
+
+        offset = self._buffer_start / SAMPLE_RATE
+        pending = segments[commit:]
+        if pending and not final:
+            partial = {
+                "type": "partial",
+                "text": "".join(s["text"] for s in pending).strip(),
+                "start": round(offset + pending[0]["start"], 2),
+                "end": round((self._buffer_start + decoded) / SAMPLE_RATE, 2),
+            }
+        else:
+            partial = None
+
+        if commit:
+            committed = [self._absolute(s) for s in segments[:commit]]
+            if self.diarizer is not None:
+                committed = self._label_speakers(committed)
+            self.finalized.extend(committed)
+            self._prompt = (self._prompt + "".join(s["text"] for s in segments[:commit]))[-PROMPT_CHARS:]
+            events.append({"type": "final", "segments": committed})
+
+            cut = decoded if not pending else min(decoded, int(pending[0]["start"] * SAMPLE_RATE))
+            self._buffer = self._buffer[cut:]
+            self._buffer_start += cut
+
+        if partial:
+            events.append(partial)
+        return events
+
+    def _step_sync(self, audio: np.ndarray, final: bool) -> Dict:
+        if self.diarizer is not None:
+            # Embeds only the audio received since the last step
+            self.diarizer.update(flush=final)
+        return self.engine.transcribe(
+            audio,
+            language=self.language,
+            initial_prompt=self._prompt or None,
+            condition_on_previous_text=False
+        )
+
+    def _absolute(self, segment: Dict) -> Dict:
+        offset = self._buffer_start / SAMPLE_RATE
+        return {
+            "start": round(offset + segment["start"], 2),
+            "end": round(offset + segment["end"], 2),
+            "text": segment["text"].strip(),
+            "confidence": 1.0 - segment.get("no_speech_prob", 0.0),
+        }
+
+    def _label_speakers(self, segments: List[Dict]) -> List[Dict]:
+        """Attach speaker and role to committed segments (absolute times)."""
+        # Imported here: diarization_service loads the offline pyannote stack
+        from .diarization_service import _assign_roles_with_context
+        from ..models.transcription import DiarizationSegment
+
+        aligned = align_segments(
+            [dict(s, no_speech_prob=1.0 - s["confidence"]) for s in segments],
+            self.diarizer.turns,
+            word_level=False
+        )
+        # Roles are decided over all speakers seen in the session (first
+        # appearance order), so a speaker keeps its role across windows
+        roles = {
+            s["speaker"]: s["role"]
+            for s in _assign_roles_with_context(
+                [{"speaker": sp} for sp in self.diarizer.speakers],
+                self.context,
+                self.diarizer.embeddings
+            )
+        }
+        labelled = []
+        for seg in aligned:
+            seg["role"] = roles.get(seg["speaker"], "unknown")
+            labelled.append(DiarizationSegment(**seg).model_dump())
+
+        self.diarizer.prune(segments[-1]["end"])
+        return labelled
+
+    def _shed_load(self) -> List[Dict]:
+        if len(self._buffer) < self.max_buffer:
+            # Try again on the next step
+            return []
+        dropped = len(self._buffer) - self.max_buffer // 2
+        self._buffer = self._buffer[dropped:]
+        self._buffer_start += dropped
+        logger.warning(f"Streaming session overloaded, dropped {dropped / SAMPLE_RATE:.1f}s of audio")
+        return [{"type": "warning", "detail": f"Server busy, dropped {dropped / SAMPLE_RATE:.1f}s of audio"}]
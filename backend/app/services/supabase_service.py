@@ -1,131 +1,239 @@
-"""Supabase service for database operations."""
-from supabase import create_client, Client
+"""Supabase service for database and storage operations.
+
+Talks to PostgREST (``/rest/v1``) and Storage (``/storage/v1``) directly over
+one pooled ``httpx.AsyncClient``, so requests never block the event loop and
+connections are reused across inserts and downloads.
+"""
+import asyncio
 import logging
+import os
+import re
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+import aiofiles
+import httpx
+
+from .metrics import stage_timer
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_BUCKET = "audios"
+RANGE_CHUNK_BYTES = 4 * 1024 * 1024
+RANGE_RETRIES = 3
+
+_CONTENT_RANGE = re.compile(r"bytes \d+-\d+/(\d+)")
+
+
+class SupabaseError(Exception):
+    """Raised when Supabase answers with an error status."""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+    @property
+    def retryable(self) -> bool:
+        """Server-side and rate-limit errors are worth retrying, client errors are not."""
+        return self.status_code >= 500 or self.status_code in (408, 429)
+
+
+def split_storage_path(storage_path: str) -> Tuple[str, str]:
+    """Split 'bucket/path/to/file' into (bucket, path); bare names use the default bucket."""
+    parts = storage_path.lstrip("/").split("/", 1)
+    if len(parts) > 1:
+        return parts[0], parts[1]
+    return DEFAULT_BUCKET, storage_path
+
+
 class SupabaseService:
-    """Service for interacting with Supabase (database only)."""
-    
-    def __init__(self, url: str, key: str):
-        """Initialize Supabase client.
-        
+    """Service for interacting with Supabase."""
+
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        max_connections: int = 10,
+        timeout: float = 30.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        """Initialize the pooled HTTP client.
+
         Args:
             url: Supabase project URL
             key: Supabase service role key
+            max_connections: Connection pool size shared by all requests
+            timeout: Per-request timeout in seconds
+            transport: Custom transport (e.g. a local PostgREST stand-in)
         """
-        self.client: Client = create_client(url, key)
+        self.url = url.rstrip("/")
+        self.client = httpx.AsyncClient(
+            headers={"apikey": key, "Authorization": f"Bearer {key}"},
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            ),
+            timeout=timeout,
+            transport=transport
+        )
         logger.info("Supabase client initialized")
-    
-    async def save_transcription(
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    def storage_url(self, storage_path: str) -> str:
+        bucket, path = split_storage_path(storage_path)
+        return f"{self.url}/storage/v1/object/{bucket}/{path}"
+
+    def storage_path(self, audio_url: str) -> str:
+        """Return the 'bucket/path' of a storage path or an object URL of this project.
+
+        Raises:
+            ValueError: For URLs outside this project's Storage
+        """
+        if not audio_url.startswith(("http://", "https://")):
+            return audio_url.lstrip("/")
+        prefix = f"{self.url}/storage/v1/object/"
+        if not audio_url.startswith(prefix):
+            raise ValueError("audio_url must be a storage path or a Storage URL of this Supabase project")
+        path = audio_url[len(prefix):].split("?", 1)[0]
+        for access in ("public/", "authenticated/"):
+            if path.startswith(access):
+                return path[len(access):]
+        return path
+
+    async def iter_object(
         self,
-        user_id: str,
-        original_filename: str,
-        transcription: str,
-        language: str,
-        confidence: float,
-        duration: float
-    ) -> dict:
-        """Save transcription to database.
-        
+        storage_path: str,
+        chunk_size: int = RANGE_CHUNK_BYTES,
+        concurrency: int = 4
+    ) -> AsyncIterator[bytes]:
+        """Yield a Storage object in order, fetching byte ranges concurrently.
+
+        The first range reveals the object size; the remaining ranges are
+        requested ``concurrency`` at a time, so at most ``concurrency`` chunks
+        are held in memory. If the server ignores ``Range``, the body is
+        streamed in a single request instead.
+
         Args:
-            user_id: User ID
-            original_filename: Original audio filename
-            transcription: Transcribed text
-            language: Detected language
-            confidence: Confidence score
-            duration: Audio duration
-        
-        Returns:
-            Inserted record
+            storage_path: Path in Supabase Storage (e.g., 'audios/file.m4a')
+            chunk_size: Bytes per ranged request
+            concurrency: Ranged requests in flight
+
+        Raises:
+            SupabaseError: If Storage answers with an error status
+            httpx.TransportError: If a range still fails after retries
         """
+        url = self.storage_url(storage_path)
+        request = self.client.build_request("GET", url, headers={"Range": f"bytes=0-{chunk_size - 1}"})
+        response = await self.client.send(request, stream=True)
         try:
-            data = {
-                "user_id": user_id,
-                "original_filename": original_filename,
-                "transcription": transcription,
-                "language": language,
-                "confidence": confidence,
-                "duration_seconds": duration
-            }
-            
-            result = self.client.table("transcriptions").insert(data).execute()
-            logger.info(f"Transcription saved for user {user_id}")
-            
-            return result.data[0] if result.data else {}
-            
-        except Exception as e:
-            logger.error(f"Failed to save transcription: {e}")
-            raise
-
-# Singleton instance
-_supabase_service = None
+            if response.status_code == 416:
+                # Range not satisfiable: empty object
+                return
+            if response.status_code >= 400:
+                await response.aread()
+                raise SupabaseError(
+                    f"Download of {storage_path} failed ({response.status_code}): {response.text[:500]}",
+                    response.status_code
+                )
+            match = _CONTENT_RANGE.match(response.headers.get("content-range", ""))
+            if response.status_code != 206 or match is None:
+                async for chunk in response.aiter_bytes():
+                    yield chunk
+                return
+            total = int(match.group(1))
+            yield await response.aread()
+        finally:
+            await response.aclose()
 
-def get_supabase_service(url: str, key: str):
-    """Get or create Supabase service instance."""
-    global _supabase_service
-    if _supabase_service is None:
-        _supabase_service = SupabaseService(url, key)
-    return _supabase_service
+        pending: Deque[asyncio.Task] = deque()
+        try:
+            for start in range(chunk_size, total, chunk_size):
+                pending.append(asyncio.create_task(
+                    self._fetch_range(url, start, min(start + chunk_size, total) - 1)
+                ))
+                if len(pending) >= concurrency:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
 
-from supabase import create_client, Client
-import logging
-from typing import Optional
-import aiofiles
-import os
+    async def _fetch_range(self, url: str, start: int, end: int) -> bytes:
+        for attempt in range(RANGE_RETRIES):
+            try:
+                response = await self.client.get(url, headers={"Range": f"bytes={start}-{end}"})
+                if response.status_code == 206:
+                    return response.content
+                error = SupabaseError(
+                    f"Range {start}-{end} of {url} failed ({response.status_code}): {response.text[:200]}",
+                    response.status_code
+                )
+                if not error.retryable:
+                    raise error
+            except httpx.TransportError as e:
+                error = e
+            if attempt + 1 < RANGE_RETRIES:
+                await asyncio.sleep(0.5 * 2 ** attempt)
+        raise error
 
-logger = logging.getLogger(__name__)
+    async def insert_rows(self, table: str, rows: List[Dict]) -> None:
+        """Insert rows with a single PostgREST request.
 
-class SupabaseService:
-    """Service for interacting with Supabase."""
-    
-    def __init__(self, url: str, key: str):
-        """Initialize Supabase client.
-        
         Args:
-            url: Supabase project URL
-            key: Supabase service role key
+            table: Table name
+            rows: Rows to insert; dict/list values are stored as JSONB
+
+        Raises:
+            SupabaseError: If PostgREST rejects the insert
+            httpx.TransportError: On network failures
         """
-        self.client: Client = create_client(url, key)
-        logger.info("Supabase client initialized")
-    
+        response = await self.client.post(
+            f"{self.url}/rest/v1/{table}",
+            json=rows,
+            headers={"Prefer": "return=minimal"}
+        )
+        if response.status_code >= 400:
+            raise SupabaseError(
+                f"Insert into {table} failed ({response.status_code}): {response.text[:500]}",
+                response.status_code
+            )
+
     async def download_audio(
         self,
         storage_path: str,
         local_path: str
     ) -> str:
         """Download audio file from Supabase Storage.
-        
+
+        Byte ranges are fetched concurrently and written to disk in order, so
+        large recordings are never held in memory.
+
         Args:
             storage_path: Path in Supabase Storage (e.g., 'audios/file.m4a')
             local_path: Local path to save file
-        
+
         Returns:
             Path to downloaded file
         """
         try:
             logger.info(f"Downloading audio from storage: {storage_path}")
-            
-            # Extract bucket name from path (assuming format: bucket/path/to/file)
-            parts = storage_path.split('/', 1)
-            bucket_name = parts[0] if len(parts) > 1 else 'audios'
-            file_path = parts[1] if len(parts) > 1 else storage_path
-            
-            # Download file
-            response = self.client.storage.from_(bucket_name).download(file_path)
-            
-            # Save to local file
-            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+
+            os.makedirs(os.path.dirname(os.path.abspath(local_path)), exist_ok=True)
             async with aiofiles.open(local_path, 'wb') as f:
-                await f.write(response)
-            
+                async for chunk in self.iter_object(storage_path):
+                    await f.write(chunk)
+
             logger.info(f"Audio downloaded to: {local_path}")
             return local_path
-            
+
         except Exception as e:
             logger.error(f"Failed to download audio: {e}")
             raise
-    
+
     async def save_transcription(
         self,
         user_id: str,
@@ -133,10 +241,14 @@ class SupabaseService:
         transcription: str,
         language: str,
         confidence: float,
-        duration: float
-    ) -> dict:
-        """Save transcription to database.
-        
+        duration: float,
+        segments: Optional[List[Dict]] = None
+    ) -> None:
+        """Save one transcription to the database immediately.
+
+        Request paths should prefer the batched, retried
+        :class:`~app.services.transcription_writer.TranscriptionWriter`.
+
         Args:
             user_id: User ID
             audio_url: Original audio URL
@@ -144,9 +256,7 @@ class SupabaseService:
             language: Detected language
             confidence: Confidence score
             duration: Audio duration
-        
-        Returns:
-            Inserted record
+            segments: Speaker segments, stored as JSONB
         """
         try:
             data = {
@@ -157,12 +267,13 @@ class SupabaseService:
                 "confidence": confidence,
                 "duration_seconds": duration
             }
-            
-            result = self.client.table("transcriptions").insert(data).execute()
+            if segments is not None:
+                data["segments"] = segments
+
+            with stage_timer("db_save"):
+                await self.insert_rows("transcriptions", [data])
             logger.info(f"Transcription saved for user {user_id}")
-            
-            return result.data[0] if result.data else {}
-            
+
         except Exception as e:
             logger.error(f"Failed to save transcription: {e}")
             raise
@@ -170,9 +281,22 @@ class SupabaseService:
 # Singleton instance
 _supabase_service: Optional[SupabaseService] = None
 
-def get_supabase_service(url: str, key: str) -> SupabaseService:
-    """Get or create Supabase service instance."""
+def get_supabase_service(url: Optional[str] = None, key: Optional[str] = None) -> SupabaseService:
+    """Get or create Supabase service instance (defaults to the configured project)."""
     global _supabase_service
     if _supabase_service is None:
-        _supabase_service = SupabaseService(url, key)
+        from ..config import settings
+        _supabase_service = SupabaseService(
+            url or settings.SUPABASE_URL,
+            key or settings.SUPABASE_KEY,
+            max_connections=settings.SUPABASE_MAX_CONNECTIONS
+        )
     return _supabase_service
+
+
+async def close_supabase_service() -> None:
+    """Close the pooled HTTP client of the shared service, if it was created."""
+    global _supabase_service
+    if _supabase_service is not None:
+        await _supabase_service.close()
+        _supabase_service = None
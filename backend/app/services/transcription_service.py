@@ -0,0 +1,228 @@
+"""Transcription pipeline shared by the synchronous and job endpoints."""
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from ..config import settings
+from ..models.transcription import TranscriptionResponse
+from .whisper_service import get_whisper_service
+from .diarization_service import transcribe_with_diarization
+from .audio_decoder import AudioInput, load_audio, duration_seconds
+from .result_cache import get_result_cache, hash_file, hash_pcm
+from .whisper_engines import engine_key
+from .voiceprint_store import get_voiceprint_store
+from .metrics import CACHE_HITS, observe_transcription
+from .inference_scheduler import inference_ticket
+from .inference_executor import get_inference_executor
+from .model_selector import get_model_selector, model_rank
+from .language_id import get_language_memory, memory_keys
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[float, str], None]
+
+
+class DiarizationUnavailableError(Exception):
+    """Raised when diarization mode is requested but HF_TOKEN is not configured."""
+
+
+def build_context(cliente_id: Optional[int] = None, ejecutivo_id: Optional[str] = None) -> Optional[Dict]:
+    """Build the diarization context dict from optional form fields."""
+    context = {}
+    if cliente_id is not None:
+        context["cliente_id"] = cliente_id
+    if ejecutivo_id is not None:
+        context["ejecutivo_id"] = ejecutivo_id
+    return context or None
+
+
+async def run_transcription(
+    audio: AudioInput,
+    mode: str = "simple",
+    language: Optional[str] = None,
+    context: Optional[Dict] = None,
+    progress: Optional[ProgressCallback] = None,
+    audio_sha256: Optional[str] = None,
+    user_id: Optional[str] = None,
+    job_id: Optional[str] = None
+) -> TranscriptionResponse:
+    """Transcribe audio in simple or diarization mode.
+
+    Results are served from the result cache when the same audio was already
+    transcribed with the same model, mode, language and context. Otherwise
+    the audio is decoded first, so the Whisper size can be chosen by
+    duration, language and queue pressure and the inference scheduler can
+    order waiting requests by mode, duration and user.
+
+    Without a ``language``, the one last detected for the same ejecutivo or
+    user is used; failing that, it is identified from the leading window of
+    the audio on the inference worker and remembered for the next request.
+
+    Args:
+        audio: Path to audio file, or decoded 16 kHz mono float32 array
+        mode: 'simple' or 'diarization'
+        language: Optional language code (es, en, etc.)
+        context: Optional context dict with cliente_id and/or ejecutivo_id
+        progress: Optional callback receiving (fraction, stage) updates
+        audio_sha256: Content hash of the uploaded file, if already computed
+        user_id: Requesting user, for per-user inference caps
+        job_id: Job the request runs for; its speaker embeddings are staged
+            for voiceprint confirmation under this id
+
+    Returns:
+        TranscriptionResponse for the audio
+
+    Raises:
+        DiarizationUnavailableError: If diarization is requested without HF_TOKEN
+        InferenceBusyError: If the inference executor is saturated
+    """
+    if mode == "diarization" and not settings.HF_TOKEN:
+        raise DiarizationUnavailableError("HF_TOKEN environment variable required for diarization mode")
+
+    cache = get_result_cache()
+    cache_key = None
+    if audio_sha256 is None and cache is not None:
+        audio_sha256 = hash_file(audio) if isinstance(audio, str) else hash_pcm(audio)
+    if cache is not None:
+        cache_key = cache.make_key(
+            audio_sha256,
+            engine_key(settings.WHISPER_MODEL, settings.WHISPER_BACKEND, settings.WHISPER_COMPUTE_TYPE),
+            mode,
+            language,
+            context if mode == "diarization" else None
+        )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Result cache hit ({mode})")
+            CACHE_HITS.inc()
+            cached = dict(cached)
+            speaker_embeddings = {
+                label: np.asarray(vector, dtype=np.float32)
+                for label, vector in (cached.pop("speaker_embeddings", None) or {}).items()
+            }
+            # A replayed call is not new evidence: stage it for confirmation, never auto-enroll
+            await _record_voiceprint(context, speaker_embeddings, job_id, auto_enroll=False)
+            return TranscriptionResponse(**cached)
+
+    started = time.perf_counter()
+    if isinstance(audio, str):
+        # Off the inference workers; to_thread keeps the request's stage timings
+        audio = await asyncio.to_thread(load_audio, audio)
+    audio_seconds = duration_seconds(audio)
+
+    memory = get_language_memory()
+    keys = memory_keys(user_id, context) if memory is not None and language is None else []
+    remembered = memory.get(keys) if keys else None
+    if remembered is not None:
+        logger.info(f"Using remembered language {remembered}")
+
+    language_used = language or remembered
+    model_name, reason = get_model_selector().select(
+        audio_seconds, language_used, get_inference_executor().stats()["queued"]
+    )
+    if model_name != settings.WHISPER_MODEL:
+        logger.info(f"Using Whisper {model_name} instead of {settings.WHISPER_MODEL} ({reason})")
+
+    with inference_ticket(mode, user_id, audio_seconds):
+        response, speaker_embeddings = await _transcribe(audio, mode, language_used, context, progress, model_name)
+    await _record_voiceprint(context, speaker_embeddings, job_id)
+    if keys and remembered is None and response.language != "unknown":
+        memory.put(keys, response.language)
+    observe_transcription(
+        engine_key(model_name, settings.WHISPER_BACKEND, settings.WHISPER_COMPUTE_TYPE),
+        mode,
+        response.duration_seconds,
+        time.perf_counter() - started
+    )
+
+    # Results degraded under load are not cached, so they are not replayed once load drops
+    if cache is not None and model_rank(model_name) >= model_rank(settings.WHISPER_MODEL):
+        # created_at is set fresh on every hit; embeddings let hits stage voiceprints too
+        cached = response.model_dump(mode="json", exclude={"created_at", "debug"})
+        if speaker_embeddings:
+            cached["speaker_embeddings"] = {label: vector.tolist() for label, vector in speaker_embeddings.items()}
+        cache.put(cache_key, cached)
+    return response
+
+
+async def _record_voiceprint(
+    context: Optional[Dict],
+    speaker_embeddings: Dict[str, np.ndarray],
+    job_id: Optional[str],
+    auto_enroll: bool = True
+) -> None:
+    """Enroll a confident voiceprint match, or stage a job's embeddings for confirmation.
+
+    A speaker matching the ejecutivo's voiceprint at VOICEPRINT_AUTO_ENROLL_SIMILARITY
+    or above is folded into it right away. Otherwise jobs keep their speaker
+    embeddings under the job id until POST /jobs/{id}/confirm-speaker;
+    synchronous requests have nothing to confirm them with.
+    """
+    voiceprints = get_voiceprint_store()
+    ejecutivo_id = (context or {}).get("ejecutivo_id")
+    if voiceprints is None or not ejecutivo_id or not speaker_embeddings:
+        return
+
+    threshold = settings.VOICEPRINT_AUTO_ENROLL_SIMILARITY
+    if auto_enroll and threshold > 0:
+        match = voiceprints.identify(ejecutivo_id, speaker_embeddings)
+        if match is not None and match[1] >= threshold:
+            speaker, similarity = match
+            await asyncio.to_thread(voiceprints.enroll, ejecutivo_id, speaker_embeddings[speaker])
+            logger.info(f"Auto-enrolled {speaker} as ejecutivo {ejecutivo_id} (similarity {similarity:.2f})")
+            return
+
+    if job_id is not None:
+        await asyncio.to_thread(voiceprints.stage, job_id, ejecutivo_id, speaker_embeddings)
+
+
+async def _transcribe(
+    audio: AudioInput,
+    mode: str,
+    language: Optional[str],
+    context: Optional[Dict],
+    progress: Optional[ProgressCallback],
+    model_name: Optional[str] = None
+) -> Tuple[TranscriptionResponse, Dict[str, np.ndarray]]:
+    """Run one transcription; returns the response and the call's speaker embeddings (diarization only)."""
+    whisper = get_whisper_service(model_name or settings.WHISPER_MODEL)
+
+    if mode == "diarization":
+        logger.info(f"Diarization context: {context}")
+
+        result = await transcribe_with_diarization(
+            audio=audio,
+            whisper_model=whisper.model,
+            hf_token=settings.HF_TOKEN,
+            context=context,
+            progress=progress,
+            language=language,
+            primary=whisper.primary
+        )
+
+        return TranscriptionResponse(
+            transcription=result["text"],
+            language=result["language"],
+            confidence=result["confidence"],
+            duration_seconds=result["duration"],
+            mode="diarization",
+            model=whisper.model_name,
+            segments=result.get("segments", []),
+            num_speakers=result.get("num_speakers", 0)
+        ), result.get("speaker_embeddings") or {}
+
+    if progress:
+        progress(0.1, "transcribing")
+    result = await whisper.transcribe(audio, language)
+
+    return TranscriptionResponse(
+        transcription=result["transcription"],
+        language=result["language"],
+        confidence=result["confidence"],
+        duration_seconds=result["duration"],
+        mode="simple",
+        model=whisper.model_name
+    ), {}
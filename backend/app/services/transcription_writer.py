@@ -0,0 +1,349 @@
+"""Write-behind persistence of transcriptions to Supabase.
+
+Finished transcriptions are appended to a local SQLite outbox and the
+request returns straight away. A background task drains the outbox in
+batches, one PostgREST insert per batch, and retries failed batches with
+exponential backoff. Rows survive restarts and Supabase outages; they only
+leave the outbox once Supabase accepted them, or are kept as ``dead`` after
+``max_attempts`` so they can be inspected and replayed.
+
+Several processes may drain the same outbox (pre-fork workers): a batch is
+claimed atomically by pushing its retry time ``CLAIM_SECONDS`` ahead, so no
+other writer picks it up while it is being sent, and a writer that dies
+mid-batch only delays those rows until the claim runs out.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from .metrics import stage_timer
+from .supabase_service import SupabaseError, SupabaseService, get_supabase_service
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPTIONS_TABLE = "transcriptions"
+# How long a claimed batch is hidden from other writers; covers a row-by-row retry
+CLAIM_SECONDS = 600.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    target TEXT NOT NULL,
+    row TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    dead INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(dead, next_attempt_at, id);
+"""
+
+
+class TranscriptionOutbox:
+    """Durable queue of rows waiting to be inserted, in a local SQLite database."""
+
+    def __init__(self, db_path: str):
+        """Open (and create if needed) the outbox database.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def add(self, target: str, row: Dict) -> int:
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO outbox (target, row, created_at, next_attempt_at) VALUES (?, ?, ?, ?)",
+                (target, json.dumps(row, default=str), now, now)
+            )
+        return cursor.lastrowid
+
+    def claim(self, limit: int, claim_seconds: float = CLAIM_SECONDS) -> List[Dict]:
+        """Atomically take up to ``limit`` live rows whose retry time has come, oldest first.
+
+        Claimed rows are not due again for ``claim_seconds``, unless
+        :meth:`retry_later` reschedules them sooner.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    """SELECT * FROM outbox WHERE dead = 0 AND next_attempt_at <= ?
+                       ORDER BY id LIMIT ?""",
+                    (now, limit)
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE outbox SET next_attempt_at = ? WHERE id = ?",
+                    [(now + claim_seconds, row["id"]) for row in rows]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [self._to_dict(row) for row in rows]
+
+    def release(self, ids: List[int]) -> None:
+        """Make claimed rows due again right away (e.g. a writer stopped mid-batch)."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE outbox SET next_attempt_at = ? WHERE id = ? AND dead = 0 AND next_attempt_at > ?",
+                [(now, i, now) for i in ids]
+            )
+
+    def delete(self, ids: List[int]) -> None:
+        with self._lock:
+            self._conn.executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in ids])
+
+    def retry_later(self, ids: List[int], error: str, delay: float, max_attempts: int) -> None:
+        """Count a failed attempt; rows out of attempts are marked dead."""
+        with self._lock:
+            self._conn.executemany(
+                """UPDATE outbox SET attempts = attempts + 1, last_error = ?, next_attempt_at = ?,
+                                     dead = CASE WHEN attempts + 1 >= ? THEN 1 ELSE 0 END
+                   WHERE id = ?""",
+                [(error, time.time() + delay, max_attempts, i) for i in ids]
+            )
+
+    def mark_dead(self, ids: List[int], error: str) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, last_error = ?, dead = 1 WHERE id = ?",
+                [(error, i) for i in ids]
+            )
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT SUM(dead = 0) AS pending, SUM(dead = 1) AS dead FROM outbox"
+            ).fetchone()
+        return {"pending": row["pending"] or 0, "dead": row["dead"] or 0}
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        entry = dict(row)
+        entry["row"] = json.loads(entry["row"])
+        return entry
+
+
+class TranscriptionWriter:
+    """Drains a :class:`TranscriptionOutbox` into Supabase in batches.
+
+    A batch is flushed every ``flush_interval`` seconds, or as soon as
+    ``batch_size`` rows are waiting. A batch that PostgREST rejects as a
+    whole (4xx) is retried row by row, so one malformed row does not hold
+    back the others.
+    """
+
+    def __init__(
+        self,
+        outbox: TranscriptionOutbox,
+        service: SupabaseService,
+        batch_size: int = 50,
+        flush_interval: float = 1.0,
+        max_attempts: int = 10,
+        max_backoff: float = 300.0
+    ):
+        """Initialize transcription writer.
+
+        Args:
+            outbox: Durable queue of pending rows
+            service: Supabase service used for the inserts
+            batch_size: Maximum rows per insert request
+            flush_interval: Seconds between flushes while rows are pending
+            max_attempts: Failed attempts after which a row is marked dead
+            max_backoff: Upper bound of the retry delay in seconds
+        """
+        self.outbox = outbox
+        self.service = service
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.max_backoff = max_backoff
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._pending_since_flush = 0
+        self.written = 0
+        self.failed_batches = 0
+
+    def start(self) -> None:
+        pending = self.outbox.counts()["pending"]
+        if pending:
+            logger.info(f"Resuming {pending} transcriptions left in the outbox")
+        self._task = asyncio.create_task(self._run_loop(), name="transcription-writer")
+
+    async def stop(self) -> None:
+        """Stop the background task after a last flush; unsent rows stay in the outbox."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning(f"Final outbox flush failed: {e}")
+
+    def enqueue(self, table: str, row: Dict) -> None:
+        """Durably queue a row for insertion into ``table``."""
+        self.outbox.add(table, row)
+        self._pending_since_flush += 1
+        if self._pending_since_flush >= self.batch_size:
+            self._wakeup.set()
+
+    async def _run_loop(self) -> None:
+        while True:
+            try:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                # Keep going while full batches are accepted; stop at the first failure
+                while await self.flush() == self.batch_size:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Transcription writer error: {e}")
+                await asyncio.sleep(self.flush_interval)
+
+    async def flush(self) -> int:
+        """Send one batch of due rows. Returns the number of rows written."""
+        self._pending_since_flush = 0
+        entries = self.outbox.claim(self.batch_size)
+        if not entries:
+            return 0
+
+        by_target: Dict[str, List[Dict]] = {}
+        for entry in entries:
+            by_target.setdefault(entry["target"], []).append(entry)
+
+        written = 0
+        try:
+            with stage_timer("db_save"):
+                for target, batch in by_target.items():
+                    written += await self._insert(target, batch)
+        except asyncio.CancelledError:
+            # Stopped mid-batch: rows not sent yet need not wait for the claim to run out
+            self.outbox.release([entry["id"] for entry in entries])
+            raise
+        return written
+
+    async def _insert(self, target: str, batch: List[Dict]) -> int:
+        ids = [entry["id"] for entry in batch]
+        try:
+            await self.service.insert_rows(target, [entry["row"] for entry in batch])
+        except SupabaseError as e:
+            if e.retryable:
+                self._retry_later(batch, str(e))
+                return 0
+            if len(batch) > 1:
+                logger.warning(f"Batch of {len(batch)} rejected by {target}, retrying row by row: {e}")
+                return sum([await self._insert(target, [entry]) for entry in batch])
+            logger.error(f"Outbox row {ids[0]} rejected by {target}, marking dead: {e}")
+            self.outbox.mark_dead(ids, str(e))
+            return 0
+        except httpx.TransportError as e:
+            self._retry_later(batch, f"{type(e).__name__}: {e}")
+            return 0
+
+        self.outbox.delete(ids)
+        self.written += len(ids)
+        logger.debug(f"Inserted {len(ids)} rows into {target}")
+        return len(ids)
+
+    def _retry_later(self, batch: List[Dict], error: str) -> None:
+        self.failed_batches += 1
+        attempts = min(entry["attempts"] for entry in batch)
+        delay = min(self.max_backoff, self.flush_interval * 2 ** attempts)
+        logger.warning(f"Insert of {len(batch)} rows failed, retrying in {delay:.0f}s: {error}")
+        self.outbox.retry_later([entry["id"] for entry in batch], error, delay, self.max_attempts)
+
+    def stats(self) -> Dict:
+        return {
+            **self.outbox.counts(),
+            "written": self.written,
+            "failed_batches": self.failed_batches,
+            "batch_size": self.batch_size,
+        }
+
+
+def transcription_row(
+    response,
+    user_id: str,
+    audio_url: Optional[str],
+    context: Optional[Dict] = None
+) -> Dict:
+    """Build a ``transcriptions`` row from a ``TranscriptionResponse``.
+
+    Segments are sent as a JSON array so PostgREST stores them as JSONB.
+    """
+    result = response.model_dump(mode="json", exclude={"debug"})
+    return {
+        "user_id": user_id,
+        "audio_url": audio_url,
+        "transcription": result["transcription"],
+        "language": result["language"],
+        "confidence": result["confidence"],
+        "duration_seconds": result["duration_seconds"],
+        "mode": result["mode"],
+        "num_speakers": result["num_speakers"],
+        "segments": result["segments"],
+        "metadata": context,
+        "created_at": result["created_at"],
+    }
+
+
+def persist_transcription(
+    response,
+    user_id: str,
+    audio_url: Optional[str],
+    context: Optional[Dict] = None
+) -> None:
+    """Queue a finished transcription for Supabase (no-op unless PERSIST_TRANSCRIPTIONS).
+
+    Never raises: persistence problems must not fail the transcription.
+    """
+    writer = get_transcription_writer()
+    if writer is None:
+        return
+    try:
+        writer.enqueue(TRANSCRIPTIONS_TABLE, transcription_row(response, user_id, audio_url, context))
+    except Exception as e:
+        logger.error(f"Could not queue transcription of user {user_id} for persistence: {e}")
+
+
+# Singleton instance
+_transcription_writer: Optional[TranscriptionWriter] = None
+
+def get_transcription_writer() -> Optional[TranscriptionWriter]:
+    """Get or create the transcription writer (None when persistence is disabled)."""
+    global _transcription_writer
+    from ..config import settings
+    if not settings.PERSIST_TRANSCRIPTIONS:
+        return None
+    if _transcription_writer is None:
+        _transcription_writer = TranscriptionWriter(
+            TranscriptionOutbox(settings.PERSIST_OUTBOX_PATH),
+            get_supabase_service(),
+            batch_size=settings.PERSIST_BATCH_SIZE,
+            flush_interval=settings.PERSIST_FLUSH_INTERVAL_SECONDS,
+            max_attempts=settings.PERSIST_MAX_ATTEMPTS
+        )
+    return _transcription_writer
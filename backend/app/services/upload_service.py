@@ -0,0 +1,161 @@
+"""Helpers for spooling uploaded audio files to disk."""
+import asyncio
+import hashlib
+import logging
+import os
+from typing import AsyncIterator, List, Optional, Tuple
+
+import aiofiles
+import numpy as np
+from fastapi import UploadFile
+
+from .audio_decoder import StreamingDecoder, decode_audio, needs_seekable_input
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MB
+PROBE_BYTES = 64 * 1024  # Enough to find an MP4's index ahead of its media data
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds the configured size limit."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Audio file exceeds the {max_bytes // (1024 * 1024)}MB limit")
+        self.max_bytes = max_bytes
+
+
+def max_upload_bytes() -> int:
+    """Return the configured upload size limit in bytes."""
+    from ..config import settings
+    return settings.MAX_UPLOAD_MB * 1024 * 1024
+
+
+def upload_suffix(file: UploadFile) -> str:
+    """Return the file extension of an upload, defaulting to .m4a."""
+    return os.path.splitext(file.filename or "")[1] or ".m4a"
+
+
+async def _iter_upload(file: UploadFile) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def _peek(chunks: AsyncIterator[bytes], n: int) -> Tuple[bytes, AsyncIterator[bytes]]:
+    """Read at least ``n`` bytes of a stream; return them and the whole stream again."""
+    iterator = chunks.__aiter__()
+    head: List[bytes] = []
+    received = 0
+    while received < n:
+        try:
+            chunk = await iterator.__anext__()
+        except StopAsyncIteration:
+            break
+        head.append(chunk)
+        received += len(chunk)
+
+    async def replay() -> AsyncIterator[bytes]:
+        for chunk in head:
+            yield chunk
+        async for chunk in iterator:
+            yield chunk
+
+    return b"".join(head), replay()
+
+
+async def spool_chunks(
+    chunks: AsyncIterator[bytes],
+    dest_path: str,
+    max_bytes: Optional[int] = None,
+    decoder: Optional[StreamingDecoder] = None
+) -> Tuple[int, str]:
+    """Write an async stream of chunks to ``dest_path`` without buffering it.
+
+    Args:
+        chunks: Async iterator of encoded audio chunks
+        dest_path: Local path to write to
+        max_bytes: Abort with UploadTooLargeError once this many bytes arrived
+        decoder: Optional streaming decoder that also receives every chunk
+
+    Returns:
+        Tuple of (size in bytes, sha256 hex digest)
+
+    Raises:
+        UploadTooLargeError: If the stream exceeds ``max_bytes``; the partial
+            file is removed
+    """
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(dest_path, "wb") as f:
+            async for chunk in chunks:
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise UploadTooLargeError(max_bytes)
+                hasher.update(chunk)
+                await f.write(chunk)
+                if decoder:
+                    await decoder.feed(chunk)
+    except BaseException:
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        raise
+    return size, hasher.hexdigest()
+
+
+async def save_upload(file: UploadFile, dest_path: str, max_bytes: Optional[int] = None) -> Tuple[int, str]:
+    """Copy an upload to ``dest_path`` chunk by chunk.
+
+    Args:
+        file: Uploaded file
+        dest_path: Local path to write to
+        max_bytes: Optional size limit in bytes
+
+    Returns:
+        Tuple of (size in bytes, sha256 hex digest)
+
+    Raises:
+        UploadTooLargeError: If the upload exceeds ``max_bytes``
+    """
+    return await spool_chunks(_iter_upload(file), dest_path, max_bytes)
+
+
+async def spool_and_decode(
+    chunks: AsyncIterator[bytes],
+    dest_path: str,
+    max_bytes: Optional[int] = None
+) -> Tuple[int, str, np.ndarray]:
+    """Spool a stream to disk while decoding it to PCM on the fly.
+
+    Formats ffmpeg cannot decode from a pipe (m4a/mp4 with the index at the
+    end, the mobile default) are recognised from their first bytes and decoded
+    once from the spooled copy after the transfer instead. The spooled copy is
+    also the fallback if a streaming decode fails.
+
+    Returns:
+        Tuple of (size in bytes, sha256 hex digest, decoded 16 kHz mono array)
+    """
+    loop = asyncio.get_running_loop()
+    head, chunks = await _peek(chunks, PROBE_BYTES)
+    if needs_seekable_input(head):
+        size, sha256 = await spool_chunks(chunks, dest_path, max_bytes)
+        audio = await loop.run_in_executor(None, decode_audio, dest_path)
+        return size, sha256, audio
+
+    decoder = StreamingDecoder()
+    await decoder.start()
+    try:
+        size, sha256 = await spool_chunks(chunks, dest_path, max_bytes, decoder)
+    except BaseException:
+        await decoder.abort()
+        raise
+
+    try:
+        audio = await decoder.finish()
+    except RuntimeError as e:
+        logger.info(f"Streaming decode not possible ({e}), decoding spooled file")
+        audio = await loop.run_in_executor(None, decode_audio, dest_path)
+    return size, sha256, audio
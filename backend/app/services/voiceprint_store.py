@@ -0,0 +1,209 @@
+"""Persistent voiceprints used to recognise the ejecutivo in a call.
+
+Each enrolled ejecutivo has one unit-norm float32 speaker embedding (the mean
+of the embeddings from their confirmed calls). Voiceprints are stored as a
+single ``(agents, dim)`` matrix in ``voiceprints.npy``, memory-mapped
+read-only, with the row index in ``voiceprints.json``; matching a call's
+speakers is one small matrix-vector product.
+
+Enrollment is driven by confirmed calls: diarization jobs with an
+``ejecutivo_id`` stage their per-speaker embeddings under the job id, and
+confirming which speaker was the ejecutivo folds that embedding into their
+voiceprint. Once enrolled, calls that match the voiceprint closely enough are
+folded in without confirmation.
+"""
+import json
+import logging
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MATRIX_FILE = "voiceprints.npy"
+INDEX_FILE = "voiceprints.json"
+PENDING_DIR = "pending"
+
+
+class VoiceprintNotFoundError(Exception):
+    """No staged embeddings for the call, or the speaker is not in it."""
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+class VoiceprintStore:
+    """Voiceprints keyed by ejecutivo_id, backed by a memory-mapped matrix."""
+
+    def __init__(self, directory: str, threshold: float = 0.6, max_pending: int = 1000):
+        """Initialize voiceprint store.
+
+        Args:
+            directory: Where the matrix, index and staged calls are kept
+            threshold: Minimum cosine similarity for a speaker to be recognised
+            max_pending: Staged calls kept for confirmation (oldest dropped first)
+        """
+        self.directory = directory
+        self.threshold = threshold
+        self.max_pending = max_pending
+        self._pending_dir = os.path.join(directory, PENDING_DIR)
+        os.makedirs(self._pending_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._index: Dict[str, int] = {}
+        self._counts: Dict[str, int] = {}
+        self._load()
+
+    def _load(self) -> None:
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        matrix_path = os.path.join(self.directory, MATRIX_FILE)
+        if not os.path.exists(index_path) or not os.path.exists(matrix_path):
+            return
+        with open(index_path) as f:
+            index = json.load(f)
+        self._index = {agent: row for row, agent in enumerate(index["ids"])}
+        self._counts = dict(zip(index["ids"], index["counts"]))
+        self._matrix = np.load(matrix_path, mmap_mode="r")
+        logger.info(f"Loaded {len(self._index)} voiceprints")
+
+    def _save(self, matrix: np.ndarray, index: Dict[str, int], counts: Dict[str, int]) -> None:
+        ids = sorted(index, key=index.get)
+        matrix_path = os.path.join(self.directory, MATRIX_FILE)
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        with open(matrix_path + ".tmp", "wb") as f:
+            np.save(f, matrix.astype(np.float32))
+        with open(index_path + ".tmp", "w") as f:
+            json.dump({"ids": ids, "counts": [counts[i] for i in ids]}, f)
+        os.replace(matrix_path + ".tmp", matrix_path)
+        os.replace(index_path + ".tmp", index_path)
+        # Matrix before index: concurrent lookups never see a row that does not exist yet
+        self._matrix = np.load(matrix_path, mmap_mode="r")
+        self._index = index
+        self._counts = counts
+
+    def identify(self, ejecutivo_id: str, speaker_embeddings: Dict[str, np.ndarray]) -> Optional[Tuple[str, float]]:
+        """Find which speaker of a call is ``ejecutivo_id``.
+
+        Args:
+            ejecutivo_id: Ejecutivo expected in the call
+            speaker_embeddings: Speaker label -> embedding for the call
+
+        Returns:
+            (speaker, similarity) of the best match at or above the
+            threshold, or None if the ejecutivo is not enrolled or no
+            speaker is close enough
+        """
+        row = self._index.get(str(ejecutivo_id))
+        if row is None or not speaker_embeddings:
+            return None
+        labels = list(speaker_embeddings)
+        embeddings = _normalize(np.stack([speaker_embeddings[s] for s in labels]).astype(np.float32))
+        similarities = embeddings @ self._matrix[row]
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            logger.info(f"No speaker matches voiceprint of {ejecutivo_id} "
+                        f"(best {labels[best]} at {similarities[best]:.2f})")
+            return None
+        return labels[best], float(similarities[best])
+
+    def enroll(self, ejecutivo_id: str, embedding: np.ndarray) -> int:
+        """Fold one confirmed embedding into the ejecutivo's voiceprint.
+
+        Returns:
+            Number of calls the voiceprint is now built from
+        """
+        ejecutivo_id = str(ejecutivo_id)
+        embedding = _normalize(np.asarray(embedding, dtype=np.float32).reshape(-1))
+        with self._lock:
+            matrix = np.array(self._matrix) if self._matrix is not None else np.zeros((0, len(embedding)), np.float32)
+            if matrix.shape[1] != len(embedding):
+                raise ValueError(f"Embedding has {len(embedding)} dims, voiceprints have {matrix.shape[1]}")
+            index, counts = dict(self._index), dict(self._counts)
+            row = index.get(ejecutivo_id)
+            if row is None:
+                index[ejecutivo_id] = len(matrix)
+                counts[ejecutivo_id] = 1
+                matrix = np.vstack([matrix, embedding])
+            else:
+                matrix[row] = _normalize(matrix[row] * counts[ejecutivo_id] + embedding)
+                counts[ejecutivo_id] += 1
+            self._save(matrix, index, counts)
+            logger.info(f"Enrolled voiceprint for {ejecutivo_id} ({counts[ejecutivo_id]} calls)")
+            return counts[ejecutivo_id]
+
+    def stage(self, call_id: str, ejecutivo_id: str, speaker_embeddings: Dict[str, np.ndarray]) -> None:
+        """Keep a call's speaker embeddings until its ejecutivo is confirmed."""
+        if not speaker_embeddings:
+            return
+        labels = list(speaker_embeddings)
+        path = os.path.join(self._pending_dir, f"{call_id}.npz")
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                ejecutivo_id=np.array(str(ejecutivo_id)),
+                labels=np.array(labels),
+                embeddings=np.stack([speaker_embeddings[s] for s in labels]).astype(np.float32)
+            )
+        self._prune_pending()
+
+    def confirm(self, call_id: str, speaker: str) -> Tuple[str, int]:
+        """Enroll ``speaker`` of a staged call as its ejecutivo.
+
+        Returns:
+            (ejecutivo_id, number of calls in the updated voiceprint)
+
+        Raises:
+            VoiceprintNotFoundError: If the call was not staged or has no such speaker
+        """
+        path = os.path.join(self._pending_dir, f"{call_id}.npz")
+        if not os.path.exists(path):
+            raise VoiceprintNotFoundError("No speaker embeddings stored for this call")
+        with np.load(path) as staged:
+            labels = [str(label) for label in staged["labels"]]
+            if speaker not in labels:
+                raise VoiceprintNotFoundError(f"Speaker {speaker} not found in this call")
+            ejecutivo_id = str(staged["ejecutivo_id"])
+            embedding = staged["embeddings"][labels.index(speaker)]
+        count = self.enroll(ejecutivo_id, embedding)
+        os.remove(path)
+        return ejecutivo_id, count
+
+    def _prune_pending(self) -> None:
+        entries = [e for e in os.scandir(self._pending_dir) if e.name.endswith(".npz")]
+        if len(entries) <= self.max_pending:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_pending]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "enrolled": len(self._index),
+            "dim": int(self._matrix.shape[1]) if self._matrix is not None else None,
+            "threshold": self.threshold,
+        }
+
+
+# Singleton instance
+_voiceprint_store: Optional[VoiceprintStore] = None
+
+def get_voiceprint_store() -> Optional[VoiceprintStore]:
+    """Get or create voiceprint store (None when voiceprints are disabled)."""
+    global _voiceprint_store
+    from ..config import settings
+    if not settings.VOICEPRINTS_ENABLED:
+        return None
+    if _voiceprint_store is None:
+        _voiceprint_store = VoiceprintStore(
+            settings.VOICEPRINT_DIR,
+            threshold=settings.VOICEPRINT_THRESHOLD,
+            max_pending=settings.VOICEPRINT_MAX_PENDING,
+        )
+    return _voiceprint_store
@@ -0,0 +1,172 @@
+"""Model warm-up and readiness tracking for the /health/ready probe.
+
+The server starts answering as soon as the app is imported; models load in
+the background. Readiness turns true once every configured model is loaded
+and has run one dummy inference, so the first real request does not pay for
+lazy initialisation (weight paging, kernel selection, thread pool start-up).
+With INFERENCE_AUTOTUNE the inference worker layout is calibrated between
+loading and warm-up.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from .audio_decoder import SAMPLE_RATE
+from .cpu_layout import CpuLayout, calibrate, process_cores
+
+logger = logging.getLogger(__name__)
+
+STATE_PENDING = "pending"
+STATE_LOADING = "loading"
+STATE_CALIBRATING = "calibrating"
+STATE_WARMING = "warming"
+STATE_READY = "ready"
+STATE_FAILED = "failed"
+
+# One second of silence is enough to run every layer once
+WARMUP_SECONDS = 1.0
+# Whisper's input window; calibration runs are padded to it anyway
+CALIBRATION_SECONDS = 30
+
+
+class Readiness:
+    """Progress of model loading and warm-up, shared with the health probes."""
+
+    def __init__(self):
+        self.state = STATE_PENDING
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.warmed: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == STATE_READY
+
+    def set_state(self, state: str, error: Optional[str] = None) -> None:
+        with self._lock:
+            self.state = state
+            self.error = error
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "error": self.error,
+                "load_seconds": self.load_seconds,
+                "warmup_seconds": self.warmup_seconds,
+                "warmed": dict(self.warmed),
+            }
+
+
+async def prepare_models(readiness: "Readiness") -> None:
+    """Load the configured models, optionally calibrate the CPU layout, warm up, and mark ready.
+
+    Blocking steps run on the default executor; the calibrated layout is
+    applied to the inference executor from the event loop.
+    """
+    from ..config import settings
+    from .inference_executor import get_inference_executor
+
+    loop = asyncio.get_running_loop()
+    try:
+        readiness.set_state(STATE_LOADING)
+        await loop.run_in_executor(None, _load_models, readiness)
+
+        if settings.INFERENCE_AUTOTUNE:
+            readiness.set_state(STATE_CALIBRATING)
+            layout = await loop.run_in_executor(None, calibrate_layout)
+            if layout is not None:
+                get_inference_executor().apply_layout(layout)
+
+        if settings.WARMUP_INFERENCE:
+            readiness.set_state(STATE_WARMING)
+            await loop.run_in_executor(None, _warm_models, readiness)
+
+        readiness.set_state(STATE_READY)
+        logger.info(f"Models ready (load {readiness.load_seconds}s, warm-up {readiness.warmup_seconds}s)")
+    except Exception as e:
+        logger.error(f"Model warm-up failed: {e}")
+        readiness.set_state(STATE_FAILED, str(e))
+
+
+def _load_models(readiness: "Readiness") -> None:
+    from .model_registry import preload_models
+
+    started = time.perf_counter()
+    preload_models()
+    readiness.load_seconds = round(time.perf_counter() - started, 2)
+
+
+def _warm_models(readiness: "Readiness") -> None:
+    """Run a dummy inference on each loaded model.
+
+    Diarization is optional: a pipeline that fails to warm up is logged and
+    does not keep the server from becoming ready for simple mode.
+    """
+    from ..config import settings
+    from .model_selector import get_model_selector
+    from .whisper_service import get_whisper_service
+
+    started = time.perf_counter()
+    silence = np.zeros(int(WARMUP_SECONDS * SAMPLE_RATE), dtype=np.float32)
+    for model_name in get_model_selector().models:
+        readiness.warmed[f"whisper:{model_name}"] = _timed(
+            get_whisper_service(model_name).model.transcribe, silence, language="en"
+        )
+    if settings.HF_TOKEN:
+        from .diarization_service import get_diarization_service
+        try:
+            readiness.warmed["pyannote"] = _timed(get_diarization_service(settings.HF_TOKEN).diarize, silence)
+        except Exception as e:
+            logger.error(f"Could not warm up diarization pipeline: {e}")
+    readiness.warmup_seconds = round(time.perf_counter() - started, 2)
+
+
+def calibrate_layout() -> Optional[CpuLayout]:
+    """Time workers x threads splits of this process's cores with WHISPER_MODEL (blocking).
+
+    Each timed call is one language-ID pass (a full encoder pass over a
+    30 s window plus one decoder step), which has a fixed cost unlike
+    decoding noise.
+
+    Returns:
+        The fastest layout, or None when the backend's threads cannot be tuned
+    """
+    from ..config import settings
+    from .whisper_engines import OPENAI_WHISPER
+    from .whisper_service import get_whisper_service
+
+    if settings.WHISPER_BACKEND != OPENAI_WHISPER:
+        logger.warning("INFERENCE_AUTOTUNE ignored: CTranslate2 fixes its threads when the model loads")
+        return None
+    engine = get_whisper_service(settings.WHISPER_MODEL).model
+    noise = np.random.default_rng(0).normal(0, 0.01, CALIBRATION_SECONDS * SAMPLE_RATE).astype(np.float32)
+    return calibrate(
+        lambda: engine.detect_language(noise),
+        process_cores(),
+        interop_threads=settings.INFERENCE_INTEROP_THREADS,
+        pin=settings.INFERENCE_PIN_CPUS,
+    )
+
+
+def _timed(fn, *args, **kwargs) -> float:
+    started = time.perf_counter()
+    fn(*args, **kwargs)
+    return round(time.perf_counter() - started, 3)
+
+
+# Singleton instance
+_readiness: Optional[Readiness] = None
+
+def get_readiness() -> Readiness:
+    """Get or create the readiness tracker."""
+    global _readiness
+    if _readiness is None:
+        _readiness = Readiness()
+    return _readiness
@@ -0,0 +1,194 @@
+"""Interchangeable Whisper inference engines.
+
+Every engine exposes ``transcribe(audio, language=None, word_timestamps=False)``,
+which returns the openai-whisper result shape (``text``, ``language`` and
+``segments`` with ``start``/``end``/``text``/``no_speech_prob``/``words``), and
+``detect_language(audio)``, so callers do not care which engine ran.
+"""
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+OPENAI_WHISPER = "openai-whisper"
+FASTER_WHISPER = "faster-whisper"
+
+
+# Batched decoding skips transcribe()'s temperature fallback; items whose
+# output looks degenerate are re-run individually with these thresholds
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+
+
+class OpenAIWhisperEngine:
+    """Reference PyTorch implementation (openai-whisper), FP32 on CPU."""
+
+    backend = OPENAI_WHISPER
+    supports_batching = True
+
+    def __init__(self, model_name: str):
+        import whisper
+        self.model_name = model_name
+        self.model = whisper.load_model(model_name)
+
+    def parameters(self):
+        return self.model.parameters()
+
+    def transcribe(
+        self,
+        audio: np.ndarray,
+        language: Optional[str] = None,
+        word_timestamps: bool = False,
+        fp16: bool = False,
+        **kwargs
+    ) -> Dict:
+        return self.model.transcribe(
+            audio,
+            language=language,
+            fp16=fp16,
+            word_timestamps=word_timestamps,
+            **kwargs
+        )
+
+    def detect_language(self, audio: np.ndarray) -> Tuple[str, float]:
+        """Return (language, probability) from one encoder pass over ``audio`` (at most 30 s)."""
+        import whisper
+
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), n_mels=self.model.dims.n_mels)
+        _, probs = self.model.detect_language(mel.to(self.model.device))
+        language = max(probs, key=probs.get)
+        return language, float(probs[language])
+
+    def transcribe_batch(self, audios: List[np.ndarray], language: Optional[str] = None) -> List[Dict]:
+        """Transcribe several clips of at most 30 s with one batched forward pass.
+
+        Each clip is padded to Whisper's 30 s window, the log-mel spectrograms
+        are stacked, and the encoder and decoder run once for the whole batch.
+        With ``language=None`` the language is detected per clip.
+
+        Returns:
+            One openai-whisper style result per clip (a single segment each)
+        """
+        import torch
+        import whisper
+
+        n_mels = self.model.dims.n_mels
+        mels = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), n_mels=n_mels)
+            for audio in audios
+        ]).to(self.model.device)
+        options = whisper.DecodingOptions(language=language, fp16=False, without_timestamps=True)
+        decoded = whisper.decode(self.model, mels, options)
+
+        results = []
+        for audio, result in zip(audios, decoded):
+            if (result.compression_ratio > COMPRESSION_RATIO_THRESHOLD
+                    or result.avg_logprob < LOGPROB_THRESHOLD):
+                # Fall back to the full transcribe loop (temperature fallback)
+                results.append(self.transcribe(audio, language=language))
+                continue
+            results.append({
+                "text": result.text,
+                "language": result.language,
+                "segments": [{
+                    "id": 0,
+                    "start": 0.0,
+                    "end": len(audio) / whisper.audio.SAMPLE_RATE,
+                    "text": result.text,
+                    "avg_logprob": result.avg_logprob,
+                    "no_speech_prob": result.no_speech_prob,
+                }],
+            })
+        return results
+
+
+class FasterWhisperEngine:
+    """CTranslate2 implementation (faster-whisper) with int8 quantization."""
+
+    backend = FASTER_WHISPER
+    supports_batching = False
+
+    def __init__(self, model_name: str, compute_type: str = "int8", cpu_threads: int = 0):
+        """Load a CTranslate2 Whisper model.
+
+        Args:
+            model_name: Whisper model size (tiny, base, small, ...) or CT2 model path
+            compute_type: int8, int8_float16, int8_float32, float16 or float32
+            cpu_threads: Intra-op threads (0 = CTranslate2 default)
+        """
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise RuntimeError(
+                "WHISPER_BACKEND=faster-whisper requires the faster-whisper package"
+            ) from e
+
+        self.model_name = model_name
+        self.compute_type = compute_type
+        self.model = WhisperModel(
+            model_name,
+            device="auto",
+            compute_type=compute_type,
+            cpu_threads=cpu_threads,
+        )
+
+    def transcribe(
+        self,
+        audio: np.ndarray,
+        language: Optional[str] = None,
+        word_timestamps: bool = False,
+        **kwargs
+    ) -> Dict:
+        # fp16 and other openai-whisper options do not apply; compute_type covers precision
+        segments_iter, info = self.model.transcribe(
+            audio,
+            language=language,
+            word_timestamps=word_timestamps,
+            initial_prompt=kwargs.get("initial_prompt"),
+            condition_on_previous_text=kwargs.get("condition_on_previous_text", True),
+        )
+
+        segments = []
+        for i, seg in enumerate(segments_iter):
+            segments.append({
+                "id": i,
+                "start": seg.start,
+                "end": seg.end,
+                "text": seg.text,
+                "avg_logprob": seg.avg_logprob,
+                "no_speech_prob": seg.no_speech_prob,
+                "words": [
+                    {"word": w.word, "start": w.start, "end": w.end, "probability": w.probability}
+                    for w in (seg.words or [])
+                ],
+            })
+
+        return {
+            "text": "".join(s["text"] for s in segments),
+            "segments": segments,
+            "language": info.language,
+        }
+
+    def detect_language(self, audio: np.ndarray) -> Tuple[str, float]:
+        """Return (language, probability) for ``audio`` (at most 30 s)."""
+        # Language detection runs eagerly; the segment generator is never consumed
+        _, info = self.model.transcribe(audio)
+        return info.language, float(info.language_probability)
+
+
+def load_engine(model_name: str, backend: str = OPENAI_WHISPER, compute_type: str = "int8", cpu_threads: int = 0):
+    """Instantiate the Whisper engine selected by ``backend``."""
+    if backend == FASTER_WHISPER:
+        return FasterWhisperEngine(model_name, compute_type=compute_type, cpu_threads=cpu_threads)
+    if backend == OPENAI_WHISPER:
+        return OpenAIWhisperEngine(model_name)
+    raise ValueError(f"Unknown Whisper backend: {backend}")
+
+
+def engine_key(model_name: str, backend: str = OPENAI_WHISPER, compute_type: str = "int8") -> str:
+    """Model registry key for an engine configuration."""
+    if backend == FASTER_WHISPER:
+        return f"whisper:{backend}:{model_name}:{compute_type}"
+    return f"whisper:{model_name}"
@@ -1,88 +1,169 @@
 """Whisper service for speech-to-text transcription."""
-import whisper
-import torch
-from typing import Optional
+from typing import Dict, Optional
+import asyncio
 import logging
+from .model_registry import get_model_registry
+from .whisper_engines import OPENAI_WHISPER, engine_key, load_engine
+from .inference_executor import get_inference_executor
+from .audio_decoder import AudioInput, load_audio, duration_seconds
+from .long_audio import get_long_audio_transcriber, should_use_long_audio
+from .batch_scheduler import get_batch_scheduler
+from .metrics import stage_timer
+from .language_id import identify_language
 
 logger = logging.getLogger(__name__)
 
 class WhisperService:
     """Service for loading and using Whisper model."""
     
-    def __init__(self, model_name: str = "base"):
+    def __init__(
+        self,
+        model_name: str = "base",
+        backend: str = OPENAI_WHISPER,
+        compute_type: str = "int8",
+        cpu_threads: int = 0,
+        primary: bool = True
+    ):
         """Initialize Whisper service with specified model.
         
         Args:
             model_name: Whisper model size (tiny, base, small, medium, large)
+            backend: Inference engine (openai-whisper | faster-whisper)
+            compute_type: Quantization for faster-whisper (int8, int8_float16, ...)
+            cpu_threads: Intra-op threads for faster-whisper (0 = default)
+            primary: Whether this is WHISPER_MODEL; only the primary model is
+                micro-batched and chunked over the long-audio worker processes,
+                which hold that model
         """
         self.model_name = model_name
+        self.backend = backend
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.primary = primary
         self.model = None
         self._load_model()
     
     def _load_model(self):
-        """Load Whisper model into memory."""
+        """Load Whisper engine through the shared model registry."""
         try:
-            logger.info(f"Loading Whisper model: {self.model_name}")
-            self.model = whisper.load_model(self.model_name)
-            logger.info(f"Whisper model {self.model_name} loaded successfully")
+            self.model = get_model_registry().get(
+                engine_key(self.model_name, self.backend, self.compute_type),
+                lambda: load_engine(self.model_name, self.backend, self.compute_type, self.cpu_threads)
+            )
+            logger.info(f"Whisper model {self.model_name} ready ({self.backend})")
         except Exception as e:
             logger.error(f"Failed to load Whisper model: {e}")
             raise
     
     async def transcribe(
         self,
-        audio_path: str,
+        audio: AudioInput,
+        language: Optional[str] = None
+    ) -> dict:
+        """Transcribe audio file to text on the inference executor.
+        
+        Short clips are micro-batched with concurrent requests when
+        BATCHING_ENABLED is set and the engine supports it (the batched
+        decode detects their language); other audio without a language gets
+        the leading-window language ID first.
+        
+        Args:
+            audio: Path to audio file, or decoded 16 kHz mono float32 array
+            language: Optional language code (es, en, etc.)
+        
+        Returns:
+            dict with transcription, language, and confidence
+        
+        Raises:
+            InferenceBusyError: If the inference executor is saturated
+        """
+        scheduler = get_batch_scheduler(self.model) if self.primary else None
+        if scheduler is not None:
+            if isinstance(audio, str):
+                audio = await asyncio.get_running_loop().run_in_executor(None, load_audio, audio)
+            if scheduler.accepts(audio):
+                with stage_timer("transcribe"):
+                    result = await scheduler.transcribe(audio, language)
+                return self._format_result(result, audio, language)
+        
+        return await get_inference_executor().run(self.transcribe_sync, audio, language)
+    
+    def transcribe_sync(
+        self,
+        audio: AudioInput,
         language: Optional[str] = None
     ) -> dict:
-        """Transcribe audio file to text.
+        """Transcribe audio file to text (blocking).
         
         Args:
-            audio_path: Path to audio file
+            audio: Path to audio file, or decoded 16 kHz mono float32 array
             language: Optional language code (es, en, etc.)
         
         Returns:
             dict with transcription, language, and confidence
         """
         try:
-            logger.info(f"Transcribing audio: {audio_path}")
-            
-            # Transcribe with Whisper
-            result = self.model.transcribe(
-                audio_path,
-                language=language,
-                fp16=False  # Use FP32 for CPU compatibility
-            )
+            if isinstance(audio, str):
+                logger.info(f"Transcribing audio: {audio}")
+            audio = load_audio(audio)
+            if language is None:
+                language = identify_language(self.model, audio)
             
-            transcription = result["text"].strip()
-            detected_language = result.get("language", language or "unknown")
+            # Transcribe with Whisper (long recordings are split and run in parallel)
+            with stage_timer("transcribe"):
+                if self.primary and should_use_long_audio(audio):
+                    result = get_long_audio_transcriber().transcribe(audio, language)
+                else:
+                    result = self.model.transcribe(
+                        audio,
+                        language=language,
+                        fp16=False  # Use FP32 for CPU compatibility
+                    )
             
-            # Calculate average confidence from segments
-            segments = result.get("segments", [])
-            if segments:
-                avg_confidence = sum(s.get("no_speech_prob", 0) for s in segments) / len(segments)
-                confidence = 1.0 - avg_confidence  # Invert no_speech_prob
-            else:
-                confidence = 0.9  # Default confidence if no segments
-            
-            logger.info(f"Transcription complete. Language: {detected_language}, Confidence: {confidence:.2f}")
-            
-            return {
-                "transcription": transcription,
-                "language": detected_language,
-                "confidence": confidence,
-                "duration": result.get("duration", 0)
-            }
+            return self._format_result(result, audio, language)
             
         except Exception as e:
             logger.error(f"Transcription failed: {e}")
             raise
 
-# Singleton instance
-_whisper_service: Optional[WhisperService] = None
+    def _format_result(self, result: dict, audio, language: Optional[str]) -> dict:
+        """Convert a Whisper-style result into the service response dict."""
+        transcription = result["text"].strip()
+        detected_language = result.get("language", language or "unknown")
+        
+        # Calculate average confidence from segments
+        segments = result.get("segments", [])
+        if segments:
+            avg_confidence = sum(s.get("no_speech_prob", 0) for s in segments) / len(segments)
+            confidence = 1.0 - avg_confidence  # Invert no_speech_prob
+        else:
+            confidence = 0.9  # Default confidence if no segments
+        
+        logger.info(f"Transcription complete. Language: {detected_language}, Confidence: {confidence:.2f}")
+        
+        return {
+            "transcription": transcription,
+            "language": detected_language,
+            "confidence": confidence,
+            "duration": duration_seconds(audio)
+        }
+
+# One instance per model size
+_whisper_services: Dict[str, WhisperService] = {}
 
 def get_whisper_service(model_name: str = "base") -> WhisperService:
-    """Get or create Whisper service instance."""
-    global _whisper_service
-    if _whisper_service is None:
-        _whisper_service = WhisperService(model_name)
-    return _whisper_service
+    """Get or create the Whisper service instance for ``model_name``."""
+    if model_name not in _whisper_services:
+        from ..config import settings
+        cpu_threads = settings.WHISPER_CPU_THREADS
+        if not cpu_threads and settings.WHISPER_BACKEND != OPENAI_WHISPER:
+            # CTranslate2 threads are fixed at load: size them like an inference worker
+            cpu_threads = get_inference_executor().layout.threads
+        _whisper_services[model_name] = WhisperService(
+            model_name,
+            backend=settings.WHISPER_BACKEND,
+            compute_type=settings.WHISPER_COMPUTE_TYPE,
+            cpu_threads=cpu_threads,
+            primary=model_name == settings.WHISPER_MODEL
+        )
+    return _whisper_services[model_name]
@@ -0,0 +1,109 @@
+"""Micro-benchmark: speaker alignment on synthetic long transcripts.
+
+Compares the previous all-pairs alignment (every Whisper segment against
+every diarization turn) with the sweep-line engine in
+``app.services.alignment`` and checks both pick the same speakers.
+
+Usage (from backend/):
+    python -m benchmarks.bench_alignment
+    python -m benchmarks.bench_alignment --hours 0.5 1 2 4
+"""
+import argparse
+import random
+import time
+from typing import Dict, List, Tuple
+
+from app.services.alignment import align_segments
+
+
+def synthetic_transcript(hours: float, seed: int = 0) -> Tuple[List[Dict], List[Dict]]:
+    """Build Whisper-like segments (with words) and pyannote-like turns.
+
+    Speakers alternate every 1-8 s; Whisper segments are 2-6 s long and
+    ignore turn boundaries, so many segments span a speaker change.
+    """
+    rng = random.Random(seed)
+    total = hours * 3600
+
+    turns = []
+    t = 0.0
+    speaker = 0
+    while t < total:
+        length = rng.uniform(1.0, 8.0)
+        turns.append({"speaker": f"SPEAKER_{speaker:02d}", "start": t, "end": min(total, t + length)})
+        t += length + rng.uniform(0.0, 0.4)
+        speaker = 1 - speaker
+
+    segments = []
+    t = 0.0
+    while t < total:
+        length = rng.uniform(2.0, 6.0)
+        end = min(total, t + length)
+        words = []
+        w = t
+        while w < end:
+            w_end = min(end, w + rng.uniform(0.15, 0.5))
+            words.append({"word": " palabra", "start": w, "end": w_end, "probability": 0.9})
+            w = w_end
+        segments.append({
+            "start": t,
+            "end": end,
+            "text": "".join(word["word"] for word in words),
+            "no_speech_prob": 0.05,
+            "words": words,
+        })
+        t = end
+    return segments, turns
+
+
+def naive_align(whisper_segments: List[Dict], diarization_segments: List[Dict]) -> List[str]:
+    """All-pairs O(N*M) search, as the original alignment did.
+
+    Overlap is summed per speaker so the result is comparable with the sweep
+    engine (the original kept only the single best turn).
+    """
+    speakers = []
+    for seg in whisper_segments:
+        overlap_by_speaker = {}
+        for turn in diarization_segments:
+            overlap = min(seg["end"], turn["end"]) - max(seg["start"], turn["start"])
+            if overlap > 0:
+                overlap_by_speaker[turn["speaker"]] = overlap_by_speaker.get(turn["speaker"], 0.0) + overlap
+        speakers.append(
+            max(overlap_by_speaker, key=overlap_by_speaker.get) if overlap_by_speaker else "SPEAKER_UNKNOWN"
+        )
+    return speakers
+
+
+def _timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=float, nargs="+", default=[0.25, 0.5, 1.0, 2.0])
+    parser.add_argument("--skip-naive-above", type=float, default=2.0,
+                        help="Skip the quadratic baseline for longer inputs (hours)")
+    args = parser.parse_args()
+
+    print(f"{'hours':>6} {'segments':>9} {'turns':>7} {'naive s':>9} {'sweep s':>9} {'words s':>9} {'speedup':>8}")
+    for hours in args.hours:
+        segments, turns = synthetic_transcript(hours)
+
+        sweep, sweep_s = _timed(align_segments, segments, turns, word_level=False)
+        _, words_s = _timed(align_segments, segments, turns, word_level=True)
+
+        if hours <= args.skip_naive_above:
+            naive, naive_s = _timed(naive_align, segments, turns)
+            assert naive == [s["speaker"] for s in sweep], "sweep alignment disagrees with baseline"
+            naive_col, speedup_col = f"{naive_s:9.3f}", f"{naive_s / sweep_s:7.0f}x"
+        else:
+            naive_col, speedup_col = f"{'-':>9}", f"{'-':>8}"
+
+        print(f"{hours:6.2f} {len(segments):9d} {len(turns):7d} {naive_col} {sweep_s:9.4f} {words_s:9.4f} {speedup_col}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""Benchmark: end-to-end transcription pipeline on synthetic calls.
+
+Generates multi-speaker calls offline (voiced harmonic "syllables" at a
+different pitch per speaker, separated by pauses), runs them through
+``run_transcription`` in simple and diarization mode, and reports real-time
+factor, p50/p95 latency, per-stage timings, peak RSS and throughput with N
+concurrent clients. Results are written as JSON so releases can be compared.
+
+By default Whisper and pyannote are replaced by stand-ins registered in the
+model registry, so no network, HF token or model weights are needed; ffmpeg
+decoding, the inference executor, alignment and role assignment are the
+real code. The stand-ins sleep ``--stand-in-rtf`` seconds per audio second
+to model inference cost. ``--models real`` uses the configured Whisper model
+(weights must already be cached) and, if HF_TOKEN is set, pyannote.
+
+Usage (from backend/):
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --durations 30 120 600 --clients 1 4 --modes simple
+    python -m benchmarks.bench_pipeline --models real --output benchmarks/results/base.json
+"""
+import os
+
+# Settings are read at import time; the benchmark needs no real credentials
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+os.environ.setdefault("API_KEY", "benchmark")
+os.environ.setdefault("PRELOAD_MODELS", "false")
+os.environ.setdefault("VOICEPRINTS_ENABLED", "false")
+# Every request must do the full work
+os.environ["RESULT_CACHE_ENABLED"] = "false"
+
+import argparse
+import asyncio
+import json
+import platform
+import resource
+import subprocess
+import tempfile
+import time
+import wave
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.audio_decoder import SAMPLE_RATE
+from app.services.metrics import STAGES, collect_timings
+from app.services.model_registry import get_model_registry
+from app.services.transcription_service import run_transcription
+from app.services.whisper_engines import engine_key
+
+# Fundamental frequency of each synthetic speaker (Hz)
+SPEAKER_PITCHES = (110.0, 210.0, 160.0)
+
+
+def synthetic_call(seconds: float, speakers: int = 2, seed: int = 0) -> Tuple[np.ndarray, List[Dict]]:
+    """Build a call where speakers alternate in 2-8 s turns.
+
+    Each turn is a run of 150-350 ms harmonic "syllables" at the speaker's
+    pitch, with short gaps inside turns and longer pauses between them.
+
+    Returns:
+        (16 kHz float32 audio, ground-truth turns)
+    """
+    rng = np.random.default_rng(seed)
+    audio = np.zeros(int(seconds * SAMPLE_RATE), np.float32)
+    turns = []
+    t = 0.0
+    speaker = 0
+    while t < seconds - 1.0:
+        end = min(seconds, t + rng.uniform(2.0, 8.0))
+        s = t
+        while s < end - 0.1:
+            n = int(min(end - s, rng.uniform(0.15, 0.35)) * SAMPLE_RATE)
+            start = int(s * SAMPLE_RATE)
+            tt = np.arange(n) / SAMPLE_RATE
+            f0 = SPEAKER_PITCHES[speaker] * rng.uniform(0.97, 1.03)
+            tone = sum(np.sin(2 * np.pi * f0 * h * tt) / h for h in (1, 2, 3))
+            audio[start:start + n] += (0.2 * tone * np.hanning(n)).astype(np.float32)
+            s += n / SAMPLE_RATE + rng.uniform(0.02, 0.1)
+        turns.append({"speaker": f"SPEAKER_{speaker:02d}", "start": t, "end": end})
+        t = end + rng.uniform(0.2, 0.8)
+        speaker = (speaker + 1 + int(rng.integers(0, max(1, speakers - 1)))) % speakers
+    audio += (0.003 * rng.standard_normal(len(audio))).astype(np.float32)
+    return audio, turns
+
+
+def write_wav(path: str, audio: np.ndarray) -> None:
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes((np.clip(audio, -1, 1) * 32767).astype("<i2").tobytes())
+
+
+class StandInWhisper:
+    """Whisper engine stand-in: one ~3 s segment with 0.3 s words per chunk of audio."""
+
+    backend = "stand-in"
+    supports_batching = False
+
+    def __init__(self, rtf: float):
+        self.rtf = rtf
+
+    def parameters(self):
+        return []
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None, word_timestamps: bool = False, **kwargs) -> Dict:
+        duration = len(audio) / SAMPLE_RATE
+        time.sleep(duration * self.rtf)
+        segments = []
+        for start in np.arange(0.0, duration, 3.0):
+            end = min(duration, start + 3.0)
+            words = [
+                {"word": " palabra", "start": float(w), "end": float(min(end, w + 0.3)), "probability": 0.9}
+                for w in np.arange(start, end, 0.3)
+            ]
+            segments.append({
+                "id": len(segments),
+                "start": float(start),
+                "end": float(end),
+                "text": "".join(w["word"] for w in words),
+                "no_speech_prob": 0.05,
+                "words": words if word_timestamps else [],
+            })
+        return {"text": "".join(s["text"] for s in segments), "segments": segments, "language": language or "es"}
+
+
+class StandInDiarization:
+    """pyannote pipeline stand-in: labels 0.5 s windows by their dominant pitch."""
+
+    window = 0.5
+
+    def __init__(self, rtf: float):
+        self.rtf = rtf
+
+    def __call__(self, file, num_speakers: Optional[int] = None, return_embeddings: bool = False):
+        waveform = file["waveform"]
+        audio = np.asarray(waveform.numpy() if hasattr(waveform, "numpy") else waveform).reshape(-1)
+        time.sleep(len(audio) / SAMPLE_RATE * self.rtf)
+
+        n = int(self.window * SAMPLE_RATE)
+        freqs = np.fft.rfftfreq(n, 1 / SAMPLE_RATE)
+        voiced = (freqs > 60) & (freqs < 400)
+        turns = []
+        for i in range(len(audio) // n):
+            frame = audio[i * n:(i + 1) * n]
+            if np.sqrt(np.mean(frame ** 2)) < 0.02:
+                continue
+            f0 = freqs[voiced][np.argmax(np.abs(np.fft.rfft(frame))[voiced])]
+            speaker = f"SPEAKER_{int(np.argmin([abs(f0 - p) for p in SPEAKER_PITCHES])):02d}"
+            start, end = i * self.window, (i + 1) * self.window
+            if turns and turns[-1].label == speaker and turns[-1].end == start:
+                turns[-1].end = end
+            else:
+                turns.append(SimpleNamespace(start=start, end=end, label=speaker))
+
+        annotation = _Annotation(turns)
+        if return_embeddings:
+            labels = annotation.labels()
+            return annotation, np.eye(len(labels), 16, dtype=np.float32)
+        return annotation
+
+
+class _Annotation:
+    def __init__(self, turns):
+        self.turns = turns
+
+    def itertracks(self, yield_label: bool = False):
+        for i, turn in enumerate(self.turns):
+            yield turn, i, turn.label
+
+    def labels(self) -> List[str]:
+        return sorted({turn.label for turn in self.turns})
+
+
+def install_stand_ins(rtf: float) -> None:
+    """Register stand-in models under the keys the services load."""
+    from app.services.diarization_service import DIARIZATION_MODEL
+
+    registry = get_model_registry()
+    registry.get(
+        engine_key(settings.WHISPER_MODEL, settings.WHISPER_BACKEND, settings.WHISPER_COMPUTE_TYPE),
+        lambda: StandInWhisper(rtf)
+    )
+    registry.get(f"pyannote:{DIARIZATION_MODEL}", lambda: StandInDiarization(rtf))
+    settings.HF_TOKEN = settings.HF_TOKEN or "stand-in"
+    # Worker processes would load real models
+    settings.LONG_AUDIO_WORKERS = 0
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    return round(float(np.percentile(values, q)), 4) if values else None
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / 1024 if platform.system() == "Linux" else peak / (1024 * 1024), 1)
+
+
+async def _one_request(path: str, duration: float, mode: str) -> Dict:
+    timings = collect_timings()
+    started = time.perf_counter()
+    await run_transcription(audio=path, mode=mode, language="es" if mode == "simple" else None)
+    latency = time.perf_counter() - started
+    return {"latency": latency, "rtf": latency / duration, "timings": dict(timings)}
+
+
+async def run_scenario(path: str, duration: float, mode: str, clients: int, requests: int) -> Dict:
+    """Run ``requests`` transcriptions of one file from ``clients`` concurrent clients."""
+    remaining = list(range(requests))
+    samples: List[Dict] = []
+
+    async def client():
+        while remaining:
+            remaining.pop()
+            # Own task per request, so stage timings are collected per request
+            samples.append(await asyncio.create_task(_one_request(path, duration, mode)))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    wall = time.perf_counter() - started
+
+    latencies = [s["latency"] for s in samples]
+    rtfs = [s["rtf"] for s in samples]
+    stages = {}
+    for stage in STAGES:
+        values = [s["timings"][stage] for s in samples if stage in s["timings"]]
+        if values:
+            stages[stage] = {"p50": percentile(values, 50), "p95": percentile(values, 95)}
+
+    return {
+        "mode": mode,
+        "audio_seconds": duration,
+        "clients": clients,
+        "requests": len(samples),
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "rtf_p50": percentile(rtfs, 50),
+        "rtf_p95": percentile(rtfs, 95),
+        "throughput_rps": round(len(samples) / wall, 3),
+        "audio_hours_per_hour": round(len(samples) * duration / wall, 2),
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": stages,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> Dict:
+    # Enough queue slots that throughput is measured without load shedding
+    settings.INFERENCE_QUEUE_DEPTH = max(settings.INFERENCE_QUEUE_DEPTH, max(args.clients))
+    if args.models == "stand-in":
+        install_stand_ins(args.stand_in_rtf)
+    modes = [m for m in args.modes if m == "simple" or settings.HF_TOKEN]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for duration in args.durations:
+            audio, _ = synthetic_call(duration, speakers=args.speakers, seed=int(duration))
+            path = os.path.join(tmp, f"call_{int(duration)}s.wav")
+            write_wav(path, audio)
+            for mode in modes:
+                # Warm-up: model load and first-call overheads are not part of the numbers
+                await run_transcription(audio=path, mode=mode)
+                for clients in args.clients:
+                    result = await run_scenario(path, duration, mode, clients, max(args.requests, clients))
+                    results.append(result)
+                    print(f"{mode:>11} {duration:7.0f}s {clients:3d} clients  "
+                          f"p50 {result['latency_p50']:7.2f}s  p95 {result['latency_p95']:7.2f}s  "
+                          f"RTF {result['rtf_p50']:.3f}  {result['audio_hours_per_hour']:7.1f} audio-h/h  "
+                          f"RSS {result['peak_rss_mb']:.0f} MB")
+
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "models": args.models,
+            "stand_in_rtf": args.stand_in_rtf if args.models == "stand-in" else None,
+            "whisper_model": settings.WHISPER_MODEL,
+            "whisper_backend": settings.WHISPER_BACKEND,
+            "inference_workers": settings.INFERENCE_WORKERS,
+            "speakers": args.speakers,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=float, nargs="+", default=[30, 120, 600],
+                        help="Synthetic call lengths (seconds)")
+    parser.add_argument("--modes", nargs="+", choices=["simple", "diarization"], default=["simple", "diarization"])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4], help="Concurrent clients per scenario")
+    parser.add_argument("--requests", type=int, default=4, help="Requests per scenario (at least one per client)")
+    parser.add_argument("--speakers", type=int, default=2)
+    parser.add_argument("--models", choices=["stand-in", "real"], default="stand-in")
+    parser.add_argument("--stand-in-rtf", type=float, default=0.05,
+                        help="Seconds each stand-in model spends per second of audio")
+    parser.add_argument("--output", help="JSON report path (default: benchmarks/results/pipeline-<time>.json)")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+
+    output = args.output or os.path.join(
+        os.path.dirname(__file__), "results", f"pipeline-{datetime.utcnow():%Y%m%dT%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""Test configuration: settings the app requires, set before it is imported."""
+import os
+import tempfile
+
+import pytest
+
+os.environ.setdefault("SUPABASE_URL", "http://supabase.test")
+os.environ.setdefault("SUPABASE_KEY", "test-key")
+os.environ.setdefault("API_KEY", "test-api-key")
+os.environ.setdefault("JOBS_DIR", tempfile.mkdtemp(prefix="jobs-"))
+os.environ.setdefault("PRELOAD_MODELS", "false")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _local_state_dirs(tmp_path_factory):
+    """Keep the cache, voiceprints and outbox out of the working tree's data/.
+
+    Exported to the environment too, for tests that start the app in a subprocess.
+    """
+    from app.config import settings
+
+    paths = {
+        "RESULT_CACHE_DIR": tmp_path_factory.mktemp("cache"),
+        "VOICEPRINT_DIR": tmp_path_factory.mktemp("voiceprints"),
+        "PERSIST_OUTBOX_PATH": tmp_path_factory.mktemp("outbox") / "outbox.db",
+    }
+    for name, path in paths.items():
+        os.environ[name] = str(path)
+        setattr(settings, name, str(path))
@@ -0,0 +1,71 @@
+"""Tests for aligning Whisper segments with diarization turns."""
+from app.services.alignment import UNKNOWN_SPEAKER, TurnSweep, align_segments
+
+TURNS = [
+    {"start": 0.0, "end": 2.0, "speaker": "SPEAKER_00"},
+    {"start": 2.0, "end": 5.0, "speaker": "SPEAKER_01"},
+    {"start": 6.0, "end": 8.0, "speaker": "SPEAKER_00"},
+]
+
+
+def test_best_speaker_picks_largest_overlap():
+    sweep = TurnSweep(TURNS)
+    assert sweep.best_speaker(0.5, 1.5) == "SPEAKER_00"
+    assert sweep.best_speaker(1.5, 4.0) == "SPEAKER_01"
+    assert sweep.best_speaker(5.2, 5.8) is None
+    assert sweep.best_speaker(6.5, 7.0) == "SPEAKER_00"
+
+
+def test_best_speaker_rewinds_on_out_of_order_query():
+    sweep = TurnSweep(list(reversed(TURNS)))
+    assert sweep.best_speaker(6.5, 7.0) == "SPEAKER_00"
+    assert sweep.best_speaker(2.5, 3.0) == "SPEAKER_01"
+    assert sweep.best_speaker(0.1, 0.2) == "SPEAKER_00"
+
+
+def test_segment_level_alignment_sorts_and_marks_unknown():
+    segments = [
+        {"start": 6.0, "end": 7.5, "text": " bye ", "no_speech_prob": 0.25},
+        {"start": 0.0, "end": 1.8, "text": " hello "},
+        {"start": 5.1, "end": 5.9, "text": " silence"},
+    ]
+    aligned = align_segments(segments, TURNS, word_level=False)
+    assert [a["text"] for a in aligned] == ["hello", "silence", "bye"]
+    assert [a["speaker"] for a in aligned] == ["SPEAKER_00", UNKNOWN_SPEAKER, "SPEAKER_00"]
+    assert aligned[2]["confidence"] == 0.75
+
+
+def test_word_level_alignment_splits_on_speaker_change():
+    segment = {
+        "start": 1.0, "end": 3.5, "text": " hi there how are you",
+        "words": [
+            {"start": 1.0, "end": 1.4, "word": " hi"},
+            {"start": 1.5, "end": 1.9, "word": " there"},
+            {"start": 2.2, "end": 2.6, "word": " how"},
+            {"start": 2.7, "end": 3.0, "word": " are"},
+            {"start": 3.1, "end": 3.5, "word": " you"},
+        ],
+    }
+    aligned = align_segments([segment], TURNS)
+    assert [(a["speaker"], a["text"], a["start"], a["end"]) for a in aligned] == [
+        ("SPEAKER_00", "hi there", 1.0, 1.9),
+        ("SPEAKER_01", "how are you", 2.2, 3.5),
+    ]
+
+
+def test_gap_words_follow_neighbouring_speaker():
+    segment = {
+        "start": 5.0, "end": 7.0, "text": " um well then",
+        "words": [
+            {"start": 5.2, "end": 5.5, "word": " um"},
+            {"start": 6.1, "end": 6.5, "word": " well"},
+            {"start": 6.6, "end": 7.0, "word": " then"},
+        ],
+    }
+    aligned = align_segments([segment], [{"start": 6.0, "end": 8.0, "speaker": "SPEAKER_00"}])
+    assert [(a["speaker"], a["text"], a["start"]) for a in aligned] == [("SPEAKER_00", "um well then", 5.2)]
+
+
+def test_word_level_without_words_falls_back_to_segment():
+    aligned = align_segments([{"start": 2.5, "end": 4.0, "text": "ok"}], TURNS)
+    assert aligned == [{"speaker": "SPEAKER_01", "start": 2.5, "end": 4.0, "text": "ok", "confidence": 1.0}]
@@ -0,0 +1,69 @@
+"""Tests for decoding audio once into a shared PCM buffer."""
+import asyncio
+import shutil
+import wave
+
+import numpy as np
+import pytest
+
+from app.services.audio_decoder import (
+    SAMPLE_RATE, StreamingDecoder, decode_audio, duration_seconds, load_audio, pcm16_to_float32
+)
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+
+
+def _write_wav(path, seconds=1.0, sample_rate=SAMPLE_RATE):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    samples = (0.5 * np.sin(2 * np.pi * 440 * t) * 32767).astype(np.int16)
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(samples.tobytes())
+    return path
+
+
+def test_pcm16_conversion_scales_to_unit_range():
+    pcm = np.array([0, 16384, -32768], dtype=np.int16).tobytes()
+    assert pcm16_to_float32(pcm).tolist() == [0.0, 0.5, -1.0]
+
+
+def test_decoded_arrays_pass_through_unchanged():
+    audio = np.zeros(SAMPLE_RATE, np.float32)
+    assert load_audio(audio) is audio
+    assert duration_seconds(audio) == 1.0
+
+
+@needs_ffmpeg
+def test_decode_resamples_to_16k_mono(tmp_path):
+    audio = decode_audio(str(_write_wav(tmp_path / "a.wav", seconds=2.0, sample_rate=8000)))
+    assert audio.dtype == np.float32
+    assert duration_seconds(audio) == pytest.approx(2.0, abs=0.01)
+    assert np.abs(audio).max() == pytest.approx(0.5, abs=0.02)
+
+
+@needs_ffmpeg
+def test_decode_failure_is_reported(tmp_path):
+    bad = tmp_path / "bad.wav"
+    bad.write_bytes(b"not audio")
+    with pytest.raises(RuntimeError):
+        decode_audio(str(bad))
+
+
+@needs_ffmpeg
+def test_streaming_decoder_matches_file_decode(tmp_path):
+    path = _write_wav(tmp_path / "a.wav")
+    data = path.read_bytes()
+    blocks = []
+
+    async def main():
+        decoder = StreamingDecoder(on_pcm=blocks.append)
+        await decoder.start()
+        for i in range(0, len(data), 1000):
+            await decoder.feed(data[i:i + 1000])
+        return await decoder.finish()
+
+    streamed = asyncio.run(main())
+    assert np.array_equal(streamed, decode_audio(str(path)))
+    assert sum(len(b) for b in blocks) == len(streamed)
@@ -0,0 +1,121 @@
+"""Tests for micro-batching of short clips."""
+import asyncio
+
+import numpy as np
+
+from app.services.batch_scheduler import BatchScheduler
+from app.services.inference_executor import InferenceExecutor
+from app.services.inference_scheduler import FairScheduler, InferenceTicket, inference_ticket
+
+
+class FakeEngine:
+    supports_batching = True
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe_batch(self, clips, language):
+        self.calls.append((len(clips), language))
+        return [{"text": f"{len(clip)}", "language": language} for clip in clips]
+
+
+def _clip(samples):
+    return np.zeros(samples, dtype=np.float32)
+
+
+def test_concurrent_clips_share_one_batch_per_language():
+    engine = FakeEngine()
+
+    async def main():
+        scheduler = BatchScheduler(engine, InferenceExecutor(max_workers=1), window_ms=20, max_batch_size=8)
+        results = await asyncio.gather(
+            scheduler.transcribe(_clip(100), "es"),
+            scheduler.transcribe(_clip(200), "en"),
+            scheduler.transcribe(_clip(300), "es"),
+        )
+        return scheduler, results
+
+    scheduler, results = asyncio.run(main())
+    assert [r["text"] for r in results] == ["100", "200", "300"]
+    assert [r["language"] for r in results] == ["es", "en", "es"]
+    assert sorted(engine.calls) == [(1, "en"), (2, "es")]
+    assert scheduler.stats()["batches"] == 1
+    assert not scheduler._tasks
+
+
+def test_full_batch_is_dispatched_without_waiting_for_the_window():
+    engine = FakeEngine()
+
+    async def main():
+        scheduler = BatchScheduler(engine, InferenceExecutor(max_workers=1), window_ms=60000, max_batch_size=2)
+        return await asyncio.wait_for(
+            asyncio.gather(scheduler.transcribe(_clip(1)), scheduler.transcribe(_clip(2))), timeout=5
+        )
+
+    assert len(asyncio.run(main())) == 2
+
+
+def test_batch_is_charged_to_each_callers_ticket():
+    seen = []
+
+    class RecordingScheduler(FairScheduler):
+        async def acquire(self, ticket):
+            seen.append(ticket)
+            await super().acquire(ticket)
+
+    async def main():
+        fair = RecordingScheduler(1, {"simple": 1.0})
+        scheduler = BatchScheduler(FakeEngine(), InferenceExecutor(max_workers=1, scheduler=fair), window_ms=20)
+
+        async def call(user_id, seconds):
+            with inference_ticket("simple", user_id, seconds):
+                return await scheduler.transcribe(_clip(10))
+
+        await asyncio.gather(call("alice", 3.0), call("bob", 5.0))
+        return fair
+
+    fair = asyncio.run(main())
+    assert len(seen) == 1
+    assert [(t.user_id, t.audio_seconds) for t in seen[0].members()] == [("alice", 3.0), ("bob", 5.0)]
+    assert fair.stats()["lanes"]["simple"]["dispatched"] == 2
+    assert fair.stats()["users_running"] == 0
+
+
+def test_engine_failure_reaches_every_caller():
+    class FailingEngine(FakeEngine):
+        def transcribe_batch(self, clips, language):
+            raise RuntimeError("decoder crashed")
+
+    async def main():
+        scheduler = BatchScheduler(FailingEngine(), InferenceExecutor(max_workers=1), window_ms=10)
+        return await asyncio.gather(
+            scheduler.transcribe(_clip(1)), scheduler.transcribe(_clip(2)), return_exceptions=True
+        )
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(main()))
+
+
+def test_share_tickets_count_against_each_user_cap():
+    fair = FairScheduler(2, {"simple": 1.0}, user_max_running=1)
+    batch = InferenceTicket(shares=[InferenceTicket(user_id="alice"), InferenceTicket(user_id="bob")])
+
+    async def main():
+        await fair.acquire(batch)
+        blocked = asyncio.ensure_future(fair.acquire(InferenceTicket(user_id="bob")))
+        await asyncio.sleep(0)
+        assert not blocked.done()
+        fair.release(batch)
+        await asyncio.wait_for(blocked, timeout=1)
+
+    asyncio.run(main())
+
+
+def test_close_cancels_waiting_callers():
+    async def main():
+        scheduler = BatchScheduler(FakeEngine(), InferenceExecutor(max_workers=1), window_ms=60000)
+        waiting = asyncio.ensure_future(scheduler.transcribe(_clip(1)))
+        await asyncio.sleep(0)
+        scheduler.close()
+        return await asyncio.gather(waiting, return_exceptions=True)
+
+    assert isinstance(asyncio.run(main())[0], asyncio.CancelledError)
@@ -0,0 +1,146 @@
+"""Tests for batch manifests, resumable submission and progress reports."""
+import asyncio
+import json
+
+import pytest
+
+from app.services.batch_service import (
+    BATCH_PRIORITY,
+    BatchOwnerError,
+    BatchSourceError,
+    batch_status,
+    fetch_batch_audio,
+    load_manifest,
+    result_line,
+    submit_batch,
+)
+from app.config import settings
+from app.services.job_store import JobStore
+from app.models.batch import BatchItem
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.db"))
+
+
+def test_load_manifest_formats(tmp_path):
+    jsonl = tmp_path / "m.jsonl"
+    jsonl.write_text('{"audio_url": "audios/a.m4a", "mode": "diarization", "cliente_id": 7}\n\n'
+                     '{"audio_url": "audios/b.m4a"}\n')
+    csv_file = tmp_path / "m.csv"
+    csv_file.write_text("audio_url,language,ejecutivo_id\naudios/a.m4a,es,\naudios/b.m4a,,e-1\n")
+    txt = tmp_path / "m.txt"
+    txt.write_text("# archive\naudios/a.m4a\n\n/srv/calls/b.wav\n")
+
+    items = load_manifest(str(jsonl))
+    assert [(i.audio_url, i.mode, i.cliente_id) for i in items] == [
+        ("audios/a.m4a", "diarization", 7), ("audios/b.m4a", "simple", None)
+    ]
+    items = load_manifest(str(csv_file))
+    assert [(i.language, i.ejecutivo_id) for i in items] == [("es", None), (None, "e-1")]
+    assert [i.audio_url for i in load_manifest(str(txt))] == ["audios/a.m4a", "/srv/calls/b.wav"]
+
+
+def test_resubmitting_queues_only_new_items(store):
+    items = [BatchItem(audio_url=f"audios/{n}.m4a") for n in range(3)]
+    batch, added = submit_batch(store, "archive-2023", "owner", items)
+    assert added == 3
+
+    again, added = submit_batch(store, "archive-2023", "owner", items + [BatchItem(audio_url="audios/3.m4a")])
+    assert again["id"] == batch["id"]
+    assert added == 1
+
+    job = store.claim_next()
+    assert job["priority"] == BATCH_PRIORITY
+    assert job["batch_id"] == batch["id"]
+
+
+def test_items_carry_user_and_context(store):
+    items = [
+        BatchItem(audio_url="audios/a.m4a", cliente_id=3, ejecutivo_id="e-1", language="es"),
+        BatchItem(audio_url="audios/b.m4a", user_id="someone-else"),
+    ]
+    submit_batch(store, "b", "owner", items)
+    first, second = store.claim_next(), store.claim_next()
+    assert (first["user_id"], first["context"], first["language"]) == (
+        "owner", {"cliente_id": 3, "ejecutivo_id": "e-1"}, "es"
+    )
+    assert (second["user_id"], second["context"]) == ("someone-else", None)
+
+
+def test_batch_names_belong_to_their_owner(store):
+    submit_batch(store, "mine", "owner", [BatchItem(audio_url="audios/a.m4a")])
+    with pytest.raises(BatchOwnerError):
+        submit_batch(store, "mine", "intruder", [])
+
+
+def test_status_reports_progress_and_throughput(store):
+    items = [BatchItem(audio_url=f"audios/{n}.m4a") for n in range(4)]
+    batch, _ = submit_batch(store, "b", "owner", items)
+    status = batch_status(store, batch)
+    assert (status.total, status.queued, status.progress, status.elapsed_seconds) == (4, 4, 0.0, 0.0)
+    assert status.audio_hours_per_hour is None
+
+    done = store.claim_next()
+    failed = store.claim_next()
+    store.claim_next()
+    store.complete(done["id"], {"duration_seconds": 1800.0})
+    store.fail(failed["id"], "bad audio")
+
+    started = store.get(done["id"])["started_at"]
+    status = batch_status(store, batch, now=started + 3600)
+    assert (status.queued, status.running, status.done, status.failed) == (1, 1, 1, 1)
+    assert status.progress == 0.5
+    assert status.audio_hours == 0.5
+    assert status.elapsed_seconds == pytest.approx(3600, abs=1)
+    assert status.audio_hours_per_hour == pytest.approx(0.5, abs=0.01)
+    assert status.results_url == f"/api/v1/batches/{batch['id']}/results"
+
+
+def test_result_lines_follow_manifest_order(store):
+    batch, _ = submit_batch(store, "b", "owner", [BatchItem(audio_url=f"audios/{n}.m4a") for n in range(3)])
+    jobs = [store.claim_next() for _ in range(3)]
+    for job in reversed(jobs):
+        store.complete(job["id"], {"text": job["source"]})
+
+    lines = [json.loads(result_line(job)) for job in store.iter_batch_results(batch["id"], page_size=2)]
+    assert [line["item_index"] for line in lines] == [0, 1, 2]
+    assert lines[1] == {
+        "item_index": 1, "audio_url": "audios/1.m4a", "user_id": "owner",
+        "status": "done", "error": None, "result": {"text": "audios/1.m4a"},
+    }
+
+
+def _local_item_job(path):
+    return {"id": "job-1", "source": str(path)}
+
+
+def test_local_files_are_read_only_inside_batch_local_dir(tmp_path, monkeypatch):
+    archive = tmp_path / "archive"
+    archive.mkdir()
+    inside = archive / "call.wav"
+    inside.write_bytes(b"audio")
+    outside = tmp_path / "secret.txt"
+    outside.write_text("not audio")
+
+    monkeypatch.setattr(settings, "BATCH_LOCAL_DIR", str(archive))
+    assert asyncio.run(fetch_batch_audio(_local_item_job(inside))) == (str(inside), False)
+    with pytest.raises(BatchSourceError):
+        asyncio.run(fetch_batch_audio(_local_item_job(outside)))
+    with pytest.raises(BatchSourceError):
+        asyncio.run(fetch_batch_audio(_local_item_job(archive / ".." / "secret.txt")))
+
+    monkeypatch.setattr(settings, "BATCH_LOCAL_DIR", None)
+    with pytest.raises(BatchSourceError):
+        asyncio.run(fetch_batch_audio(_local_item_job(inside)))
+
+
+def test_cli_rejects_manifests_with_files_outside_batch_local_dir(tmp_path, monkeypatch, capsys):
+    from app import batch
+
+    manifest = tmp_path / "m.txt"
+    manifest.write_text(f"{tmp_path / 'm.txt'}\n")
+    monkeypatch.setattr(settings, "BATCH_LOCAL_DIR", None)
+    assert asyncio.run(batch.run(batch.parse_args([str(manifest), "--submit-only"]))) == 2
+    assert "outside BATCH_LOCAL_DIR" in capsys.readouterr().err
@@ -0,0 +1,134 @@
+"""Tests for the split of CPU cores between inference workers."""
+import threading
+
+import pytest
+
+from app.config import settings
+from app.services import cpu_layout, diarization_service, inference_executor, long_audio
+from app.services.cpu_layout import calibrate, current_worker, plan_layout, process_cores, set_process_share
+from app.services.inference_executor import InferenceExecutor
+
+# Four physical cores with two SMT siblings each
+CORES = [[0, 4], [1, 5], [2, 6], [3, 7]]
+
+
+def test_workers_get_disjoint_blocks_of_whole_cores():
+    layout = plan_layout(CORES, workers=2)
+    assert [slot.cpus for slot in layout.slots] == [[0, 1, 4, 5], [2, 3, 6, 7]]
+    assert [slot.threads for slot in layout.slots] == [2, 2]
+    assert layout.stats()["threads_per_worker"] == 2
+
+
+def test_uneven_split_gives_earlier_workers_the_extra_core():
+    layout = plan_layout(CORES[:3], workers=2, threads=0)
+    assert [slot.threads for slot in layout.slots] == [2, 1]
+    assert layout.threads == 1
+
+
+def test_more_workers_than_cores_share_cores_with_one_thread():
+    layout = plan_layout(CORES[:2], workers=3)
+    assert [slot.cpus for slot in layout.slots] == [[0, 4], [1, 5], [0, 4]]
+    assert all(slot.threads == 1 for slot in layout.slots)
+
+
+def test_explicit_thread_count_wins():
+    assert plan_layout(CORES, workers=2, threads=3).threads == 3
+
+
+def test_process_share_takes_its_block_of_cores(monkeypatch):
+    monkeypatch.setattr(cpu_layout, "available_cpus", lambda: list(range(8)))
+    monkeypatch.setattr(cpu_layout, "physical_cores", lambda cpus: CORES)
+    try:
+        set_process_share(1, 2)
+        assert process_cores() == [[2, 6], [3, 7]]
+        set_process_share(0, 8)  # More processes than cores: every process sees all of them
+        assert process_cores() == CORES
+    finally:
+        set_process_share(0, 1)
+
+
+def test_calibrate_prefers_fewer_workers_unless_clearly_faster():
+    lock = threading.Lock()
+
+    def serial_run():
+        # Serialised calls: more workers bring no throughput
+        with lock:
+            pass
+
+    layout = calibrate(serial_run, CORES, max_workers=4)
+    assert layout.source == "calibrated"
+    assert set(layout.calibration) == {"1x4", "2x2", "4x1"}
+    assert layout.workers >= 1
+
+
+def test_executor_threads_run_as_their_slot():
+    executor = InferenceExecutor(layout=plan_layout(CORES, workers=2))
+    seen = set()
+    barrier = threading.Barrier(2)
+
+    def record():
+        barrier.wait(timeout=5)
+        seen.add(current_worker().index)
+
+    futures = [executor._pool.submit(record) for _ in range(2)]
+    for future in futures:
+        future.result(timeout=5)
+    executor.shutdown()
+    assert seen == {0, 1}
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    executor = InferenceExecutor(layout=plan_layout(CORES, workers=2))
+    monkeypatch.setattr(inference_executor, "_inference_executor", executor)
+    monkeypatch.setattr(settings, "PARALLEL_DIARIZATION", True)
+    monkeypatch.setattr(settings, "DIARIZATION_THREADS", 0)
+    monkeypatch.setattr(settings, "TRANSCRIPTION_THREADS", 0)
+    yield executor
+    diarization_service.shutdown_stage_pools()
+    executor.shutdown()
+
+
+def test_stage_threads_split_their_workers_budget(executor):
+    pools = diarization_service.get_stage_pools()
+    diarize_pool, transcribe_pool = pools.for_worker(executor.layout.slots[1])
+
+    diarize_slot = diarize_pool.submit(current_worker).result(timeout=5)
+    transcribe_slot = transcribe_pool.submit(current_worker).result(timeout=5)
+    # Worker 1 has two cores: one thread per stage
+    assert (diarize_slot.index, diarize_slot.threads) == (1, 1)
+    assert (transcribe_slot.index, transcribe_slot.threads) == (1, 1)
+    assert diarize_slot.cpus == executor.layout.slots[1].cpus
+
+
+def test_stage_pools_follow_the_executor_layout(executor):
+    before = diarization_service.get_stage_pools()
+    assert diarization_service.get_stage_pools() is before
+
+    executor.apply_layout(plan_layout(CORES, workers=4))
+    after = diarization_service.get_stage_pools()
+    assert after is not before
+    assert after.layout.workers == 4
+    assert after.for_worker(after.layout.slots[3])[0].submit(current_worker).result(timeout=5).index == 3
+
+
+def test_stage_budget_overrides(monkeypatch):
+    monkeypatch.setattr(settings, "DIARIZATION_THREADS", 3)
+    monkeypatch.setattr(settings, "TRANSCRIPTION_THREADS", 0)
+    slot = plan_layout(CORES, workers=1).slots[0]
+    assert diarization_service.stage_thread_budgets(slot) == (3, 1)
+
+
+def test_long_audio_threads_come_from_the_layout(executor, monkeypatch):
+    created = {}
+
+    class FakeTranscriber:
+        def __init__(self, **kwargs):
+            created.update(kwargs)
+
+    monkeypatch.setattr(long_audio, "LongAudioTranscriber", FakeTranscriber)
+    monkeypatch.setattr(long_audio, "_long_audio_transcriber", None)
+    monkeypatch.setattr(settings, "LONG_AUDIO_WORKERS", 4)
+    long_audio.get_long_audio_transcriber()
+    # The waiting worker's 2 threads, not the machine's 4: at most 2 processes of 1 thread
+    assert (created["workers"], created["threads_per_worker"]) == (2, 1)
@@ -0,0 +1,115 @@
+"""Tests for running diarization and Whisper side by side."""
+import threading
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.services import diarization_service, inference_executor
+from app.services.cpu_layout import plan_layout
+from app.services.diarization_service import transcribe_with_diarization_sync
+from app.services.inference_executor import InferenceExecutor
+
+AUDIO = np.zeros(16000 * 4, dtype=np.float32)
+TURNS = [
+    {"speaker": "SPEAKER_00", "start": 0.0, "end": 2.0},
+    {"speaker": "SPEAKER_01", "start": 2.0, "end": 4.0},
+]
+
+
+class FakeDiarization:
+    def __init__(self, barrier=None, error=None):
+        self.barrier = barrier
+        self.error = error
+        self.thread = None
+
+    def diarize(self, audio, num_speakers=None, return_embeddings=False):
+        self.thread = threading.current_thread().name
+        if self.barrier is not None:
+            self.barrier.wait(timeout=5)
+        if self.error is not None:
+            raise self.error
+        return list(TURNS)
+
+
+class FakeWhisper:
+    def __init__(self, barrier=None):
+        self.barrier = barrier
+        self.thread = None
+        self.finished = False
+
+    def transcribe(self, audio, language=None, fp16=False, word_timestamps=False):
+        self.thread = threading.current_thread().name
+        if self.barrier is not None:
+            self.barrier.wait(timeout=5)
+        self.finished = True
+        return {
+            "text": " hola buenas",
+            "language": language,
+            "segments": [
+                {"start": 0.2, "end": 1.5, "text": " hola", "no_speech_prob": 0.1},
+                {"start": 2.5, "end": 3.5, "text": " buenas", "no_speech_prob": 0.1},
+            ],
+        }
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    executor = InferenceExecutor(layout=plan_layout([[0], [1]], workers=1))
+    monkeypatch.setattr(inference_executor, "_inference_executor", executor)
+    monkeypatch.setattr(settings, "VOICEPRINTS_ENABLED", False)
+    monkeypatch.setattr(settings, "LONG_AUDIO_WORKERS", 0)
+
+    def use(diarization, parallel=True):
+        monkeypatch.setattr(settings, "PARALLEL_DIARIZATION", parallel)
+        monkeypatch.setattr(diarization_service, "get_diarization_service", lambda hf_token=None: diarization)
+
+    yield use
+    diarization_service.shutdown_stage_pools()
+    executor.shutdown()
+
+
+def test_stages_run_concurrently_on_their_own_threads(pipeline):
+    # Each stage waits for the other: this only completes if both run at once
+    barrier = threading.Barrier(2)
+    diarization, whisper = FakeDiarization(barrier), FakeWhisper(barrier)
+    pipeline(diarization)
+
+    result = transcribe_with_diarization_sync(AUDIO, whisper, "token", language="es")
+
+    assert diarization.thread.startswith("diarize-stage-0")
+    assert whisper.thread.startswith("transcribe-stage-0")
+    assert result["language"] == "es"
+    assert result["num_speakers"] == 2
+    assert [(s["speaker"], s["text"], s["role"]) for s in result["segments"]] == [
+        ("SPEAKER_00", "hola", "ejecutivo"),
+        ("SPEAKER_01", "buenas", "cliente"),
+    ]
+    assert result["duration"] == 4.0
+
+
+def test_sequential_fallback_gives_the_same_result(pipeline):
+    pipeline(FakeDiarization(), parallel=False)
+    whisper = FakeWhisper()
+    result = transcribe_with_diarization_sync(AUDIO, whisper, "token", language="es")
+    assert whisper.thread == threading.current_thread().name
+    assert [s["speaker"] for s in result["segments"]] == ["SPEAKER_00", "SPEAKER_01"]
+
+
+def test_failed_stage_raises_after_the_other_finishes(pipeline):
+    barrier = threading.Barrier(2)
+    whisper = FakeWhisper(barrier)
+    pipeline(FakeDiarization(barrier, error=RuntimeError("pyannote failed")))
+    with pytest.raises(RuntimeError, match="pyannote failed"):
+        transcribe_with_diarization_sync(AUDIO, whisper, "token", language="es")
+    assert whisper.finished
+
+
+def test_no_speakers_is_an_error(pipeline):
+    class Silent(FakeDiarization):
+        def diarize(self, audio, num_speakers=None, return_embeddings=False):
+            return []
+
+    pipeline(Silent())
+    with pytest.raises(ValueError, match="No speakers"):
+        transcribe_with_diarization_sync(AUDIO, FakeWhisper(), "token", language="es")
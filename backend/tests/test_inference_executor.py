@@ -0,0 +1,102 @@
+"""Tests for the bounded inference executor."""
+import asyncio
+import threading
+
+import pytest
+
+from app.services.cpu_layout import plan_layout
+from app.services.inference_executor import InferenceBusyError, InferenceExecutor
+from app.services.metrics import collect_timings, record_stage
+
+
+def _executor(**kwargs):
+    return InferenceExecutor(layout=plan_layout([[0]], 1), **kwargs)
+
+
+def test_calls_run_off_the_event_loop_thread():
+    async def main():
+        executor = _executor()
+        loop_thread = threading.get_ident()
+        worker_thread = await executor.run(threading.get_ident)
+        executor.shutdown()
+        return loop_thread, worker_thread
+
+    loop_thread, worker_thread = asyncio.run(main())
+    assert loop_thread != worker_thread
+
+
+def test_calls_beyond_workers_and_queue_are_rejected():
+    release = threading.Event()
+
+    async def main():
+        executor = _executor(queue_depth=1, retry_after=7)
+        running = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(InferenceBusyError) as busy:
+            await executor.run(release.wait)
+        stats = executor.stats()
+        release.set()
+        await asyncio.gather(*running)
+        executor.shutdown()
+        return busy.value, stats
+
+    error, stats = asyncio.run(main())
+    assert error.retry_after == 7
+    assert stats["rejected"] == 1
+    assert stats["running"] == 1 and stats["queued"] == 1
+
+
+def test_stage_timings_recorded_on_the_worker_reach_the_caller():
+    async def main():
+        executor = _executor()
+        timings = collect_timings()
+        await executor.run(record_stage, "transcribe", 1.5)
+        executor.shutdown()
+        return timings
+
+    timings = asyncio.run(main())
+    assert timings["transcribe"] == 1.5
+    assert "queue" in timings
+
+
+def test_errors_propagate_and_free_the_slot():
+    def fail():
+        raise ValueError("bad audio")
+
+    async def main():
+        executor = _executor(queue_depth=0)
+        with pytest.raises(ValueError):
+            await executor.run(fail)
+        result = await executor.run(lambda: 42)
+        executor.shutdown()
+        return result
+
+    assert asyncio.run(main()) == 42
+
+
+def test_cancelled_caller_keeps_its_slot_until_the_call_ends():
+    release = threading.Event()
+
+    async def main():
+        executor = _executor(queue_depth=0)
+        caller = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+        caller.cancel()
+        await asyncio.gather(caller, return_exceptions=True)
+
+        stats = executor.stats()
+        # The call is still running on its thread, so there is no room for another
+        with pytest.raises(InferenceBusyError):
+            await asyncio.wait_for(executor.run(lambda: 42), timeout=1)
+        release.set()
+        await asyncio.sleep(0.05)
+        result = await executor.run(lambda: 42)
+        executor.shutdown()
+        return stats, result
+
+    try:
+        stats, result = asyncio.run(main())
+    finally:
+        release.set()
+    assert stats["running"] == 1
+    assert result == 42
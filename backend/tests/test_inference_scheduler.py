@@ -0,0 +1,155 @@
+"""Tests for fair scheduling of inference calls between lanes and users."""
+import asyncio
+from types import SimpleNamespace
+
+from app.services import inference_scheduler
+from app.services.inference_scheduler import FairScheduler, InferenceTicket, current_ticket, inference_ticket
+
+
+def _scheduler(slots=1, **kwargs):
+    kwargs.setdefault("weights", {"simple": 1.0, "diarization": 1.0})
+    kwargs.setdefault("aging_rate", 0.0)
+    return FairScheduler(slots, **kwargs)
+
+
+async def _dispatch_order(scheduler, tickets):
+    """Queue ``tickets`` behind a running call, then free one slot at a time."""
+    blocker = InferenceTicket()
+    await scheduler.acquire(blocker)
+    order = []
+
+    async def call(name, ticket):
+        await scheduler.acquire(ticket)
+        order.append(name)
+
+    tasks = [asyncio.create_task(call(name, ticket)) for name, ticket in tickets.items()]
+    await asyncio.sleep(0)
+    running = blocker
+    for _ in tickets:
+        scheduler.release(running)
+        await asyncio.sleep(0)
+        running = tickets[order[-1]]
+    await asyncio.gather(*tasks)
+    return order
+
+
+def test_shortest_call_first_within_a_lane():
+    tickets = {
+        "long": InferenceTicket("simple", "a", 300.0),
+        "short": InferenceTicket("simple", "b", 5.0),
+        "medium": InferenceTicket("simple", "c", 60.0),
+    }
+    assert asyncio.run(_dispatch_order(_scheduler(), tickets)) == ["short", "medium", "long"]
+
+
+def test_lane_weights_share_the_workers():
+    scheduler = _scheduler(weights={"simple": 3.0, "diarization": 1.0})
+    tickets = {f"d{i}": InferenceTicket("diarization", None, 10.0) for i in range(2)}
+    tickets.update({f"s{i}": InferenceTicket("simple", None, 10.0) for i in range(6)})
+    order = asyncio.run(_dispatch_order(scheduler, tickets))
+    assert [name[0] for name in order] == ["d", "s", "s", "s", "d", "s", "s", "s"]
+    lanes = scheduler.stats()["lanes"]
+    assert (lanes["simple"]["dispatched"], lanes["diarization"]["dispatched"]) == (7, 2)
+
+
+def test_unknown_lane_uses_the_default_lane():
+    scheduler = _scheduler()
+    asyncio.run(_dispatch_order(scheduler, {"x": InferenceTicket("translation", None, 1.0)}))
+    assert scheduler.stats()["lanes"]["simple"]["dispatched"] == 2
+
+
+def test_waiting_calls_age_past_newer_short_ones(monkeypatch):
+    clock = {"now": 0.0}
+    monkeypatch.setattr(inference_scheduler, "time", SimpleNamespace(monotonic=lambda: clock["now"]))
+
+    async def main():
+        scheduler = _scheduler(aging_rate=1.0)
+        blocker = InferenceTicket()
+        await scheduler.acquire(blocker)
+        order = []
+
+        async def call(name, ticket):
+            await scheduler.acquire(ticket)
+            order.append(name)
+
+        old = asyncio.create_task(call("old-long", InferenceTicket("simple", None, 100.0)))
+        await asyncio.sleep(0)
+        clock["now"] = 200.0
+        new = asyncio.create_task(call("new-short", InferenceTicket("simple", None, 10.0)))
+        await asyncio.sleep(0)
+        scheduler.release(blocker)
+        await asyncio.sleep(0)
+        new.cancel()
+        await asyncio.gather(old, new, return_exceptions=True)
+        return order, scheduler.stats()
+
+    order, stats = asyncio.run(main())
+    assert order == ["old-long"]
+    assert stats["lanes"]["simple"]["queued"] == 0
+
+
+def test_user_cap_lets_other_users_through():
+    async def main():
+        scheduler = _scheduler(slots=2, user_max_running=1)
+        first = InferenceTicket("simple", "alice", 1.0)
+        await scheduler.acquire(first)
+        second = asyncio.create_task(scheduler.acquire(InferenceTicket("simple", "alice", 1.0)))
+        other = asyncio.create_task(scheduler.acquire(InferenceTicket("simple", "bob", 100.0)))
+        await asyncio.sleep(0)
+        granted = (second.done(), other.done())
+        scheduler.release(first)
+        await asyncio.sleep(0)
+        return granted, second.done(), scheduler.stats()["users_running"]
+
+    granted, second_done, users_running = asyncio.run(main())
+    assert granted == (False, True)
+    assert second_done
+    assert users_running == 2
+
+
+def test_batch_shares_count_against_each_user():
+    async def main():
+        scheduler = _scheduler(slots=2, user_max_running=1)
+        batch = InferenceTicket("simple", shares=[
+            InferenceTicket("simple", "alice", 5.0),
+            InferenceTicket("diarization", "bob", 5.0),
+        ])
+        await scheduler.acquire(batch)
+        waiting = asyncio.create_task(scheduler.acquire(InferenceTicket("simple", "bob", 1.0)))
+        await asyncio.sleep(0)
+        blocked = not waiting.done()
+        lanes = scheduler.stats()["lanes"]
+        scheduler.release(batch)
+        await asyncio.sleep(0)
+        return blocked, waiting.done(), lanes
+
+    blocked, granted, lanes = asyncio.run(main())
+    assert blocked and granted
+    assert (lanes["simple"]["dispatched"], lanes["diarization"]["dispatched"]) == (1, 1)
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def main():
+        scheduler = _scheduler()
+        blocker = InferenceTicket()
+        await scheduler.acquire(blocker)
+        waiter = asyncio.create_task(scheduler.acquire(InferenceTicket("simple", "a", 1.0)))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        queued = scheduler.stats()["lanes"]["simple"]["queued"]
+        scheduler.release(blocker)
+        # The slot is free again for the next caller
+        await asyncio.wait_for(scheduler.acquire(InferenceTicket()), timeout=1)
+        return queued
+
+    assert asyncio.run(main()) == 0
+
+
+def test_inference_ticket_context():
+    assert current_ticket() == InferenceTicket()
+    with inference_ticket("diarization", "alice", 12.0):
+        ticket = current_ticket()
+        assert (ticket.lane, ticket.user_id, ticket.audio_seconds) == ("diarization", "alice", 12.0)
+        assert ticket.members() == [ticket]
+    assert current_ticket().lane == "simple"
@@ -0,0 +1,139 @@
+"""Tests for the SQLite job queue."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.services.job_store import JOB_DONE, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.db"))
+
+
+def _create(store, sha256="a" * 64, user_id="user-1", **kwargs):
+    return store.create(
+        mode=kwargs.pop("mode", "simple"),
+        user_id=user_id,
+        audio_path="/tmp/audio.wav",
+        audio_sha256=sha256,
+        **kwargs
+    )
+
+
+def test_claim_next_takes_highest_priority_then_oldest(store):
+    first = _create(store)
+    second = _create(store)
+    urgent = _create(store, priority=5)
+
+    assert store.claim_next()["id"] == urgent["id"]
+    assert store.claim_next()["id"] == first["id"]
+    assert store.claim_next()["id"] == second["id"]
+    assert store.claim_next() is None
+
+
+def test_claim_next_respects_min_priority(store):
+    _create(store, priority=-1)
+    assert store.claim_next(min_priority=0) is None
+    assert store.claim_next() is not None
+
+
+def test_claim_marks_running_and_counts_attempt(store):
+    job = _create(store)
+    claimed = store.claim_next()
+
+    assert claimed["id"] == job["id"]
+    assert claimed["status"] == JOB_RUNNING
+    assert claimed["attempts"] == 1
+    assert claimed["started_at"] is not None
+
+
+def test_requeue_does_not_count_the_attempt(store):
+    job = _create(store)
+    for _ in range(5):
+        store.claim_next()
+        store.requeue(job["id"])
+
+    requeued = store.get(job["id"])
+    assert requeued["status"] == JOB_QUEUED
+    assert requeued["attempts"] == 0
+    assert store.claim_next()["attempts"] == 1
+
+
+def test_requeue_interrupted_keeps_the_attempt(store):
+    job = _create(store)
+    store.claim_next()
+
+    assert store.requeue_interrupted() == 1
+    interrupted = store.get(job["id"])
+    assert interrupted["status"] == JOB_QUEUED
+    assert interrupted["attempts"] == 1
+    assert store.requeue_interrupted() == 0
+
+
+def test_complete_and_fail(store):
+    done = _create(store)
+    failed = _create(store)
+    store.complete(done["id"], {"text": "hola"})
+    store.fail(failed["id"], "boom")
+
+    assert store.get(done["id"])["status"] == JOB_DONE
+    assert store.get(done["id"])["result"] == {"text": "hola"}
+    assert store.get(failed["id"])["status"] == JOB_FAILED
+    assert store.counts() == {JOB_DONE: 1, JOB_FAILED: 1}
+
+
+def test_find_duplicate_matches_audio_options_and_user(store):
+    context = {"cliente_id": 7}
+    job = _create(store, language="es", context=context)
+
+    assert store.find_duplicate(job["audio_sha256"], "simple", "es", context, "user-1")["id"] == job["id"]
+    assert store.find_duplicate(job["audio_sha256"], "simple", "es", context, "user-2") is None
+    assert store.find_duplicate(job["audio_sha256"], "simple", "en", context, "user-1") is None
+    assert store.find_duplicate(job["audio_sha256"], "simple", "es", None, "user-1") is None
+    assert store.find_duplicate(job["audio_sha256"], "diarization", "es", context, "user-1") is None
+
+
+def test_find_duplicate_ignores_failed_jobs(store):
+    job = _create(store)
+    store.fail(job["id"], "boom")
+    assert store.find_duplicate(job["audio_sha256"], "simple", None, None, "user-1") is None
+
+
+def test_reopening_keeps_jobs(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    job = _create(JobStore(path))
+    assert JobStore(path).get(job["id"])["status"] == JOB_QUEUED
+
+
+def _owned_by(store, job_id, pid):
+    store._conn.execute("UPDATE jobs SET worker_pid = ? WHERE id = ?", (pid, job_id))
+
+
+def test_claim_records_the_claiming_process(store):
+    _create(store)
+    assert store.claim_next()["worker_pid"] == os.getpid()
+
+
+def test_requeue_interrupted_spares_jobs_of_live_processes(store):
+    sibling = _create(store)
+    store.claim_next()
+    _owned_by(store, sibling["id"], os.getppid())
+
+    assert store.requeue_interrupted() == 0
+    assert store.get(sibling["id"])["status"] == JOB_RUNNING
+    assert store.requeue_interrupted(include_live=True) == 1
+    assert store.get(sibling["id"])["status"] == JOB_QUEUED
+
+
+def test_requeue_interrupted_takes_jobs_of_exited_processes(store):
+    orphan = _create(store)
+    store.claim_next()
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    _owned_by(store, orphan["id"], exited.pid)
+
+    assert store.requeue_interrupted() == 1
+    assert store.get(orphan["id"])["worker_pid"] is None
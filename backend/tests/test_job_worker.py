@@ -0,0 +1,76 @@
+"""Tests for the background job worker."""
+import asyncio
+
+import pytest
+
+from app.models.transcription import TranscriptionResponse
+from app.services import job_worker
+from app.services.inference_executor import InferenceBusyError
+from app.services.job_store import JOB_DONE, JOB_FAILED, JOB_QUEUED, JobStore
+from app.services.job_worker import JobWorker
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.db"))
+
+
+def _claimed_job(store, tmp_path):
+    audio = tmp_path / "audio.wav"
+    audio.write_bytes(b"audio")
+    store.create(mode="simple", user_id="user-1", audio_path=str(audio), audio_sha256="a" * 64)
+    return store.claim_next()
+
+
+def _process(store, job, **kwargs):
+    asyncio.run(JobWorker(store, **kwargs)._process(job))
+
+
+def test_finished_job_stores_result_and_removes_audio(store, tmp_path, monkeypatch):
+    async def transcribe(**kwargs):
+        return TranscriptionResponse(
+            transcription="hola", language="es", confidence=0.9, duration_seconds=1.0, mode="simple"
+        )
+
+    monkeypatch.setattr(job_worker, "run_transcription", transcribe)
+    job = _claimed_job(store, tmp_path)
+    _process(store, job)
+
+    done = store.get(job["id"])
+    assert done["status"] == JOB_DONE
+    assert done["result"]["transcription"] == "hola"
+    assert not (tmp_path / "audio.wav").exists()
+
+
+def test_busy_inference_requeues_without_spending_attempts(store, tmp_path, monkeypatch):
+    async def busy(**kwargs):
+        raise InferenceBusyError(retry_after=0)
+
+    monkeypatch.setattr(job_worker, "run_transcription", busy)
+    job = _claimed_job(store, tmp_path)
+    for _ in range(5):
+        _process(store, job, max_attempts=3)
+        job = store.claim_next()
+
+    assert job["attempts"] == 1
+    assert store.get(job["id"])["status"] != JOB_FAILED
+    assert (tmp_path / "audio.wav").exists()
+
+
+def test_job_over_its_attempts_is_failed(store, tmp_path):
+    job = _claimed_job(store, tmp_path)
+    job["attempts"] = 4
+    _process(store, job, max_attempts=3)
+    assert store.get(job["id"])["status"] == JOB_FAILED
+
+
+def test_transcription_error_fails_the_job(store, tmp_path, monkeypatch):
+    async def broken(**kwargs):
+        raise RuntimeError("decoder crashed")
+
+    monkeypatch.setattr(job_worker, "run_transcription", broken)
+    job = _claimed_job(store, tmp_path)
+    _process(store, job)
+    assert store.get(job["id"])["error"] == "decoder crashed"
+    assert store.counts() == {JOB_FAILED: 1}
+    assert JOB_QUEUED not in store.counts()
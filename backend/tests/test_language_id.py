@@ -0,0 +1,114 @@
+"""Tests for up-front language identification and the per-user language memory."""
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.models.transcription import TranscriptionResponse
+from app.services import language_id, transcription_service
+from app.services.language_id import LanguageMemory, identify_language, memory_keys
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"t": 1000.0}
+    monkeypatch.setattr(language_id, "time", SimpleNamespace(monotonic=lambda: now["t"]))
+    return now
+
+
+class FakeEngine:
+    def __init__(self, language="es", probability=0.9):
+        self.result = (language, probability)
+        self.windows = []
+
+    def detect_language(self, audio):
+        self.windows.append(len(audio))
+        return self.result
+
+
+def test_memory_keys_most_specific_first():
+    assert memory_keys("u1", {"ejecutivo_id": "e7", "cliente_id": 3}) == ["ejecutivo:e7", "user:u1"]
+    assert memory_keys("u1") == ["user:u1"]
+    assert memory_keys(None, {"cliente_id": 3}) == []
+
+
+def test_first_live_key_wins(clock):
+    memory = LanguageMemory(max_entries=10, ttl_seconds=60)
+    memory.put(["user:u1"], "en")
+    memory.put(["ejecutivo:e7", "user:u2"], "es")
+    assert memory.get(["ejecutivo:e7", "user:u1"]) == "es"
+    assert memory.get(["ejecutivo:e8", "user:u1"]) == "en"
+    assert memory.get(["ejecutivo:e8"]) is None
+    assert memory.get([]) is None
+    assert (memory.stats()["hits"], memory.stats()["misses"]) == (2, 1)
+
+
+def test_entries_expire_after_ttl(clock):
+    memory = LanguageMemory(max_entries=10, ttl_seconds=60)
+    memory.put(["user:u1"], "en")
+    clock["t"] += 60
+    assert memory.get(["user:u1"]) == "en"
+    clock["t"] += 1
+    assert memory.get(["user:u1"]) is None
+    assert memory.stats()["entries"] == 0
+
+
+def test_least_recently_used_key_is_evicted(clock):
+    memory = LanguageMemory(max_entries=2, ttl_seconds=60)
+    memory.put(["user:a"], "es")
+    memory.put(["user:b"], "en")
+    assert memory.get(["user:a"]) == "es"
+    memory.put(["user:c"], "pt")
+    assert memory.get(["user:b"]) is None
+    assert memory.get(["user:a"]) == "es"
+    assert memory.get(["user:c"]) == "pt"
+
+
+def test_identify_language_uses_the_leading_window(monkeypatch):
+    monkeypatch.setattr(settings, "LANGUAGE_ID_WINDOW_SECONDS", 2.0)
+    monkeypatch.setattr(settings, "LANGUAGE_ID_MIN_PROBABILITY", 0.5)
+    engine = FakeEngine("es", 0.9)
+    assert identify_language(engine, np.zeros(16000 * 10, dtype=np.float32)) == "es"
+    assert engine.windows == [32000]
+
+
+def test_unsure_detection_is_discarded(monkeypatch):
+    monkeypatch.setattr(settings, "LANGUAGE_ID_WINDOW_SECONDS", 2.0)
+    monkeypatch.setattr(settings, "LANGUAGE_ID_MIN_PROBABILITY", 0.5)
+    assert identify_language(FakeEngine("en", 0.3), np.zeros(16000, dtype=np.float32)) is None
+
+
+def test_identification_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "LANGUAGE_ID_WINDOW_SECONDS", 0)
+    engine = FakeEngine()
+    assert identify_language(engine, np.zeros(16000, dtype=np.float32)) is None
+    assert engine.windows == []
+
+
+def test_requests_reuse_the_language_detected_for_the_same_caller(clock, monkeypatch):
+    memory = LanguageMemory(max_entries=10, ttl_seconds=60)
+    languages_passed = []
+
+    async def fake_transcribe(audio, mode, language, context, progress, model_name=None):
+        languages_passed.append(language)
+        return TranscriptionResponse(
+            transcription="hola", language=language or "es", confidence=0.9,
+            duration_seconds=1.0, mode="simple", model=model_name
+        ), {}
+
+    monkeypatch.setattr(transcription_service, "_transcribe", fake_transcribe)
+    monkeypatch.setattr(transcription_service, "get_result_cache", lambda: None)
+    monkeypatch.setattr(transcription_service, "get_language_memory", lambda: memory)
+    audio = np.zeros(16000, dtype=np.float32)
+
+    def run(**kwargs):
+        return asyncio.run(transcription_service.run_transcription(audio, user_id="u1", **kwargs))
+
+    run()
+    run()
+    run(language="en")
+    assert languages_passed == [None, "es", "en"]
+    # Explicit languages are not remembered; the detected one stays
+    assert memory.get(["user:u1"]) == "es"
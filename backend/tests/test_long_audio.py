@@ -0,0 +1,115 @@
+"""Tests for splitting long audio at silences and stitching chunk results."""
+import threading
+import time
+
+import numpy as np
+
+from app.config import settings
+from app.services import long_audio
+from app.services.long_audio import find_split_points, should_use_long_audio, split_audio, stitch_results
+
+SR = 16000
+
+
+def _speech_with_silence_at(total_seconds, silence_at, silence_seconds=0.5):
+    audio = np.random.default_rng(0).uniform(-0.5, 0.5, int(total_seconds * SR)).astype(np.float32)
+    for t in silence_at:
+        audio[int(t * SR):int((t + silence_seconds) * SR)] = 0.0
+    return audio
+
+
+def test_short_audio_is_not_split():
+    audio = np.zeros(5 * SR, dtype=np.float32)
+    assert find_split_points(audio, max_chunk_seconds=10) == []
+    chunks = split_audio(audio, max_chunk_seconds=10)
+    assert len(chunks) == 1 and chunks[0][0] == 0.0
+
+
+def test_cuts_land_in_silence_and_bound_chunk_length():
+    audio = _speech_with_silence_at(25, silence_at=[7.0, 15.0])
+    chunks = split_audio(audio, max_chunk_seconds=10)
+
+    assert sum(len(c) for _, c in chunks) == len(audio)
+    assert all(len(c) <= 10 * SR for _, c in chunks)
+    for offset, _ in chunks[1:]:
+        assert 7.0 <= offset <= 7.5 or 15.0 <= offset <= 15.5
+    for offset, chunk in chunks:
+        start = int(offset * SR)
+        assert np.array_equal(chunk, audio[start:start + len(chunk)])
+
+
+def test_stitch_offsets_timestamps_and_renumbers():
+    stitched = stitch_results([
+        (0.0, {"language": "es", "segments": [{"id": 0, "start": 0.0, "end": 2.0, "text": " hola"}]}),
+        (10.0, {"language": "en", "segments": [
+            {"id": 0, "start": 1.0, "end": 2.0, "text": " que tal",
+             "words": [{"start": 1.0, "end": 1.4, "word": " que"}, {"start": 1.5, "end": 2.0, "word": " tal"}]},
+            {"id": 1, "start": 2.0, "end": 2.5, "text": "  "},
+        ]}),
+    ])
+    assert stitched["language"] == "es"
+    assert stitched["text"] == " hola que tal"
+    assert [(s["id"], s["start"], s["end"]) for s in stitched["segments"]] == [(0, 0.0, 2.0), (1, 11.0, 12.0)]
+    assert [w["start"] for w in stitched["segments"][1]["words"]] == [11.0, 11.5]
+
+
+def test_stitch_drops_words_repeated_at_chunk_edge():
+    stitched = stitch_results([
+        (0.0, {"segments": [{"start": 0.0, "end": 9.9, "text": " nos vemos mañana"}]}),
+        (10.0, {"segments": [{
+            "start": 0.0, "end": 2.0, "text": " Mañana, temprano",
+            "words": [{"start": 0.0, "end": 0.5, "word": " Mañana,"}, {"start": 0.6, "end": 1.2, "word": " temprano"}],
+        }]}),
+    ])
+    second = stitched["segments"][1]
+    assert second["text"] == " temprano"
+    assert second["start"] == 10.6
+    assert [w["word"] for w in second["words"]] == [" temprano"]
+
+
+def test_fully_repeated_chunk_segment_is_dropped():
+    stitched = stitch_results([
+        (0.0, {"segments": [{"start": 0.0, "end": 9.9, "text": " gracias"}]}),
+        (10.0, {"segments": [{"start": 0.0, "end": 0.5, "text": " Gracias."}]}),
+    ])
+    assert [s["text"] for s in stitched["segments"]] == [" gracias"]
+
+
+def test_should_use_long_audio(monkeypatch):
+    monkeypatch.setattr(settings, "LONG_AUDIO_WORKERS", 2)
+    monkeypatch.setattr(settings, "LONG_AUDIO_THRESHOLD_SECONDS", 60)
+    assert should_use_long_audio(np.zeros(60 * SR, dtype=np.float32))
+    assert not should_use_long_audio(np.zeros(59 * SR, dtype=np.float32))
+    monkeypatch.setattr(settings, "LONG_AUDIO_WORKERS", 0)
+    assert not should_use_long_audio(np.zeros(120 * SR, dtype=np.float32))
+
+
+def test_concurrent_callers_share_one_transcriber(monkeypatch):
+    created = []
+    barrier = threading.Barrier(4)
+
+    class FakeTranscriber:
+        def __init__(self, **kwargs):
+            created.append(kwargs)
+            time.sleep(0.05)  # Widen the window a racing caller would slip through
+
+        def shutdown(self):
+            pass
+
+    monkeypatch.setattr(long_audio, "LongAudioTranscriber", FakeTranscriber)
+    monkeypatch.setattr(long_audio, "_long_audio_transcriber", None)
+    monkeypatch.setattr(settings, "LONG_AUDIO_WORKERS", 2)
+    seen = []
+
+    def call():
+        barrier.wait(timeout=5)
+        seen.append(long_audio.get_long_audio_transcriber())
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1
+    assert len({id(t) for t in seen}) == 1
+    long_audio.shutdown_long_audio_transcriber()
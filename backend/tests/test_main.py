@@ -0,0 +1,18 @@
+"""Tests for the application's probes and lifecycle hooks."""
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def test_startup_and_shutdown_hooks_run_cleanly():
+    with TestClient(app) as client:
+        assert client.get("/health/live").json() == {"status": "alive"}
+        health = client.get("/health").json()
+        assert health["batching"] is None
+        assert "layout" in health["inference"]
+
+
+def test_readiness_reports_state():
+    with TestClient(app) as client:
+        response = client.get("/health/ready")
+        assert response.status_code in (200, 503)
@@ -0,0 +1,65 @@
+"""Tests for per-request stage timings and the Prometheus endpoint."""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.main import app
+from app.services.metrics import collect_timings, observe_transcription, record_stage, stage_timer
+
+
+def _stage_count(stage):
+    return REGISTRY.get_sample_value("stt_stage_duration_seconds_count", {"stage": stage}) or 0.0
+
+
+def test_stage_timer_records_into_request_timings_and_histogram():
+    before = _stage_count("align")
+    timings = collect_timings()
+    with stage_timer("align"):
+        pass
+    record_stage("align", 0.5)
+    assert timings["align"] >= 0.5
+    assert _stage_count("align") == before + 2
+
+
+def test_stage_timer_records_when_the_stage_fails():
+    timings = collect_timings()
+    with pytest.raises(RuntimeError):
+        with stage_timer("decode"):
+            raise RuntimeError("bad audio")
+    assert "decode" in timings
+
+
+def test_timings_are_scoped_to_each_task():
+    async def request(stage):
+        timings = collect_timings()
+        await asyncio.sleep(0)
+        record_stage(stage, 1.0)
+        return timings
+
+    async def main():
+        return await asyncio.gather(request("decode"), request("transcribe"))
+
+    first, second = asyncio.run(main())
+    assert first == {"decode": 1.0}
+    assert second == {"transcribe": 1.0}
+
+
+def test_real_time_factor_and_audio_volume():
+    labels = {"model": "test-model", "mode": "simple"}
+    observe_transcription("test-model", "simple", audio_seconds=10.0, processing_seconds=2.0)
+    observe_transcription("test-model", "simple", audio_seconds=0.0, processing_seconds=1.0)
+    assert REGISTRY.get_sample_value("stt_audio_seconds_total", labels) == 10.0
+    assert REGISTRY.get_sample_value("stt_real_time_factor_sum", labels) == pytest.approx(0.2)
+    assert REGISTRY.get_sample_value("stt_real_time_factor_count", labels) == 1.0
+
+
+def test_metrics_endpoint_exposes_gauges_without_auth():
+    with TestClient(app) as client:
+        response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert "stt_inference_running" in body
+    assert 'stt_jobs{status="queued"}' in body
@@ -0,0 +1,49 @@
+"""Tests for the per-process model registry."""
+import threading
+import time
+
+from app.services.model_registry import ModelRegistry
+
+
+def test_model_is_loaded_once_and_reused():
+    registry = ModelRegistry()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return object()
+
+    first = registry.get("whisper:base", loader)
+    assert registry.get("whisper:base", loader) is first
+    assert len(loads) == 1
+    assert registry.is_loaded("whisper:base")
+    assert registry.stats()["models"]["whisper:base"]["hits"] == 2
+
+
+def test_concurrent_callers_wait_for_one_load():
+    registry = ModelRegistry()
+    loads = []
+
+    def slow_loader():
+        loads.append(1)
+        time.sleep(0.05)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("pyannote", slow_loader)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert len({id(model) for model in results}) == 1
+
+
+def test_unload_allows_a_fresh_load():
+    registry = ModelRegistry()
+    first = registry.get("m", object)
+    registry.unload("m")
+    assert not registry.is_loaded("m")
+    assert registry.get("m", object) is not first
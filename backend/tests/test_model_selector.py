@@ -0,0 +1,71 @@
+"""Tests for per-request Whisper size selection."""
+import numpy as np
+
+from app.services import diarization_service
+from app.services.model_selector import ModelSelector, model_rank, parse_models
+
+
+def _selector(**kwargs):
+    return ModelSelector("base", ["tiny", "base", "small"], **kwargs)
+
+
+def test_model_rank_ignores_suffixes():
+    assert model_rank("small.en") == model_rank("small")
+    assert model_rank("large-v3") == model_rank("large")
+    assert model_rank("custom") == 5
+    assert parse_models(" tiny, base ,,") == ["tiny", "base"]
+
+
+def test_single_model_is_always_the_default():
+    selector = ModelSelector("base", [])
+    assert selector.select(1.0, "en", queued=10) == ("base", "default")
+    assert not selector.adaptive
+
+
+def test_short_clip_on_idle_server_gets_a_larger_model():
+    assert _selector().select(10.0, "es", queued=0)[0] == "small"
+    assert _selector().select(10.0, "es", queued=1)[0] == "base"
+
+
+def test_long_audio_goes_one_size_down_in_english_only():
+    assert _selector().select(900.0, "en", queued=0)[0] == "tiny"
+    # tiny is below the multilingual floor
+    model, reason = _selector().select(900.0, "es", queued=0)
+    assert model == "base"
+    assert "language=es" in reason
+
+
+def test_queue_pressure_degrades_by_steps():
+    selector = ModelSelector("small", ["tiny", "base", "small"], degrade_queue=2, min_multilingual="tiny")
+    assert selector.select(60.0, None, queued=2)[0] == "base"
+    assert selector.select(60.0, None, queued=4)[0] == "tiny"
+    assert selector.select(60.0, None, queued=40)[0] == "tiny"
+    assert selector.stats()["chosen"] == {"base": 1, "tiny": 2}
+
+
+def test_degrading_can_be_disabled():
+    assert _selector(degrade_queue=0).select(60.0, "en", queued=50)[0] == "base"
+
+
+class _FakeEngine:
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, audio, **kwargs):
+        self.calls += 1
+        return {"text": "local", "segments": []}
+
+
+def test_only_the_primary_model_uses_the_long_audio_pool(monkeypatch):
+    class FakePool:
+        def transcribe(self, audio, language, word_timestamps=False):
+            return {"text": "pool", "segments": []}
+
+    monkeypatch.setattr(diarization_service, "should_use_long_audio", lambda audio: True)
+    monkeypatch.setattr(diarization_service, "get_long_audio_transcriber", lambda: FakePool())
+    audio = np.zeros(16000, np.float32)
+
+    engine = _FakeEngine()
+    assert diarization_service._run_whisper(engine, audio, "es", primary=True)["text"] == "pool"
+    assert diarization_service._run_whisper(engine, audio, "es", primary=False)["text"] == "local"
+    assert engine.calls == 1
@@ -0,0 +1,86 @@
+"""Tests for incremental speaker diarization of live streams."""
+import threading
+
+import numpy as np
+
+from app.services.audio_decoder import SAMPLE_RATE
+from app.services.online_diarization import OnlineDiarizer
+
+WINDOW_SECONDS = 0.5
+WINDOW = int(WINDOW_SECONDS * SAMPLE_RATE)
+
+
+def _embed(chunk):
+    # Positive clips belong to one speaker, negative ones to another
+    return np.array([1.0, 0.0]) if chunk.mean() > 0 else np.array([0.0, 1.0])
+
+
+def _voice(sign, windows=1):
+    return np.full(WINDOW * windows, 0.1 * sign, dtype=np.float32)
+
+
+def _diarizer(**kwargs):
+    return OnlineDiarizer(_embed, window_seconds=WINDOW_SECONDS, **kwargs)
+
+
+def test_windows_of_one_speaker_merge_into_one_turn():
+    diarizer = _diarizer()
+    diarizer.append(_voice(1, windows=3))
+    diarizer.update()
+    assert diarizer.turns == [{"speaker": "SPEAKER_00", "start": 0.0, "end": 3 * WINDOW_SECONDS}]
+
+
+def test_new_voice_opens_a_speaker_and_returning_voice_matches():
+    diarizer = _diarizer()
+    for sign in (1, -1, 1):
+        diarizer.append(_voice(sign))
+    diarizer.update()
+    assert [t["speaker"] for t in diarizer.turns] == ["SPEAKER_00", "SPEAKER_01", "SPEAKER_00"]
+    assert diarizer.speakers == ["SPEAKER_00", "SPEAKER_01"]
+
+
+def test_max_speakers_joins_the_closest():
+    diarizer = _diarizer(max_speakers=1)
+    diarizer.append(np.concatenate([_voice(1), _voice(-1)]))
+    diarizer.update()
+    assert diarizer.speakers == ["SPEAKER_00"]
+
+
+def test_silence_is_skipped_and_partial_window_waits_for_flush():
+    diarizer = _diarizer()
+    diarizer.append(np.zeros(WINDOW, np.float32))
+    diarizer.append(_voice(1)[: WINDOW * 3 // 4])
+    assert diarizer.update() == []
+    assert len(diarizer.update(flush=True)) == 1
+    assert diarizer.turns[0]["start"] == WINDOW_SECONDS
+
+
+def test_prune_drops_consumed_turns():
+    diarizer = _diarizer()
+    for sign in (1, -1):
+        diarizer.append(_voice(sign))
+    diarizer.update()
+    diarizer.prune(WINDOW_SECONDS + 0.1)
+    assert [t["speaker"] for t in diarizer.turns] == ["SPEAKER_01"]
+
+
+def test_append_while_updating_loses_no_samples():
+    diarizer = _diarizer()
+    chunks = 400
+    chunk = _voice(1)[: WINDOW // 8]
+    done = threading.Event()
+
+    def feed():
+        for _ in range(chunks):
+            diarizer.append(chunk)
+        done.set()
+
+    feeder = threading.Thread(target=feed)
+    feeder.start()
+    while not done.is_set():
+        diarizer.update()
+    feeder.join()
+    diarizer.update()
+
+    labelled = sum(t["end"] - t["start"] for t in diarizer.turns) * SAMPLE_RATE
+    assert round(labelled) == chunks * len(chunk) // WINDOW * WINDOW
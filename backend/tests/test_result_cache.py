@@ -0,0 +1,88 @@
+"""Tests for the content-addressed result cache."""
+import hashlib
+import json
+
+import numpy as np
+
+from app.services.result_cache import ResultCache, hash_file, hash_pcm
+
+
+def _entry_size(value):
+    return len(json.dumps(value, default=str))
+
+
+def test_hashes(tmp_path):
+    path = tmp_path / "a.wav"
+    path.write_bytes(b"audio")
+    assert hash_file(str(path)) == hashlib.sha256(b"audio").hexdigest()
+
+    pcm = np.zeros(16, dtype=np.float32)
+    assert hash_pcm(pcm).startswith("pcm:")
+    assert hash_pcm(pcm) == hash_pcm(pcm.copy())
+    assert hash_pcm(pcm) != hash_pcm(np.ones(16, dtype=np.float32))
+
+
+def test_make_key_covers_everything_that_changes_output():
+    base = ResultCache.make_key("abc", "small", "simple", None)
+    assert base == ResultCache.make_key("abc", "small", "simple", "auto")
+    assert base == ResultCache.make_key("abc", "small", "simple", None, {})
+    assert base != ResultCache.make_key("abc", "medium", "simple", None)
+    assert base != ResultCache.make_key("abc", "small", "diarization", None)
+    assert base != ResultCache.make_key("abc", "small", "simple", "es")
+    assert base != ResultCache.make_key("abc", "small", "simple", None, {"ejecutivo_id": "1"})
+    assert (ResultCache.make_key("abc", "small", "simple", None, {"a": 1, "b": 2})
+            == ResultCache.make_key("abc", "small", "simple", None, {"b": 2, "a": 1}))
+
+
+def test_get_put_and_stats(tmp_path):
+    cache = ResultCache(str(tmp_path), max_disk_bytes=1 << 20, memory_entries=1)
+    assert cache.get("k") is None
+    cache.put("k", {"text": "hola"})
+    assert cache.get("k") == {"text": "hola"}
+
+    # Evicted from the single memory slot, then served from disk
+    cache.put("other", {"text": "x"})
+    assert cache.get("k") == {"text": "hola"}
+    stats = cache.stats()
+    assert (stats["hits_memory"], stats["hits_disk"], stats["misses"]) == (1, 1, 1)
+    assert stats["entries_disk"] == 2
+    assert stats["entries_memory"] == 1
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    value = {"text": "x" * 100}
+    cache = ResultCache(str(tmp_path), max_disk_bytes=2 * _entry_size(value))
+    cache.put("a", value)
+    cache.put("b", value)
+    assert cache.get("a") == value  # "b" becomes least recently used
+    cache.put("c", value)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == value
+    assert cache.get("c") == value
+    assert not (tmp_path / "b.json").exists()
+
+
+def test_overwrite_does_not_double_count(tmp_path):
+    value = {"text": "y" * 50}
+    cache = ResultCache(str(tmp_path), max_disk_bytes=_entry_size(value))
+    cache.put("a", value)
+    cache.put("a", value)
+    assert cache.get("a") == value
+    assert cache.stats()["entries_disk"] == 1
+
+
+def test_index_is_reloaded_from_disk(tmp_path):
+    ResultCache(str(tmp_path), max_disk_bytes=1 << 20).put("a", {"text": "persisted"})
+    cache = ResultCache(str(tmp_path), max_disk_bytes=1 << 20)
+    assert cache.stats()["entries_disk"] == 1
+    assert cache.get("a") == {"text": "persisted"}
+
+
+def test_unreadable_entry_is_dropped(tmp_path):
+    cache = ResultCache(str(tmp_path), max_disk_bytes=1 << 20)
+    cache.put("a", {"text": "ok"})
+    (tmp_path / "a.json").write_text("{not json")
+    assert cache.get("a") is None
+    assert not (tmp_path / "a.json").exists()
+    assert cache.stats()["entries_disk"] == 0
@@ -0,0 +1,22 @@
+"""Tests for the pre-fork launcher."""
+import os
+
+from app.config import settings
+from app.serve import memory_report, requeue_interrupted_jobs
+from app.services.job_store import JOB_QUEUED, JobStore
+
+
+def test_master_requeues_every_running_job(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "JOBS_DIR", str(tmp_path))
+    store = JobStore(os.path.join(str(tmp_path), "jobs.db"))
+    job = store.create(mode="simple", user_id="u", audio_path="/tmp/a.wav", audio_sha256="a")
+    store.claim_next()
+    # Claimed by a process that is still alive, as seen from a fresh master
+    store._conn.execute("UPDATE jobs SET worker_pid = ? WHERE id = ?", (os.getppid(), job["id"]))
+
+    assert requeue_interrupted_jobs() == 1
+    assert store.get(job["id"])["status"] == JOB_QUEUED
+
+
+def test_memory_report_without_workers():
+    assert memory_report({}).startswith("Memory:")
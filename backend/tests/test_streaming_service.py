@@ -0,0 +1,128 @@
+"""Tests for rolling-buffer transcription of live streams."""
+import asyncio
+
+import numpy as np
+
+from app.services.audio_decoder import SAMPLE_RATE
+from app.services.inference_executor import InferenceBusyError
+from app.services.streaming_service import StreamingSession
+
+
+class InlineExecutor:
+    busy = False
+
+    async def run(self, fn, *args):
+        if self.busy:
+            raise InferenceBusyError(retry_after=1)
+        return fn(*args)
+
+
+class ScriptedEngine:
+    """Returns one segment per whole second of the buffer."""
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, **kwargs):
+        self.calls.append((len(audio), kwargs))
+        seconds = len(audio) // SAMPLE_RATE
+        segments = [
+            {"start": float(i), "end": float(i + 1), "text": f" w{i}", "no_speech_prob": 0.1}
+            for i in range(seconds)
+        ]
+        return {"language": "es", "segments": segments}
+
+
+def _seconds(n):
+    return np.zeros(int(n * SAMPLE_RATE), dtype=np.float32)
+
+
+def _session(**kwargs):
+    engine = ScriptedEngine()
+    executor = InlineExecutor()
+    options = dict(step_seconds=1.0, window_seconds=3.0, max_buffer_seconds=6.0)
+    options.update(kwargs)
+    return StreamingSession(engine, executor, **options), engine, executor
+
+
+def test_pcm16_with_odd_byte_counts_is_reassembled():
+    session, _, _ = _session()
+    pcm = (np.arange(5, dtype=np.int16) * 1000).tobytes()
+    session.append_pcm16(pcm[:3])
+    session.append_pcm16(pcm[3:])
+    assert len(session._buffer) == 5
+    assert session.ready() is False
+
+
+def test_partial_until_window_then_commit_all_but_last():
+    session, engine, _ = _session()
+    session.append(_seconds(2))
+    assert session.ready()
+    events = asyncio.run(session.process())
+    assert events == [{"type": "partial", "text": "w0 w1", "start": 0.0, "end": 2.0}]
+    assert session.language == "es"
+
+    session.append(_seconds(1))
+    events = asyncio.run(session.process())
+    final, partial = events
+    assert [s["text"] for s in final["segments"]] == ["w0", "w1"]
+    assert final["segments"][0]["confidence"] == 0.9
+    assert partial == {"type": "partial", "text": "w2", "start": 2.0, "end": 3.0}
+    # Committed audio leaves the buffer; the prompt carries the committed text
+    assert session.buffered_seconds == 1.0
+    session.append(_seconds(1))
+    asyncio.run(session.process())
+    assert engine.calls[-1][1]["initial_prompt"] == " w0 w1"
+    assert engine.calls[-1][1]["language"] == "es"
+
+
+def test_final_commits_everything_with_absolute_times():
+    session, _, _ = _session()
+    session.append(_seconds(3))
+    asyncio.run(session.process())
+    session.append(_seconds(1))
+    events = asyncio.run(session.process(final=True))
+    assert len(events) == 1
+    assert [(s["start"], s["text"]) for s in events[0]["segments"]] == [(2.0, "w0"), (3.0, "w1")]
+    assert [s["text"] for s in session.finalized] == ["w0", "w1", "w0", "w1"]
+    assert session.buffered_seconds == 0.0
+    assert session.duration == 4.0
+
+
+def test_busy_executor_sheds_oldest_audio_at_the_cap():
+    session, _, executor = _session()
+    executor.busy = True
+    session.append(_seconds(2))
+    assert asyncio.run(session.process()) == []
+
+    session.append(_seconds(4))
+    events = asyncio.run(session.process())
+    assert events[0]["type"] == "warning"
+    assert session.buffered_seconds == 3.0
+    assert session.duration == 6.0
+
+
+def test_empty_buffer_produces_no_events():
+    session, engine, _ = _session()
+    assert asyncio.run(session.process(final=True)) == []
+    assert engine.calls == []
+
+
+def test_audio_arriving_during_inference_is_kept_for_the_next_decode():
+    session, engine, _ = _session()
+
+    class AppendingExecutor(InlineExecutor):
+        async def run(self, fn, *args):
+            result = fn(*args)
+            # The client keeps streaming while the model runs
+            session.append(np.ones(SAMPLE_RATE // 2, dtype=np.float32))
+            return result
+
+    session.executor = AppendingExecutor()
+    session.append(_seconds(3))
+    final, partial = asyncio.run(session.process())
+    assert [s["text"] for s in final["segments"]] == ["w0", "w1"]
+    assert partial["end"] == 3.0
+    # w2 plus the half second that arrived during the decode
+    assert session.buffered_seconds == 1.5
+    assert session._buffer[-1] == 1.0
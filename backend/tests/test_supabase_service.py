@@ -0,0 +1,127 @@
+"""Tests for ranged Storage downloads and storage path handling."""
+import asyncio
+import re
+
+import httpx
+import pytest
+
+from app.services.supabase_service import SupabaseError, SupabaseService, split_storage_path
+
+URL = "http://supabase.test"
+_RANGE = re.compile(r"bytes=(\d+)-(\d+)")
+
+
+def _storage(body, honour_range=True, failures=None, status=None):
+    """Storage stand-in serving ``body``; ``failures`` maps range start -> error statuses to return first."""
+    requests = []
+    failures = {k: list(v) for k, v in (failures or {}).items()}
+
+    def handler(request):
+        requests.append(request)
+        if status is not None:
+            return httpx.Response(status, text="nope")
+        match = _RANGE.match(request.headers.get("range", ""))
+        if not honour_range or match is None:
+            return httpx.Response(200, content=body)
+        start, end = int(match.group(1)), int(match.group(2))
+        if failures.get(start):
+            return httpx.Response(failures[start].pop(0), text="try again")
+        if start >= len(body):
+            return httpx.Response(416)
+        end = min(end, len(body) - 1)
+        return httpx.Response(
+            206,
+            content=body[start:end + 1],
+            headers={"content-range": f"bytes {start}-{end}/{len(body)}"}
+        )
+
+    service = SupabaseService(URL, "key", transport=httpx.MockTransport(handler))
+    return service, requests
+
+
+def _download(service, path="audios/call.m4a", **kwargs):
+    async def run():
+        try:
+            return [chunk async for chunk in service.iter_object(path, **kwargs)]
+        finally:
+            await service.close()
+    return asyncio.run(run())
+
+
+def test_split_storage_path():
+    assert split_storage_path("recordings/2024/a.m4a") == ("recordings", "2024/a.m4a")
+    assert split_storage_path("/recordings/a.m4a") == ("recordings", "a.m4a")
+    assert split_storage_path("a.m4a") == ("audios", "a.m4a")
+
+
+def test_storage_path_accepts_paths_and_project_urls():
+    service = SupabaseService(URL, "key")
+    assert service.storage_path("audios/a.m4a") == "audios/a.m4a"
+    assert service.storage_path(f"{URL}/storage/v1/object/public/audios/a.m4a?token=x") == "audios/a.m4a"
+    assert service.storage_path(f"{URL}/storage/v1/object/authenticated/audios/a.m4a") == "audios/a.m4a"
+    assert service.storage_path(f"{URL}/storage/v1/object/audios/a.m4a") == "audios/a.m4a"
+    with pytest.raises(ValueError):
+        service.storage_path("https://elsewhere.test/storage/v1/object/audios/a.m4a")
+    asyncio.run(service.close())
+
+
+def test_ranges_are_yielded_in_order():
+    body = bytes(range(256)) * 40
+    service, requests = _storage(body)
+    chunks = _download(service, chunk_size=1000, concurrency=3)
+    assert b"".join(chunks) == body
+    assert len(chunks) == 11
+    assert requests[0].url == f"{URL}/storage/v1/object/audios/call.m4a"
+    assert sorted(r.headers["range"] for r in requests[1:]) == sorted(
+        f"bytes={s}-{min(s + 1000, len(body)) - 1}" for s in range(1000, len(body), 1000)
+    )
+
+
+def test_server_ignoring_range_streams_whole_body():
+    body = b"x" * 5000
+    service, requests = _storage(body, honour_range=False)
+    assert b"".join(_download(service, chunk_size=1000)) == body
+    assert len(requests) == 1
+
+
+def test_empty_object():
+    service, _ = _storage(b"")
+    assert _download(service) == []
+
+
+def test_error_status_raises_supabase_error():
+    service, _ = _storage(b"", status=404)
+    with pytest.raises(SupabaseError) as excinfo:
+        _download(service)
+    assert excinfo.value.status_code == 404
+    assert not excinfo.value.retryable
+
+
+def test_failed_range_is_retried():
+    body = b"abcdefghij" * 30
+    service, requests = _storage(body, failures={100: [503]})
+    assert b"".join(_download(service, chunk_size=100)) == body
+    assert [r.headers["range"] for r in requests].count("bytes=100-199") == 2
+
+
+def test_client_error_on_range_is_not_retried():
+    body = b"abcdefghij" * 30
+    service, requests = _storage(body, failures={100: [403]})
+    with pytest.raises(SupabaseError) as excinfo:
+        _download(service, chunk_size=100)
+    assert excinfo.value.status_code == 403
+    assert [r.headers["range"] for r in requests].count("bytes=100-199") == 1
+
+
+def test_download_audio_writes_file(tmp_path):
+    body = b"0123456789" * 100
+    service, _ = _storage(body)
+
+    async def run():
+        try:
+            return await service.download_audio("audios/call.m4a", str(tmp_path / "sub" / "call.m4a"))
+        finally:
+            await service.close()
+
+    path = asyncio.run(run())
+    assert open(path, "rb").read() == body
@@ -0,0 +1,63 @@
+"""Tests for the error responses of the /transcribe endpoints."""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.routers import transcribe
+from app.services.inference_executor import InferenceBusyError
+from app.services.transcription_service import DiarizationUnavailableError
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(transcribe.router)
+    return TestClient(app)
+
+
+def _post(client, body=b"RIFF0000WAVE"):
+    return client.post(
+        "/transcribe",
+        headers={"X-API-Key": settings.API_KEY},
+        files={"file": ("call.wav", body, "audio/wav")},
+        data={"user_id": "user-1"},
+    )
+
+
+@pytest.mark.parametrize("error, status_code", [
+    (InferenceBusyError(retry_after=7), 503),
+    (DiarizationUnavailableError("HF_TOKEN missing"), 400),
+    (RuntimeError("decoder crashed"), 500),
+])
+def test_transcription_errors_map_to_http_status(client, monkeypatch, error, status_code):
+    async def fail(**kwargs):
+        raise error
+    monkeypatch.setattr(transcribe, "run_transcription", fail)
+
+    response = _post(client)
+    assert response.status_code == status_code
+    if status_code == 503:
+        assert response.headers["Retry-After"] == "7"
+
+
+def test_oversized_upload_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(transcribe, "max_upload_bytes", lambda: 4)
+    assert _post(client).status_code == 413
+
+
+def test_temporary_file_is_removed_after_failure(client, monkeypatch):
+    paths = []
+
+    async def fail(audio, **kwargs):
+        paths.append(audio)
+        raise RuntimeError("decoder crashed")
+    monkeypatch.setattr(transcribe, "run_transcription", fail)
+
+    assert _post(client).status_code == 500
+    assert paths and not transcribe.os.path.exists(paths[0])
+
+
+def test_missing_api_key_is_rejected(client):
+    response = client.post("/transcribe", files={"file": ("call.wav", b"x", "audio/wav")}, data={"user_id": "u"})
+    assert response.status_code == 401
@@ -0,0 +1,104 @@
+"""Tests for the write-behind Supabase outbox."""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.services.supabase_service import SupabaseService
+from app.services.transcription_writer import TranscriptionOutbox, TranscriptionWriter
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return TranscriptionOutbox(str(tmp_path / "outbox.db"))
+
+
+def _service(handler):
+    return SupabaseService("http://supabase.test", "key", transport=httpx.MockTransport(handler))
+
+
+def _writer(outbox, handler, **kwargs):
+    return TranscriptionWriter(outbox, _service(handler), batch_size=kwargs.pop("batch_size", 10), **kwargs)
+
+
+def test_claim_hides_rows_from_other_writers(tmp_path, outbox):
+    for i in range(3):
+        outbox.add("transcriptions", {"n": i})
+    other = TranscriptionOutbox(str(tmp_path / "outbox.db"))
+
+    first = outbox.claim(2)
+    assert [e["row"]["n"] for e in first] == [0, 1]
+    assert [e["row"]["n"] for e in other.claim(10)] == [2]
+    assert outbox.claim(10) == []
+
+    outbox.release([e["id"] for e in first])
+    assert [e["row"]["n"] for e in other.claim(10)] == [0, 1]
+
+
+def test_expired_claim_is_due_again(outbox):
+    outbox.add("transcriptions", {"n": 0})
+    assert len(outbox.claim(10, claim_seconds=-1)) == 1
+    assert len(outbox.claim(10)) == 1
+
+
+def test_flush_inserts_batches_and_empties_the_outbox(outbox):
+    requests = []
+
+    def handler(request):
+        requests.append(json.loads(request.content))
+        return httpx.Response(201)
+
+    writer = _writer(outbox, handler, batch_size=2)
+    for i in range(3):
+        writer.enqueue("transcriptions", {"n": i})
+
+    assert asyncio.run(writer.flush()) == 2
+    assert asyncio.run(writer.flush()) == 1
+    assert [len(r) for r in requests] == [2, 1]
+    assert outbox.counts() == {"pending": 0, "dead": 0}
+
+
+def test_server_error_is_retried_with_backoff(outbox):
+    writer = _writer(outbox, lambda request: httpx.Response(503, text="down"), flush_interval=1.0)
+    writer.enqueue("transcriptions", {"n": 0})
+
+    assert asyncio.run(writer.flush()) == 0
+    entry = outbox._conn.execute("SELECT * FROM outbox").fetchone()
+    assert entry["attempts"] == 1 and entry["dead"] == 0
+    assert "503" in entry["last_error"]
+    assert outbox.claim(10) == []  # Not due until the backoff ends
+
+
+def test_rows_are_dead_after_max_attempts(outbox):
+    writer = _writer(outbox, lambda request: httpx.Response(500), flush_interval=0.0, max_attempts=2)
+    writer.enqueue("transcriptions", {"n": 0})
+    asyncio.run(writer.flush())
+    asyncio.run(writer.flush())
+    assert outbox.counts() == {"pending": 0, "dead": 1}
+
+
+def test_rejected_batch_is_retried_row_by_row(outbox):
+    def handler(request):
+        rows = json.loads(request.content)
+        if any(row.get("bad") for row in rows):
+            return httpx.Response(400, text="invalid row")
+        return httpx.Response(201)
+
+    writer = _writer(outbox, handler)
+    writer.enqueue("transcriptions", {"n": 0})
+    writer.enqueue("transcriptions", {"n": 1, "bad": True})
+    writer.enqueue("transcriptions", {"n": 2})
+
+    assert asyncio.run(writer.flush()) == 2
+    assert outbox.counts() == {"pending": 0, "dead": 1}
+
+
+def test_transport_error_keeps_rows(outbox):
+    def handler(request):
+        raise httpx.ConnectError("refused")
+
+    writer = _writer(outbox, handler)
+    writer.enqueue("transcriptions", {"n": 0})
+    assert asyncio.run(writer.flush()) == 0
+    assert outbox.counts() == {"pending": 1, "dead": 0}
@@ -0,0 +1,89 @@
+"""Tests for spooling uploads to disk."""
+import asyncio
+import hashlib
+import shutil
+import subprocess
+
+import pytest
+
+from app.services import upload_service
+from app.services.audio_decoder import SAMPLE_RATE, needs_seekable_input
+from app.services.upload_service import UploadTooLargeError, spool_and_decode, spool_chunks
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+def test_spool_writes_file_and_hashes_it(tmp_path):
+    dest = tmp_path / "audio.m4a"
+    size, sha256 = asyncio.run(spool_chunks(_chunks(b"abc", b"def"), str(dest)))
+    assert (size, sha256) == (6, hashlib.sha256(b"abcdef").hexdigest())
+    assert dest.read_bytes() == b"abcdef"
+
+
+def test_limit_is_enforced_while_streaming_and_partial_file_removed(tmp_path):
+    dest = tmp_path / "audio.m4a"
+    consumed = []
+
+    async def chunks():
+        for part in (b"1234", b"5678", b"never read"):
+            consumed.append(part)
+            yield part
+
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(spool_chunks(chunks(), str(dest), max_bytes=6))
+    assert len(consumed) == 2
+    assert not dest.exists()
+
+
+def test_limit_is_inclusive(tmp_path):
+    size, _ = asyncio.run(spool_chunks(_chunks(b"123456"), str(tmp_path / "a"), max_bytes=6))
+    assert size == 6
+
+
+def _m4a(path, *flags):
+    subprocess.run(
+        ["ffmpeg", "-nostdin", "-loglevel", "error", "-f", "lavfi", "-i", "sine=d=1", *flags, str(path)],
+        check=True
+    )
+    return path.read_bytes()
+
+
+def _file_chunks(data, size=4096):
+    return _chunks(*(data[i:i + size] for i in range(0, len(data), size)))
+
+
+@needs_ffmpeg
+def test_mp4_index_position_decides_if_a_pipe_can_decode_it(tmp_path):
+    assert needs_seekable_input(_m4a(tmp_path / "end.m4a"))
+    assert not needs_seekable_input(_m4a(tmp_path / "fast.m4a", "-movflags", "+faststart"))
+    assert not needs_seekable_input(b"RIFF\x00\x00\x00\x00WAVEfmt ")
+
+
+@needs_ffmpeg
+def test_m4a_with_trailing_index_is_decoded_once_from_the_spool(tmp_path, monkeypatch):
+    data = _m4a(tmp_path / "upload.m4a")
+    decodes = []
+    real_decode = upload_service.decode_audio
+
+    class NoStreaming:
+        def __init__(self, *args, **kwargs):
+            raise AssertionError("streaming decoder started for an m4a it cannot decode")
+
+    def counting_decode(path):
+        decodes.append(path)
+        return real_decode(path)
+
+    monkeypatch.setattr(upload_service, "StreamingDecoder", NoStreaming)
+    monkeypatch.setattr(upload_service, "decode_audio", counting_decode)
+    dest = tmp_path / "spooled"
+    size, sha256, audio = asyncio.run(spool_and_decode(_file_chunks(data), str(dest)))
+
+    assert (size, sha256) == (len(data), hashlib.sha256(data).hexdigest())
+    assert dest.read_bytes() == data
+    assert decodes == [str(dest)]
+    assert abs(len(audio) - SAMPLE_RATE) < SAMPLE_RATE // 10
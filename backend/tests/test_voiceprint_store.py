@@ -0,0 +1,173 @@
+"""Tests for voiceprint enrollment and ejecutivo recognition."""
+import asyncio
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.routers import jobs
+from app.services import transcription_service
+from app.services.job_store import JobStore
+from app.services.result_cache import ResultCache
+from app.services.voiceprint_store import VoiceprintNotFoundError, VoiceprintStore
+
+AGENT = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+CLIENT = np.array([0.0, 1.0, 0.0], dtype=np.float32)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return VoiceprintStore(str(tmp_path), threshold=0.6)
+
+
+def test_unknown_ejecutivo_is_not_identified(store):
+    assert store.identify("42", {"SPEAKER_00": AGENT}) is None
+
+
+def test_stage_confirm_identify(store):
+    store.stage("call-1", "42", {"SPEAKER_00": CLIENT, "SPEAKER_01": AGENT})
+    assert store.confirm("call-1", "SPEAKER_01") == ("42", 1)
+
+    # Speaker order changes between calls; the voiceprint does not care
+    speaker, similarity = store.identify("42", {"SPEAKER_00": AGENT * 3, "SPEAKER_01": CLIENT})
+    assert speaker == "SPEAKER_00"
+    assert similarity == pytest.approx(1.0)
+
+
+def test_no_speaker_close_enough(store):
+    store.enroll("42", AGENT)
+    assert store.identify("42", {"SPEAKER_00": CLIENT}) is None
+
+
+def test_confirm_requires_staged_call_and_speaker(store):
+    with pytest.raises(VoiceprintNotFoundError):
+        store.confirm("missing", "SPEAKER_00")
+    store.stage("call-1", "42", {"SPEAKER_00": AGENT})
+    with pytest.raises(VoiceprintNotFoundError):
+        store.confirm("call-1", "SPEAKER_05")
+    store.confirm("call-1", "SPEAKER_00")
+    with pytest.raises(VoiceprintNotFoundError):
+        store.confirm("call-1", "SPEAKER_00")
+
+
+def test_enroll_averages_calls_and_survives_reopening(tmp_path):
+    store = VoiceprintStore(str(tmp_path))
+    store.enroll("42", AGENT)
+    assert store.enroll("42", np.array([1.0, 1.0, 0.0])) == 2
+    with pytest.raises(ValueError):
+        store.enroll("43", np.ones(5))
+
+    reopened = VoiceprintStore(str(tmp_path))
+    assert reopened.stats()["enrolled"] == 1
+    assert reopened.identify("42", {"SPEAKER_00": AGENT})[0] == "SPEAKER_00"
+
+
+def test_pending_calls_are_bounded(tmp_path):
+    store = VoiceprintStore(str(tmp_path), max_pending=2)
+    for i in range(4):
+        store.stage(f"call-{i}", "42", {"SPEAKER_00": AGENT})
+    assert len(list((tmp_path / "pending").iterdir())) == 2
+
+
+class FakeWhisper:
+    model = object()
+    model_name = "base"
+    primary = True
+
+
+@pytest.fixture
+def pipeline(store, tmp_path, monkeypatch):
+    """run_transcription with a fake diarization returning fixed speaker embeddings."""
+    calls = []
+    embeddings = {"SPEAKER_00": CLIENT, "SPEAKER_01": AGENT}
+
+    async def fake_diarization(**kwargs):
+        calls.append(kwargs)
+        return {
+            "text": "hola", "language": "es", "confidence": 0.9, "duration": 1.0,
+            "segments": [], "num_speakers": 2, "speaker_embeddings": dict(embeddings),
+        }
+
+    cache = ResultCache(str(tmp_path / "cache"), max_disk_bytes=1 << 20)
+    monkeypatch.setattr(settings, "HF_TOKEN", "token")
+    monkeypatch.setattr(settings, "VOICEPRINT_AUTO_ENROLL_SIMILARITY", 0.8)
+    monkeypatch.setattr(transcription_service, "get_whisper_service", lambda name: FakeWhisper())
+    monkeypatch.setattr(transcription_service, "transcribe_with_diarization", fake_diarization)
+    monkeypatch.setattr(transcription_service, "get_voiceprint_store", lambda: store)
+    monkeypatch.setattr(transcription_service, "get_result_cache", lambda: cache)
+    monkeypatch.setattr(transcription_service, "get_language_memory", lambda: None)
+
+    def run(ejecutivo_id="42", **kwargs):
+        return asyncio.run(transcription_service.run_transcription(
+            np.zeros(16000, np.float32), mode="diarization", language="es",
+            context={"ejecutivo_id": ejecutivo_id}, **kwargs
+        ))
+
+    run.calls = calls
+    run.embeddings = embeddings
+    return run
+
+
+def test_jobs_stage_embeddings_under_the_job_id(store, pipeline):
+    pipeline(job_id="job-1")
+    assert store.confirm("job-1", "SPEAKER_01") == ("42", 1)
+    assert store.identify("42", {"SPEAKER_07": AGENT})[0] == "SPEAKER_07"
+
+
+def test_synchronous_calls_stage_nothing(store, pipeline, tmp_path):
+    pipeline()
+    assert list((tmp_path / "pending").iterdir()) == []
+
+
+def test_cache_hits_stage_the_cached_embeddings(store, pipeline):
+    pipeline(job_id="job-1")
+    pipeline(job_id="job-2")
+    assert len(pipeline.calls) == 1
+    assert store.confirm("job-2", "SPEAKER_01") == ("42", 1)
+
+
+def test_jobs_on_the_same_audio_keep_their_own_ejecutivo(store, pipeline):
+    pipeline("42", job_id="job-1")
+    pipeline("43", job_id="job-2")
+    assert store.confirm("job-1", "SPEAKER_01")[0] == "42"
+    assert store.confirm("job-2", "SPEAKER_00")[0] == "43"
+
+
+def test_confident_match_is_enrolled_without_confirmation(store, pipeline):
+    store.enroll("42", AGENT)
+    pipeline.embeddings["SPEAKER_01"] = np.array([0.95, 0.05, 0.0], dtype=np.float32)
+    pipeline(job_id="job-1")
+    assert store._counts["42"] == 2
+    with pytest.raises(VoiceprintNotFoundError):
+        store.confirm("job-1", "SPEAKER_01")
+
+
+def test_weak_match_is_staged_for_confirmation(store, pipeline):
+    store.enroll("42", AGENT)
+    pipeline.embeddings["SPEAKER_01"] = np.array([0.7, 0.7, 0.0], dtype=np.float32)
+    pipeline(job_id="job-1")
+    assert store._counts["42"] == 1
+    assert store.confirm("job-1", "SPEAKER_01") == ("42", 2)
+
+
+def test_confirm_speaker_endpoint_uses_the_job_id(store, tmp_path, monkeypatch):
+    jobs_store = JobStore(str(tmp_path / "jobs.db"))
+    job = jobs_store.create(
+        mode="diarization", user_id="u", audio_path="/tmp/a.wav", audio_sha256="same-audio",
+        context={"ejecutivo_id": "42"}
+    )
+    jobs_store.claim_next()
+    jobs_store.complete(job["id"], {"segments": [{"speaker": "SPEAKER_01", "role": "ejecutivo"}]})
+    store.stage(job["id"], "42", {"SPEAKER_00": CLIENT, "SPEAKER_01": AGENT})
+    monkeypatch.setattr(jobs, "get_job_store", lambda: jobs_store)
+    monkeypatch.setattr(jobs, "get_voiceprint_store", lambda: store)
+
+    app = FastAPI()
+    app.include_router(jobs.router)
+    client = TestClient(app)
+    url = f"/jobs/{job['id']}/confirm-speaker"
+    response = client.post(url, headers={"X-API-Key": settings.API_KEY})
+    assert response.json() == {"ejecutivo_id": "42", "speaker": "SPEAKER_01", "enrolled_calls": 1}
+    assert client.post(url, headers={"X-API-Key": settings.API_KEY}).status_code == 404
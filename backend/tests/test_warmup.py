@@ -0,0 +1,113 @@
+"""Tests for background model preparation and the readiness probe."""
+import asyncio
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.config import settings
+from app.services import model_registry, model_selector, warmup, whisper_service
+from app.services.warmup import STATE_FAILED, STATE_LOADING, STATE_READY, Readiness, prepare_models
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, **kwargs):
+        self.calls.append((len(audio), kwargs))
+
+
+@pytest.fixture
+def models(monkeypatch):
+    loaded = {"small": FakeModel(), "base": FakeModel()}
+    monkeypatch.setattr(model_registry, "preload_models", lambda: None)
+    monkeypatch.setattr(model_selector, "get_model_selector", lambda: SimpleNamespace(models=list(loaded)))
+    monkeypatch.setattr(whisper_service, "get_whisper_service", lambda name: SimpleNamespace(model=loaded[name]))
+    monkeypatch.setattr(settings, "INFERENCE_AUTOTUNE", False)
+    monkeypatch.setattr(settings, "WARMUP_INFERENCE", True)
+    monkeypatch.setattr(settings, "HF_TOKEN", None)
+    return loaded
+
+
+def test_models_are_loaded_warmed_and_marked_ready(models):
+    readiness = Readiness()
+    asyncio.run(prepare_models(readiness))
+
+    stats = readiness.stats()
+    assert readiness.ready
+    assert set(stats["warmed"]) == {"whisper:small", "whisper:base"}
+    assert stats["load_seconds"] is not None and stats["warmup_seconds"] is not None
+    assert models["small"].calls == [(int(warmup.WARMUP_SECONDS * 16000), {"language": "en"})]
+
+
+def test_failed_diarization_warmup_does_not_block_readiness(models, monkeypatch):
+    from app.services import diarization_service
+
+    class BrokenDiarization:
+        def diarize(self, audio):
+            raise RuntimeError("gated model")
+
+    monkeypatch.setattr(settings, "HF_TOKEN", "token")
+    monkeypatch.setattr(diarization_service, "get_diarization_service", lambda token: BrokenDiarization())
+    readiness = Readiness()
+    asyncio.run(prepare_models(readiness))
+    assert readiness.ready
+    assert "pyannote" not in readiness.warmed
+
+
+def test_load_failure_is_reported(models, monkeypatch):
+    def fail():
+        raise OSError("weights missing")
+
+    monkeypatch.setattr(model_registry, "preload_models", fail)
+    readiness = Readiness()
+    asyncio.run(prepare_models(readiness))
+    assert (readiness.state, readiness.error) == (STATE_FAILED, "weights missing")
+
+
+def test_ready_probe_is_503_until_models_are_ready(monkeypatch):
+    readiness = Readiness()
+    monkeypatch.setattr(main, "get_readiness", lambda: readiness)
+    with TestClient(main.app) as client:
+        readiness.set_state(STATE_LOADING)
+        loading = client.get("/health/ready")
+        assert client.get("/health/live").status_code == 200
+        readiness.set_state(STATE_READY)
+        ready = client.get("/health/ready")
+    assert (loading.status_code, loading.json()["state"]) == (503, STATE_LOADING)
+    assert ready.status_code == 200
+
+
+PROBE_SCRIPT = """
+import sys
+
+attempted = []
+
+
+class RecordImports:
+    def find_spec(self, name, path=None, target=None):
+        if name.split(".")[0] in ("torch", "whisper", "pyannote", "faster_whisper"):
+            attempted.append(name)
+        return None
+
+
+sys.meta_path.insert(0, RecordImports())
+
+from fastapi.testclient import TestClient
+from app.main import app
+
+with TestClient(app) as client:
+    assert client.get("/health/live").status_code == 200
+    assert client.get("/health").status_code == 200
+print(sorted(set(attempted) | {m for m in ("torch", "whisper", "pyannote.audio") if m in sys.modules}))
+"""
+
+
+def test_probes_do_not_import_model_libraries():
+    # A fresh interpreter, so nothing imported by other tests is counted
+    output = subprocess.run([sys.executable, "-c", PROBE_SCRIPT], capture_output=True, text=True, check=True).stdout
+    assert output.strip().splitlines()[-1] == "[]"
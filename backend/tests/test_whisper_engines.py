@@ -0,0 +1,79 @@
+"""Tests for the interchangeable Whisper engines."""
+import sys
+import types
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services.whisper_engines import (
+    FASTER_WHISPER,
+    OPENAI_WHISPER,
+    FasterWhisperEngine,
+    engine_key,
+    load_engine,
+)
+
+
+class FakeWhisperModel:
+    def __init__(self, model_name, device, compute_type, cpu_threads):
+        self.init = (model_name, device, compute_type, cpu_threads)
+        self.calls = []
+
+    def transcribe(self, audio, **kwargs):
+        self.calls.append(kwargs)
+        words = [SimpleNamespace(word=" hola", start=0.0, end=0.4, probability=0.9)]
+        segments = iter([
+            SimpleNamespace(start=0.0, end=1.0, text=" hola", avg_logprob=-0.2, no_speech_prob=0.01, words=words),
+            SimpleNamespace(start=1.0, end=2.0, text=" mundo", avg_logprob=-0.3, no_speech_prob=0.02, words=None),
+        ])
+        return segments, SimpleNamespace(language="es", language_probability=0.97)
+
+
+@pytest.fixture
+def faster_whisper(monkeypatch):
+    module = types.ModuleType("faster_whisper")
+    module.WhisperModel = FakeWhisperModel
+    monkeypatch.setitem(sys.modules, "faster_whisper", module)
+    return module
+
+
+def test_engine_key():
+    assert engine_key("small") == "whisper:small"
+    assert engine_key("small", OPENAI_WHISPER, "float16") == "whisper:small"
+    assert engine_key("small", FASTER_WHISPER) == "whisper:faster-whisper:small:int8"
+    assert engine_key("small", FASTER_WHISPER, "float32") != engine_key("small", FASTER_WHISPER)
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        load_engine("small", backend="onnx")
+
+
+def test_missing_faster_whisper_package_is_reported(monkeypatch):
+    monkeypatch.setitem(sys.modules, "faster_whisper", None)
+    with pytest.raises(RuntimeError, match="faster-whisper"):
+        load_engine("small", backend=FASTER_WHISPER)
+
+
+def test_faster_whisper_returns_openai_whisper_shape(faster_whisper):
+    engine = load_engine("small", backend=FASTER_WHISPER, compute_type="int8", cpu_threads=3)
+    assert isinstance(engine, FasterWhisperEngine)
+    assert engine.model.init == ("small", "auto", "int8", 3)
+
+    result = engine.transcribe(np.zeros(16000, dtype=np.float32), language="es",
+                               word_timestamps=True, fp16=True, initial_prompt="Hola")
+    assert result["text"] == " hola mundo"
+    assert result["language"] == "es"
+    assert [s["id"] for s in result["segments"]] == [0, 1]
+    assert result["segments"][0]["words"] == [{"word": " hola", "start": 0.0, "end": 0.4, "probability": 0.9}]
+    assert result["segments"][1]["words"] == []
+    assert engine.model.calls[-1] == {
+        "language": "es", "word_timestamps": True,
+        "initial_prompt": "Hola", "condition_on_previous_text": True,
+    }
+
+
+def test_faster_whisper_detect_language(faster_whisper):
+    engine = FasterWhisperEngine("small")
+    assert engine.detect_language(np.zeros(16000, dtype=np.float32)) == ("es", 0.97)
@@ -0,0 +1,30 @@
+-- =============================================
+-- SCRIPT DE ACTUALIZACIÓN: Tabla transcriptions del backend Speech-to-Text
+-- =============================================
+-- El backend (PERSIST_TRANSCRIPTIONS=true) inserta los resultados en lotes
+-- en la tabla 'transcriptions' vía PostgREST. Los segmentos de diarización
+-- se guardan como JSONB.
+-- Ejecutar si la tabla no existe o le faltan columnas (idempotente).
+
+CREATE TABLE IF NOT EXISTS transcriptions (
+    id BIGSERIAL PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    audio_url TEXT,
+    transcription TEXT NOT NULL,
+    language VARCHAR(10),
+    confidence REAL,
+    duration_seconds REAL,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+ALTER TABLE transcriptions ADD COLUMN IF NOT EXISTS mode VARCHAR(20) DEFAULT 'simple';
+ALTER TABLE transcriptions ADD COLUMN IF NOT EXISTS num_speakers INTEGER;
+ALTER TABLE transcriptions ADD COLUMN IF NOT EXISTS segments JSONB;
+ALTER TABLE transcriptions ADD COLUMN IF NOT EXISTS metadata JSONB;
+
+CREATE INDEX IF NOT EXISTS idx_transcriptions_user ON transcriptions(user_id);
+
+-- Verificación
+SELECT column_name, data_type
+FROM information_schema.columns
+WHERE table_name = 'transcriptions';